@@ -1,25 +1,73 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import time
-import json
+import os
+import sys
 import hashlib
+import io
+import threading
+from datetime import datetime
 from pathlib import Path
-import plotly.graph_objects as go
+# plotly is imported inside the functions that chart, so pages without
+# charts (login, profile, single predictions) don't pay for it
 
 # ==============================
 # PATHS & CONSTANTS
 # ==============================
 BASE_DIR = Path(__file__).resolve().parent.parent
-MODEL_PATH = BASE_DIR / "models" / "xgboost_model.pkl"
-USERS_DB_PATH = Path(__file__).resolve().parent / "users.json"
-
-EMOTION_MAPPING = {
-    0: "Fear 😨",
-    1: "Happy 😊",
-    2: "Sad 😢",
-}
+# Users and prediction history live in one SQLite database; users.json is
+# the old user file, imported into it once. EEG_USER_STORE=<path>.json keeps
+# users in a JSON file instead
+APP_DB_PATH = Path(os.environ.get("EEG_APP_DB", Path(__file__).resolve().parent / "app.db"))
+USERS_JSON_PATH = Path(__file__).resolve().parent / "users.json"
+USER_STORE_PATH = Path(os.environ.get("EEG_USER_STORE", APP_DB_PATH))
+LATENCY_LOG_PATH = Path(__file__).resolve().parent / "latency_log.jsonl"
+# Rendered theme stylesheets, served as app/static/... (see theme_stylesheet)
+THEME_CSS_DIR = Path(__file__).resolve().parent / "static"
+# Older Streamlit serves app/static/*.css as text/plain with nosniff, so the
+# browser would drop the @import'ed stylesheet; those versions get it inline
+STATIC_CSS_MIN_STREAMLIT = (1, 56)
+
+# History timestamps are stored as epoch seconds and shown in local time
+LOCAL_TZ = datetime.now().astimezone().tzinfo
+
+# Make `Deployment.*` importable when run as `streamlit run Deployment/app.py`
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from Deployment.batching import MicroBatcher
+from Deployment.history import HistoryStore
+from Deployment.inference import BATCH_CHUNK_SIZE, EMOTION_MAPPING, batch_results_frame, predict_batch
+from Deployment.registry import DEFAULT_VARIANT, VARIANT_LABELS, ModelRegistry, list_variants
+from Deployment.timing import PhaseTimer, latency_percentiles, log_timings
+from Deployment.users import open_user_store
+
+# Import time of this script's first run in the process (reruns find the
+# modules already imported)
+IMPORT_MS = (time.perf_counter() - _IMPORT_START) * 1000.0
+
+# Score through the HTTP inference service (Deployment/service.py) at this
+# URL instead of loading a model copy into the Streamlit process
+INFERENCE_URL = os.environ.get("EEG_INFERENCE_URL")
+
+# Parsed uploads kept in memory, keyed by content hash
+UPLOAD_CACHE_ENTRIES = 8
+
+# Dashboard tables and figures cached (per user, history version and theme)
+DASHBOARD_CACHE_ENTRIES = 64
+
+# Points drawn on the prediction timeline; longer histories are sampled
+TIMELINE_MAX_POINTS = 1000
+
+# Latency-log records (from its end) summarised in the latency panel
+LATENCY_PANEL_RECORDS = 5000
+
+# Load the model and score a dummy batch at startup instead of on the first
+# prediction (EEG_WARMUP=0 keeps loading lazy)
+WARMUP = os.environ.get("EEG_WARMUP", "1") != "0"
 
 # ==============================
 # PAGE CONFIG
@@ -236,6 +284,24 @@ footer[data-testid="stFooter"] { display: none; }
     50% { transform: scaleY(1.3); opacity: 1; }
 }
 
+/* ---------- TYPEWRITER ---------- */
+.typewriter {
+    display: inline-block;
+    overflow: hidden;
+    white-space: nowrap;
+    vertical-align: bottom;
+    border-right: 2px solid __ACCENT__;
+    animation: typing 1.6s steps(48, end), caret 0.8s step-end 3 forwards;
+}
+@keyframes typing {
+    from { max-width: 0; }
+    to { max-width: 100%; }
+}
+@keyframes caret {
+    50% { border-color: transparent; }
+    100% { border-color: transparent; }
+}
+
 /* ---------- NEURAL WAVE LINE ---------- */
 .neural-wave {
     position: relative;
@@ -319,6 +385,65 @@ footer[data-testid="stFooter"] { display: none; }
     return css
 
 
+@st.cache_resource(show_spinner=False)
+def theme_stylesheet(theme_mode: str, static_serving: bool) -> dict:
+    """
+    The theme's CSS, rendered once per process, with a stable content hash.
+    With static serving on (Deployment/.streamlit/config.toml) it is also
+    written to static/theme-<mode>-<hash>.css, and the page only carries an
+    @import of that file: the browser fetches and caches it once per theme,
+    and a rerun re-sends ~80 bytes instead of the whole stylesheet.
+    """
+    start = time.perf_counter()
+    css = get_app_css(theme_mode)
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:16]
+    markup = css
+    if static_serving:
+        name = f"theme-{theme_mode}-{digest}.css"
+        try:
+            THEME_CSS_DIR.mkdir(exist_ok=True)
+            if not (THEME_CSS_DIR / name).exists():
+                for stale in THEME_CSS_DIR.glob(f"theme-{theme_mode}-*.css"):
+                    stale.unlink()
+                rules = css.strip().removeprefix("<style>").removesuffix("</style>")
+                tmp = THEME_CSS_DIR / f".{name}.tmp"
+                tmp.write_text(rules, encoding="utf-8")
+                os.replace(tmp, THEME_CSS_DIR / name)
+            markup = f'<style>@import url("app/static/{name}");</style>'
+        except OSError:
+            pass  # read-only app directory: inline the stylesheet
+    return {
+        "hash": digest,
+        "markup": markup,
+        "css_bytes": len(css.encode("utf-8")),
+        "build_ms": (time.perf_counter() - start) * 1000.0,
+    }
+
+
+def static_css_supported() -> bool:
+    """Whether this Streamlit serves app/static/*.css as text/css (see STATIC_CSS_MIN_STREAMLIT)."""
+    try:
+        version = tuple(int(part) for part in st.__version__.split(".")[:2])
+    except ValueError:
+        return False
+    return version >= STATIC_CSS_MIN_STREAMLIT
+
+
+def inject_theme_css(theme_mode: str) -> None:
+    """Send the theme's (cached) stylesheet markup and note its size and cost for this rerun."""
+    start = time.perf_counter()
+    static_serving = bool(st.get_option("server.enableStaticServing")) and static_css_supported()
+    sheet = theme_stylesheet(theme_mode, static_serving)
+    st.markdown(sheet["markup"], unsafe_allow_html=True)
+    st.session_state.theme_css_stats = {
+        "hash": sheet["hash"],
+        "bytes": len(sheet["markup"].encode("utf-8")),
+        "css_bytes": sheet["css_bytes"],
+        "build_ms": sheet["build_ms"],
+        "ms": (time.perf_counter() - start) * 1000.0,
+    }
+
+
 # ==============================
 # SIMPLE AUTH SYSTEM
 # ==============================
@@ -326,61 +451,78 @@ def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode("utf-8")).hexdigest()
 
 
-def load_users() -> dict:
-    if not USERS_DB_PATH.exists():
-        return {}
-    with open(USERS_DB_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+@st.cache_resource(show_spinner=False)
+def user_store():
+    """Shared by all sessions; created (and users.json imported) on first use."""
+    return open_user_store(USER_STORE_PATH, legacy_json=USERS_JSON_PATH)
+
+
+@st.cache_resource(show_spinner=False)
+def history_store():
+    """Prediction history of all users, kept across sessions and restarts."""
+    return HistoryStore(APP_DB_PATH)
 
 
-def save_users(users: dict) -> None:
-    with open(USERS_DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(users, f, indent=4)
+def record_prediction(file_name: str, record_id: str, pred_label: str) -> None:
+    history_store().append(st.session_state.username, file_name, record_id, pred_label)
 
 
 def signup(username: str, password: str):
-    users = load_users()
-    if username in users:
+    # One atomic insert: of two concurrent signups for a name, one fails
+    if not user_store().add(username, hash_password(password)):
         return False, "Username already exists. Please choose another."
-    users[username] = {
-        "password": hash_password(password),
-        "created_at": time.time(),
-    }
-    save_users(users)
     return True, "Account created successfully! 🎉"
 
 
 def login(username: str, password: str):
-    users = load_users()
-    if username not in users:
+    user = user_store().get(username)
+    if user is None:
         return False, "User not found. Please sign up."
-    if users[username]["password"] != hash_password(password):
+    if user["password"] != hash_password(password):
         return False, "Incorrect password. Try again."
     return True, "Logged in successfully ✅"
 
 
 # ==============================
-# LOAD MODEL (WITH FALLBACK)
+# LOAD MODEL (FROM THE REGISTRY)
 # ==============================
-class MockModel:
-    def predict(self, data):
-        return np.random.randint(0, 3, size=len(data))
-
-    def predict_proba(self, data):
-        proba = np.random.rand(len(data), 3)
-        return proba / proba.sum(axis=1, keepdims=True)
-
-
 @st.cache_resource(show_spinner=False)
-def load_model():
+def load_model(variant=DEFAULT_VARIANT):
+    """(model, registry) for a model variant; registry is None when scoring via the service."""
+    if INFERENCE_URL:
+        from Deployment.client import InferenceClient
+
+        return InferenceClient(INFERENCE_URL), None
+    # The registry loads the newest version on first prediction and swaps in
+    # new versions as they are registered. Cached as a resource, so all
+    # sessions using a variant share one batcher: concurrent single-record
+    # predictions are scored together in one model call
+    registry = ModelRegistry(variant)
+    if WARMUP:
+        # Off the script thread, so the first page renders meanwhile; a
+        # prediction made before it finishes waits for the model to load
+        threading.Thread(target=warm_up_model, args=(registry,), name="model-warmup", daemon=True).start()
+    return MicroBatcher(registry), registry
+
+
+def warm_up_model(registry):
     try:
-        model = joblib.load(MODEL_PATH)
-        return model, False
+        timings = registry.warm_up()
     except Exception:
-        return MockModel(), True
+        return  # the first prediction will load (and report) it
+    log_timings(LATENCY_LOG_PATH, "warmup", timings, variant=registry.name)
 
 
-MODEL, USING_MOCK = load_model()
+@st.cache_resource(show_spinner=False)
+def record_startup():
+    """Log the import time once per process."""
+    log_timings(LATENCY_LOG_PATH, "startup", {"imports": IMPORT_MS})
+    return IMPORT_MS
+
+
+def current_model():
+    """(model, registry) for the variant picked in this session."""
+    return load_model(st.session_state.model_variant)
 
 
 # ==============================
@@ -392,39 +534,124 @@ if "username" not in st.session_state:
     st.session_state.username = None
 if "df" not in st.session_state:
     st.session_state.df = None
-if "history" not in st.session_state:
-    st.session_state.history = []
 if "theme_mode" not in st.session_state:
     st.session_state.theme_mode = "dark"  # dark by default
 if "dashboard_intro_done" not in st.session_state:
     st.session_state.dashboard_intro_done = False
+if "batch_result" not in st.session_state:
+    st.session_state.batch_result = None
+if "upload_hashes" not in st.session_state:
+    st.session_state.upload_hashes = {}
+if "df_hash" not in st.session_state:
+    st.session_state.df_hash = None
+if "df_name" not in st.session_state:
+    st.session_state.df_name = None
+if "model_variant" not in st.session_state:
+    st.session_state.model_variant = DEFAULT_VARIANT
+
+# Once per process: log the import time and start warming the model while
+# the login page renders
+record_startup()
+current_model()
 
 # Inject CSS according to theme
-st.markdown(get_app_css(st.session_state.theme_mode), unsafe_allow_html=True)
+inject_theme_css(st.session_state.theme_mode)
 
 
 # ==============================
 # SMALL HELPERS
 # ==============================
-def typewriter(text: str, key: str, speed: float = 0.03):
-    """Simple typewriter effect; runs once per session for given key."""
-    placeholder = st.empty()
+def typewriter(text: str, key: str):
+    """
+    Typewriter effect, animated in the browser with CSS so the script never
+    sleeps; runs once per session for given key.
+    """
     flag_key = f"{key}_done"
     if st.session_state.get(flag_key):
-        placeholder.markdown(text)
+        st.markdown(text)
         return
 
-    out = ""
-    for ch in text:
-        out += ch
-        placeholder.markdown(out)
-        time.sleep(speed)
+    st.markdown(f'<span class="typewriter">{text}</span>', unsafe_allow_html=True)
     st.session_state[flag_key] = True
 
 
-def apply_plotly_theme(fig: go.Figure):
-    """Make Plotly charts match dark/light theme."""
-    if st.session_state.theme_mode == "dark":
+def show_timings(timer: PhaseTimer):
+    st.caption(f"⏱ {timer.summary()}")
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def logged_latency(size: int, mtime_ns: int) -> dict:
+    """Percentiles of the latency log's tail; recomputed only when the log's (size, mtime) changes."""
+    return latency_percentiles(LATENCY_LOG_PATH, limit=LATENCY_PANEL_RECORDS)
+
+
+def latency_panel():
+    """p50/p95 of the logged phase timings."""
+    with st.expander("⏱ Latency (p50 / p95)"):
+        try:
+            stat = LATENCY_LOG_PATH.stat()
+        except OSError:
+            stat = None
+        summary = logged_latency(stat.st_size, stat.st_mtime_ns) if stat else {}
+        if not summary:
+            st.caption("No predictions timed yet.")
+            return
+        rows = [
+            {"Event": event, "Phase": phase, "Count": stats["count"],
+             "p50 (ms)": round(stats["p50"], 2), "p95 (ms)": round(stats["p95"], 2)}
+            for (event, phase), stats in sorted(summary.items())
+        ]
+        st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+
+        model, _ = current_model()
+        css = st.session_state.get("theme_css_stats")
+        if css:
+            st.caption(
+                f"Theme CSS: {css['bytes']:,} bytes per rerun ({css['ms']:.2f} ms) · "
+                f"stylesheet {css['css_bytes']:,} bytes, built once in {css['build_ms']:.2f} ms · "
+                f"hash {css['hash']}"
+            )
+
+        if isinstance(model, MicroBatcher):
+            m = model.metrics()
+            if m["batches"]:
+                st.caption(
+                    f"Micro-batching: {m['requests']:,} requests in {m['batches']:,} model calls · "
+                    f"batch rows p50 {m['batch_rows_p50']:.0f} / p95 {m['batch_rows_p95']:.0f} · "
+                    f"queue wait p50 {m['queue_wait_ms_p50']:.2f} / p95 {m['queue_wait_ms_p95']:.2f} ms"
+                )
+
+
+def model_panel():
+    """Sidebar model picker, with the served version's metadata."""
+    variants = sorted(set(list_variants()) | {DEFAULT_VARIANT})
+    if len(variants) > 1:
+        st.selectbox(
+            "Model",
+            variants,
+            key="model_variant",
+            format_func=lambda name: VARIANT_LABELS.get(name, name),
+        )
+    _, registry = current_model()
+    if registry.using_mock:
+        st.warning(f"No '{registry.name}' model found in models/. Predictions are random.", icon="⚠️")
+        return
+    info = registry.describe()
+    meta = info["metadata"]
+    details = [f"{VARIANT_LABELS.get(info['name'], info['name'])} "
+               + (f"v{info['version']}" if info["version"] else "(xgboost_model.pkl)")]
+    if meta.get("test_accuracy") is not None:
+        details.append(f"test acc {meta['test_accuracy']:.3f}")
+    if meta.get("window_seconds") is not None:
+        details.append(f"{meta['window_seconds']:g} s windows")
+    if not info["loaded"]:
+        details.append("loads on first prediction")
+    st.caption(" · ".join(details))
+
+
+def apply_plotly_theme(fig, theme_mode: str = None):
+    """Make Plotly charts match dark/light theme (the session's, unless given)."""
+    if (theme_mode or st.session_state.theme_mode) == "dark":
         font_color = "#e5e7eb"
     else:
         font_color = "#111827"
@@ -436,6 +663,69 @@ def apply_plotly_theme(fig: go.Figure):
     )
 
 
+def downcast_floats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    float64 columns -> float32, at half the memory. The model input is rounded
+    to float32 before the StandardScaler, so scores can differ in the last
+    digits from scoring the file's float64 values directly; the app's own
+    predictions are unchanged, as feature_matrix() casts to float32 anyway.
+    """
+    float_cols = df.select_dtypes(include="float64").columns
+    if len(float_cols):
+        df[float_cols] = df[float_cols].astype(np.float32)
+    return df
+
+
+@st.cache_data(show_spinner=False, max_entries=UPLOAD_CACHE_ENTRIES)
+def parse_upload(content_hash: str, file_name: str, _data: bytes) -> pd.DataFrame:
+    """
+    Parse an uploaded CSV/Excel file. Cached on the content hash (the raw
+    bytes are not hashed again by Streamlit), so reruns reuse the frame.
+    """
+    buffer = io.BytesIO(_data)
+    if file_name.lower().endswith(".csv"):
+        df = pd.read_csv(buffer)
+    else:
+        df = pd.read_excel(buffer)
+    return downcast_floats(df)
+
+
+def upload_content_hash(uploaded_file) -> str:
+    """SHA-256 of an upload, computed once per uploaded file."""
+    hashes = st.session_state.upload_hashes
+    file_id = getattr(uploaded_file, "file_id", None) or uploaded_file.name
+    if file_id not in hashes:
+        hashes.clear()  # only the current upload is needed
+        hashes[file_id] = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    return hashes[file_id]
+
+
+@st.cache_resource(show_spinner=False, max_entries=UPLOAD_CACHE_ENTRIES)
+def build_subject_index(content_hash: str, _df: pd.DataFrame) -> dict:
+    """
+    Row index of an upload grouped by subject_id, built once per content hash
+    and shared read-only (cache_resource does not pickle it on every rerun).
+
+    Rows are ordered by subject (stable), so the rows of the subject with code
+    c are positions order[offsets[c]:offsets[c + 1]]; order is None when the
+    file is already grouped by subject, and the rows are a plain slice.
+    """
+    codes, uniques = pd.factorize(_df["subject_id"], sort=True, use_na_sentinel=False)
+    order = np.argsort(codes, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(uniques)))])
+    if np.array_equal(order, np.arange(len(order))):
+        order = None
+    return {"labels": [str(u) for u in uniques], "offsets": offsets, "order": order}
+
+
+def subject_rows(df: pd.DataFrame, index: dict, code: int) -> pd.DataFrame:
+    """Rows of the subject with categorical code `code`, without scanning the column."""
+    start, stop = index["offsets"][code], index["offsets"][code + 1]
+    if index["order"] is None:
+        return df.iloc[start:stop]
+    return df.iloc[index["order"][start:stop]]
+
+
 # ==============================
 # AUTH SCREEN
 # ==============================
@@ -501,8 +791,10 @@ def sidebar_menu():
         st.markdown(f"**{st.session_state.username}**")
         st.caption("Brainwave Emotion Analyst")
 
-        if USING_MOCK:
-            st.warning("Using mock model (xgboost_model.pkl not found). Predictions are random.", icon="⚠️")
+        if INFERENCE_URL:
+            st.caption(f"Scoring via inference service at {INFERENCE_URL}")
+        else:
+            model_panel()
 
         st.markdown("---")
 
@@ -546,9 +838,11 @@ def page_dashboard():
     st.markdown('<div class="page-brain">🧠</div>', unsafe_allow_html=True)
 
     col1, col2, col3 = st.columns(3)
-    total_preds = len(st.session_state.history)
-    last_emotion = st.session_state.history[-1]["pred_label"] if total_preds > 0 else "—"
-    uniq_files = len({h["file_name"] for h in st.session_state.history}) if total_preds > 0 else 0
+    # Running aggregates: reading them costs the same however long the history is
+    stats = history_store().stats(st.session_state.username)
+    total_preds = stats["total"]
+    last_emotion = stats["last_label"] or "—"
+    uniq_files = stats["files"]
 
     with col1:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
@@ -572,16 +866,35 @@ def page_dashboard():
         st.info("No predictions yet. Go to **Upload & Predict** to start.")
         return
 
-    hist_df = pd.DataFrame(st.session_state.history)
-    st.dataframe(hist_df.tail(10), use_container_width=True)
+    # Everything below is cached by the history's version (its prediction
+    # count), so reruns without a new prediction rebuild nothing
+    user, version, theme = st.session_state.username, stats["total"], st.session_state.theme_mode
+    st.dataframe(recent_predictions(user, version), width="stretch")
 
     # 3D-style emotion distribution
     st.markdown("### Emotion Distribution (3D View)")
-    counts = hist_df["pred_label"].value_counts()
-    emotions = list(counts.index)
+    st.plotly_chart(distribution_figure(user, version, theme, stats["label_counts"]), width="stretch")
+
+    # Timeline chart
+    st.markdown("### Prediction Timeline")
+    st.plotly_chart(timeline_figure(user, version, theme), width="stretch")
+    if version > TIMELINE_MAX_POINTS:
+        st.caption(f"Showing {TIMELINE_MAX_POINTS:,} of {version:,} predictions, evenly spaced.")
+
+
+@st.cache_data(show_spinner=False, max_entries=DASHBOARD_CACHE_ENTRIES)
+def recent_predictions(user: str, version: int) -> pd.DataFrame:
+    return pd.DataFrame(history_store().recent(user, 10))
+
+
+@st.cache_data(show_spinner=False, max_entries=DASHBOARD_CACHE_ENTRIES)
+def distribution_figure(user: str, version: int, theme_mode: str, label_counts: dict):
+    import plotly.graph_objects as go
+
+    emotions = list(label_counts)
     x = list(range(len(emotions)))
     y = [0] * len(emotions)
-    z = list(counts.values)
+    z = list(label_counts.values())
 
     fig3d = go.Figure(
         data=[
@@ -609,20 +922,26 @@ def page_dashboard():
         margin=dict(l=0, r=0, t=0, b=0),
         height=420,
     )
-    apply_plotly_theme(fig3d)
-    st.plotly_chart(fig3d, use_container_width=True)
+    apply_plotly_theme(fig3d, theme_mode)
+    return fig3d
 
-    # Timeline chart
-    st.markdown("### Prediction Timeline")
-    hist_df["timestamp_dt"] = pd.to_datetime(hist_df["timestamp"])
-    hist_df_sorted = hist_df.sort_values("timestamp_dt")
+
+@st.cache_data(show_spinner=False, max_entries=DASHBOARD_CACHE_ENTRIES)
+def timeline_figure(user: str, version: int, theme_mode: str):
+    import plotly.graph_objects as go
+
+    # At most TIMELINE_MAX_POINTS points, sampled in the database by sequence number
+    timeline = pd.DataFrame(
+        history_store().timeline(user, max_points=TIMELINE_MAX_POINTS), columns=["seq", "ts", "pred_label"]
+    )
+    timestamps = pd.to_datetime(timeline["ts"], unit="s", utc=True).dt.tz_convert(LOCAL_TZ).dt.tz_localize(None)
     fig_tl = go.Figure(
         data=[
             go.Scatter(
-                x=hist_df_sorted["timestamp_dt"],
-                y=list(range(len(hist_df_sorted))),
+                x=timestamps,
+                y=timeline["seq"] - 1,
                 mode="lines+markers",
-                text=hist_df_sorted["pred_label"],
+                text=timeline["pred_label"],
                 hovertemplate="Time: %{x}<br>Emotion: %{text}<extra></extra>",
             )
         ]
@@ -633,14 +952,15 @@ def page_dashboard():
         height=380,
         margin=dict(l=0, r=0, t=10, b=0),
     )
-    apply_plotly_theme(fig_tl)
-    st.plotly_chart(fig_tl, use_container_width=True)
+    apply_plotly_theme(fig_tl, theme_mode)
+    return fig_tl
 
 
 def page_upload_predict():
     st.markdown('<div class="app-title">📁 Upload & Predict</div>', unsafe_allow_html=True)
     st.markdown(
-        '<div class="app-subtitle">Upload EEG feature data, select a record, and predict the emotional state.</div>',
+        '<div class="app-subtitle">Upload EEG feature data, select a record or score the whole file, '
+        'and predict the emotional state.</div>',
         unsafe_allow_html=True,
     )
 
@@ -650,16 +970,19 @@ def page_upload_predict():
         help="File should contain EEG features. Optionally include a 'subject_id' column.",
     )
 
+    timer = PhaseTimer()
     if uploaded_file is not None:
         try:
-            if uploaded_file.name.lower().endswith(".csv"):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            with timer.phase("parse"):
+                content_hash = upload_content_hash(uploaded_file)
+                df = parse_upload(content_hash, uploaded_file.name, uploaded_file.getvalue())
             st.session_state.df = df
+            st.session_state.df_hash = content_hash
+            st.session_state.df_name = uploaded_file.name
         except Exception as e:
             st.error(f"Error reading the file: {e}")
             st.session_state.df = None
+            st.session_state.df_hash = None
 
     df = st.session_state.df
     if df is None:
@@ -669,21 +992,42 @@ def page_upload_predict():
     st.success("File uploaded successfully ✅")
 
     with st.expander("Preview data"):
-        st.dataframe(df.head(), use_container_width=True)
+        st.dataframe(df.head(), width="stretch")
+
+    mode = st.radio("Prediction mode", ["Single record", "All records"], horizontal=True)
+    if mode == "All records":
+        batch_predict_section(df, st.session_state.df_name or "upload", timer)
+        latency_panel()
+        return
 
     st.markdown("### Select a record")
 
     if "subject_id" in df.columns:
-        options = df["subject_id"].astype(str).tolist()
-        selected = st.selectbox("Choose subject_id", options)
-        selected_row = df[df["subject_id"].astype(str) == selected]
+        subject_index = build_subject_index(st.session_state.df_hash, df)
+        labels = subject_index["labels"]
+        code = st.selectbox("Choose subject_id", range(len(labels)), format_func=labels.__getitem__)
+        with timer.phase("select"):
+            subject_df = subject_rows(df, subject_index, code)
+        selected = labels[code]
+        if len(subject_df) > 1:
+            position = st.number_input(
+                f"Record of subject {selected} (1-{len(subject_df)})",
+                min_value=1,
+                max_value=len(subject_df),
+                value=1,
+            )
+            selected = f"{selected}#{position}"
+            selected_row = subject_df.iloc[[position - 1]]
+        else:
+            selected_row = subject_df
     else:
         options = df.index.tolist()
         selected = st.selectbox("Choose row index", options)
-        selected_row = df.loc[[selected]]
+        with timer.phase("select"):
+            selected_row = df.loc[[selected]]
 
     st.write("#### Selected Record")
-    st.dataframe(selected_row, use_container_width=True)
+    st.dataframe(selected_row, width="stretch")
 
     st.markdown("### Predict Emotion")
 
@@ -702,49 +1046,141 @@ def page_upload_predict():
                 unsafe_allow_html=True,
             )
 
-            model_input = selected_row.copy()
-            if "subject_id" in model_input.columns:
-                model_input = model_input.drop(columns=["subject_id"])
-
-            time.sleep(1.4)  # visual delay
+            with timer.phase("select"):
+                model_input = selected_row.drop(columns=["subject_id"], errors="ignore")
 
             try:
-                if hasattr(MODEL, "predict_proba"):
-                    probs = MODEL.predict_proba(model_input)[0]
-                    pred_class = int(np.argmax(probs))
-                else:
-                    pred_class = int(MODEL.predict(model_input)[0])
-                    probs = None
+                with timer.phase("inference"):
+                    model, _ = current_model()
+                    if hasattr(model, "predict_proba"):
+                        probs = model.predict_proba(model_input)[0]
+                        pred_class = int(np.argmax(probs))
+                    else:
+                        pred_class = int(model.predict(model_input)[0])
+                        probs = None
 
                 pred_label = EMOTION_MAPPING.get(pred_class, "Unknown 🤔")
 
-                col1, col2 = st.columns([2, 3])
-                with col1:
-                    st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                    st.metric("Predicted Emotional State", pred_label)
-                    st.markdown("</div>", unsafe_allow_html=True)
+                with timer.phase("render"):
+                    col1, col2 = st.columns([2, 3])
+                    with col1:
+                        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+                        st.metric("Predicted Emotional State", pred_label)
+                        st.markdown("</div>", unsafe_allow_html=True)
+
+                    if probs is not None:
+                        prob_df = pd.DataFrame(
+                            {"Emotion": list(EMOTION_MAPPING.values()), "Probability": probs}
+                        ).set_index("Emotion")
+                        with col2:
+                            st.bar_chart(prob_df)
 
-                if probs is not None:
-                    prob_df = pd.DataFrame(
-                        {"Emotion": list(EMOTION_MAPPING.values()), "Probability": probs}
-                    ).set_index("Emotion")
-                    with col2:
-                        st.bar_chart(prob_df)
+                show_timings(timer)
+                log_timings(LATENCY_LOG_PATH, "predict_single", timer.timings, rows=len(model_input))
 
                 # Save to history
-                st.session_state.history.append(
-                    {
-                        "user": st.session_state.username,
-                        "file_name": uploaded_file.name,
-                        "record_id": str(selected),
-                        "pred_label": pred_label,
-                        "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    }
-                )
+                record_prediction(st.session_state.df_name, str(selected), pred_label)
 
             except Exception as e:
                 st.error(f"An error occurred during prediction: {e}")
 
+    latency_panel()
+
+
+def batch_predict_section(df: pd.DataFrame, file_name: str, timer: PhaseTimer):
+    st.markdown(f"### Predict All Records ({len(df):,} rows)")
+    chunk_size = st.number_input(
+        "Rows per model call",
+        min_value=1,
+        value=BATCH_CHUNK_SIZE,
+        step=1000,
+        help="The file is scored in chunks of this many rows, one vectorized call each.",
+    )
+
+    predicted = st.button("⚡ Predict All")
+    if predicted:
+        with timer.phase("select"):
+            model_input = df.drop(columns=["subject_id"], errors="ignore")
+        try:
+            with st.spinner(f"Scoring {len(df):,} records..."):
+                start = time.perf_counter()
+                pred_classes, probs = predict_batch(current_model()[0], model_input, chunk_size)
+                elapsed = time.perf_counter() - start
+            timer.add("inference", elapsed * 1000.0)
+        except Exception as e:
+            st.error(f"An error occurred during prediction: {e}")
+            return
+
+        results = batch_results_frame(df, pred_classes, probs)
+        st.session_state.batch_result = {
+            "file_name": file_name,
+            "results": results,
+            "probs": probs,
+            "seconds": elapsed,
+        }
+        majority = results["pred_label"].mode().iat[0] if len(results) else "—"
+        record_prediction(file_name, f"all ({len(results)} rows)", majority)
+
+    # Kept in the session so the results survive the rerun triggered by the download button
+    batch = st.session_state.batch_result
+    if batch is None or batch["file_name"] != file_name:
+        return
+
+    with timer.phase("render"):
+        render_batch_result(batch)
+
+    if predicted:
+        show_timings(timer)
+        log_timings(LATENCY_LOG_PATH, "predict_all", timer.timings, rows=len(batch["results"]))
+
+
+def render_batch_result(batch: dict):
+    import plotly.graph_objects as go
+
+    results = batch["results"]
+    rows_per_sec = len(results) / batch["seconds"] if batch["seconds"] > 0 else float("inf")
+    st.caption(f"Scored {len(results):,} rows in {batch['seconds']:.3f} s ({rows_per_sec:,.0f} rows/sec).")
+
+    counts = results["pred_label"].value_counts()
+    cols = st.columns(len(EMOTION_MAPPING))
+    for col, label in zip(cols, EMOTION_MAPPING.values()):
+        with col:
+            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+            st.metric(label, f"{int(counts.get(label, 0)):,}")
+            st.markdown("</div>", unsafe_allow_html=True)
+
+    if batch["probs"] is not None:
+        st.markdown("### Probability Distribution")
+        fig_hist = go.Figure()
+        for cls, label in EMOTION_MAPPING.items():
+            fig_hist.add_trace(
+                go.Histogram(
+                    x=batch["probs"][:, cls],
+                    name=label,
+                    opacity=0.6,
+                    xbins=dict(start=0, end=1, size=0.05),
+                )
+            )
+        fig_hist.update_layout(
+            barmode="overlay",
+            xaxis_title="Predicted probability",
+            yaxis_title="Records",
+            height=360,
+            margin=dict(l=0, r=0, t=10, b=0),
+        )
+        apply_plotly_theme(fig_hist)
+        st.plotly_chart(fig_hist, width="stretch")
+
+    with st.expander("Preview results"):
+        st.dataframe(results.head(100), width="stretch")
+
+    st.download_button(
+        "⬇️ Download predictions (CSV)",
+        data=results.to_csv(index=False).encode("utf-8"),
+        file_name=f"{Path(batch['file_name']).stem}_predictions.csv",
+        mime="text/csv",
+    )
+
 
 def page_profile():
     st.markdown('<div class="app-title">👤 Profile</div>', unsafe_allow_html=True)
@@ -756,8 +1192,8 @@ def page_profile():
     st.markdown("### Account")
 
     col1, col2 = st.columns(2)
-    users = load_users()
-    created_ts = users.get(st.session_state.username, {}).get("created_at", None)
+    user = user_store().get(st.session_state.username) or {}
+    created_ts = user.get("created_at", None)
 
     with col1:
         st.write(f"**Username:** {st.session_state.username}")
@@ -767,7 +1203,7 @@ def page_profile():
             st.write(f"**Joined:** {created.strftime('%d %B %Y')}")
 
     st.markdown("### Prediction Stats")
-    st.write(f"**Total predictions:** {len(st.session_state.history)}")
+    st.write(f"**Total predictions:** {history_store().stats(st.session_state.username)['total']}")
 
 
 def page_about():
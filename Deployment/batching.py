@@ -0,0 +1,170 @@
+"""
+Thread-safe micro-batching in front of a model's predict_proba.
+
+Single-row predictions are dominated by the per-call overhead of XGBoost,
+not by the rows themselves. MicroBatcher lets many threads (Streamlit
+sessions, service requests) submit rows; a worker thread collects whatever
+arrives within `max_wait_ms` (or until `max_batch_rows` rows) and scores it
+in one call:
+
+    batcher = MicroBatcher(model)
+    probs = batcher.predict_proba(frame)          # blocks, model-like
+    future = batcher.submit(matrix)               # concurrent.futures.Future
+
+metrics() reports batch sizes, queue waits and inference times.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from Deployment.inference import feature_matrix, predict_proba
+
+MAX_BATCH_ROWS = 4096
+MAX_WAIT_MS = 2.0
+
+# A batch closes early once no request arrived for this fraction of max_wait
+IDLE_GAP_FRACTION = 0.1
+
+# Batches kept for the percentile metrics
+METRICS_WINDOW = 2048
+
+
+class _Request:
+    __slots__ = ("matrix", "future", "enqueued")
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """Model-like wrapper that merges concurrent predict_proba calls into batches."""
+
+    def __init__(self, model, max_batch_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.idle_gap = self.max_wait * IDLE_GAP_FRACTION
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+        self._batch_rows = deque(maxlen=METRICS_WINDOW)
+        self._batch_requests = deque(maxlen=METRICS_WINDOW)
+        self._queue_wait_ms = deque(maxlen=METRICS_WINDOW)
+        self._inference_ms = deque(maxlen=METRICS_WINDOW)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed.")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, matrix) -> Future:
+        """Queue a float (rows, features) matrix; the future resolves to its probabilities."""
+        self._ensure_worker()
+        request = _Request(matrix)
+        self._queue.put(request)
+        return request.future
+
+    def predict_proba(self, data) -> np.ndarray:
+        matrix = feature_matrix(self.model, data)
+        if not len(matrix):
+            return predict_proba(self.model, matrix)
+        return self.submit(matrix).result()
+
+    def predict(self, data) -> np.ndarray:
+        return self.predict_proba(data).argmax(axis=1)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _collect(self, first):
+        # Take everything already queued, then keep waiting while requests
+        # keep arriving within `idle_gap`, up to `max_wait` in total. A lone
+        # caller waits at most one gap, instead of the full max_wait.
+        batch, rows = [first], len(first.matrix)
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch_rows:
+            remaining = min(deadline - time.perf_counter(), self.idle_gap)
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            batch.append(request)
+            rows += len(request.matrix)
+        return batch, rows
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, rows = self._collect(first)
+
+            start = time.perf_counter()
+            try:
+                matrix = batch[0].matrix if len(batch) == 1 else np.vstack([r.matrix for r in batch])
+                probs = predict_proba(self.model, matrix)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            end = time.perf_counter()
+
+            offset = 0
+            for request in batch:
+                n = len(request.matrix)
+                request.future.set_result(probs[offset:offset + n])
+                offset += n
+
+            with self._lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self.rows += rows
+                self._batch_rows.append(rows)
+                self._batch_requests.append(len(batch))
+                self._inference_ms.append((end - start) * 1000.0)
+                self._queue_wait_ms.extend((start - r.enqueued) * 1000.0 for r in batch)
+
+    def metrics(self) -> dict:
+        """Counters plus p50/p95 of the recent batch sizes, queue waits and inference times."""
+        with self._lock:
+            recent = {
+                "batch_rows": list(self._batch_rows),
+                "batch_requests": list(self._batch_requests),
+                "queue_wait_ms": list(self._queue_wait_ms),
+                "inference_ms": list(self._inference_ms),
+            }
+            summary = {
+                "requests": self.requests,
+                "batches": self.batches,
+                "rows": self.rows,
+                "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+                "queued": self._queue.qsize(),
+            }
+        for name, values in recent.items():
+            if values:
+                p50, p95 = np.percentile(values, [50, 95])
+                summary[f"{name}_p50"] = float(p50)
+                summary[f"{name}_p95"] = float(p95)
+        return summary
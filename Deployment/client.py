@@ -0,0 +1,110 @@
+"""
+Client for the HTTP inference service (Deployment/service.py).
+
+InferenceClient has the predict/predict_proba interface of the model, so the
+Streamlit app can use it in place of a local model copy. Run as a script, it
+scores a CSV file against a running service:
+
+    python Deployment/client.py features.csv --url http://127.0.0.1:8600
+"""
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from Deployment.inference import EMOTION_MAPPING
+from Deployment.service import ARROW_CONTENT_TYPE
+
+DEFAULT_URL = "http://127.0.0.1:8600"
+
+
+class InferenceClient:
+    """
+    Model-like wrapper around POST /predict. DataFrames are sent as Arrow
+    streams (fmt="arrow") or JSON (fmt="json"); arrays are sent as JSON rows.
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, fmt: str = "arrow", timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.fmt = fmt
+        self.timeout = timeout
+
+    def _request(self, path: str, body: bytes = None, content_type: str = "application/json") -> dict:
+        request = urllib.request.Request(self.url + path, data=body)
+        if body is not None:
+            request.add_header("Content-Type", content_type)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise RuntimeError(f"Inference service returned {e.code}: {message}") from None
+
+    def _encode(self, data):
+        if isinstance(data, pd.DataFrame) and self.fmt == "arrow":
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes(), ARROW_CONTENT_TYPE
+        if isinstance(data, pd.DataFrame):
+            payload = {"columns": [str(c) for c in data.columns], "rows": data.to_numpy().tolist()}
+        else:
+            payload = {"rows": np.atleast_2d(np.asarray(data)).tolist()}
+        return json.dumps(payload).encode("utf-8"), "application/json"
+
+    def predict_response(self, data) -> dict:
+        """Full /predict response for `data`: classes, labels and probabilities."""
+        body, content_type = self._encode(data)
+        return self._request("/predict", body, content_type)
+
+    def predict_proba(self, data) -> np.ndarray:
+        probs = self.predict_response(data)["probabilities"]
+        return np.asarray(probs, dtype=np.float64).reshape(-1, len(EMOTION_MAPPING))
+
+    def predict(self, data) -> np.ndarray:
+        return self.predict_proba(data).argmax(axis=1)
+
+    def health(self) -> dict:
+        return self._request("/health")
+
+    def metrics(self) -> dict:
+        return self._request("/metrics")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a feature file with the inference service.")
+    parser.add_argument("path", help="CSV file of feature rows.")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--format", default="arrow", choices=("arrow", "json"))
+    args = parser.parse_args()
+
+    client = InferenceClient(args.url, args.format)
+    print(f"Service: {client.health()}")
+    df = pd.read_csv(args.path)
+    start = time.perf_counter()
+    response = client.predict_response(df)
+    elapsed = time.perf_counter() - start
+    counts = pd.Series(response["labels"]).value_counts()
+    print(f"Scored {len(df)} rows in {elapsed * 1000:.1f} ms ({len(df) / elapsed:,.0f} rows/sec)")
+    for label, count in counts.items():
+        print(f"  {label}: {count}")
+
+
+if __name__ == "__main__":
+    main()
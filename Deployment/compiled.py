@@ -0,0 +1,239 @@
+"""
+Compiled prediction backend for the pickled XGBoost model.
+
+The notebook's model is a pipeline: StandardScaler followed by an
+XGBClassifier (and, in imblearn pipelines, samplers that are skipped at
+predict time). compile_model() folds the scaler into the trees: a split
+`scaled(x) < t` becomes `x < b`, where b is the smallest float32 input for
+which the pipeline's own scaler gives a value >= t. The search runs
+scaler.transform itself, so for float32 inputs (what feature_matrix()
+produces) the folded trees take exactly the same branches and the
+probabilities are bit-for-bit those of the pickle.
+
+The result is a bare xgboost.Booster in XGBoost's native JSON format,
+scored with inplace_predict (no DMatrix, no sklearn wrapper):
+
+    compiled = compile_model(joblib.load(MODEL_PATH))
+    compiled.save('models/xgboost_model.compiled.json')
+    probs = compiled.predict_proba(matrix)
+
+Export and validate from the command line:
+
+    python Deployment/compiled.py models/xgboost_model.pkl
+"""
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+COMPILED_SUFFIX = ".compiled.json"
+
+
+class CompiledModel:
+    """Model-like wrapper around a Booster scored with inplace_predict."""
+
+    def __init__(self, booster, n_features, n_classes, feature_names=None):
+        self.booster = booster
+        self.n_features_in_ = n_features
+        self.n_classes = n_classes
+        if feature_names is not None:
+            # Lets feature_matrix() put DataFrame columns in the fitted order
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    @classmethod
+    def load(cls, path):
+        import xgboost as xgb
+
+        booster = xgb.Booster(model_file=str(path))
+        names = booster.attr("feature_names_in")
+        return cls(booster, booster.num_features(), int(booster.attr("n_classes")),
+                   json.loads(names) if names else None)
+
+    def save(self, path):
+        self.booster.save_model(str(path))
+
+    def predict_proba(self, data) -> np.ndarray:
+        matrix = np.ascontiguousarray(data, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        probs = self.booster.inplace_predict(matrix, validate_features=False)
+        if probs.ndim == 1:  # binary:logistic gives P(class 1)
+            probs = np.column_stack([1.0 - probs, probs])
+        return probs
+
+    def predict(self, data) -> np.ndarray:
+        return self.predict_proba(data).argmax(axis=1)
+
+
+def split_pipeline(model):
+    """
+    (scaler, classifier) of a fitted model: a bare XGBClassifier, or a
+    sklearn/imblearn Pipeline of an optional StandardScaler, samplers and
+    a final XGBClassifier. Anything else can't be compiled.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    steps = [step for _, step in model.steps] if hasattr(model, "steps") else [model]
+    *transforms, classifier = steps
+    if not hasattr(classifier, "get_booster"):
+        raise ValueError(f"Only XGBoost models can be compiled, not {type(classifier).__name__}.")
+
+    scaler = None
+    for step in transforms:
+        if step is None or step == "passthrough" or hasattr(step, "fit_resample"):
+            continue  # samplers only act during fit
+        if isinstance(step, StandardScaler) and scaler is None:
+            scaler = step
+        else:
+            raise ValueError(f"Can't fold a {type(step).__name__} step into the trees.")
+    return scaler, classifier
+
+
+def _float_keys(x):
+    # float32 -> int64 keys in the same order as the floats (-0.0 and 0.0 share 0)
+    bits = np.asarray(x, dtype=np.float32).view(np.int32).astype(np.int64)
+    return np.where(bits < 0, -(bits & 0x7FFFFFFF), bits)
+
+
+def _key_floats(keys):
+    bits = np.where(keys < 0, (-keys) | 0x80000000, keys)
+    return bits.astype(np.uint32).view(np.float32)
+
+
+def _fold_thresholds(scaler, features, thresholds, n_features):
+    """Smallest float32 x per split with scaler(x)[feature] >= threshold."""
+    rows = np.arange(len(features))
+    t = thresholds.astype(np.float32)
+
+    def reaches(keys):
+        candidates = np.zeros((len(keys), n_features), dtype=np.float32)
+        candidates[rows, features] = _key_floats(keys)
+        with np.errstate(over="ignore", invalid="ignore"):
+            return scaler.transform(candidates)[rows, features].astype(np.float32) >= t
+
+    # Bisect over the ordered float32 values between -inf and +inf; the
+    # scaled value is monotonic in x, so this finds the exact boundary
+    lo = np.full(len(t), _float_keys(-np.inf))
+    hi = np.full(len(t), _float_keys(np.inf))
+    while np.any(hi - lo > 1):
+        mid = (lo + hi) // 2
+        up = reaches(mid)
+        hi = np.where(up, mid, hi)
+        lo = np.where(up, lo, mid)
+    return _key_floats(hi)
+
+
+def compile_model(model) -> CompiledModel:
+    """Fold the pipeline's scaler into its XGBoost trees and return a CompiledModel."""
+    import xgboost as xgb
+
+    scaler, classifier = split_pipeline(model)
+    booster = classifier.get_booster()
+    config = json.loads(booster.save_raw("json"))
+    learner = config["learner"]
+    n_features = int(learner["learner_model_param"]["num_feature"])
+    n_classes = int(getattr(classifier, "n_classes_", 0) or learner["learner_model_param"].get("num_class", 2))
+    trees = learner["gradient_booster"]["model"]["trees"]
+
+    if scaler is not None:
+        splits = []  # (tree, node) of every split node
+        for tree_id, tree in enumerate(trees):
+            if any(int(s) != 0 for s in tree["split_type"]):
+                raise ValueError("Categorical splits can't be folded.")
+            splits.extend((tree_id, node) for node, left in enumerate(tree["left_children"]) if left != -1)
+        if splits:
+            features = np.array([trees[t]["split_indices"][n] for t, n in splits])
+            thresholds = np.array([trees[t]["split_conditions"][n] for t, n in splits])
+            folded = _fold_thresholds(scaler, features, thresholds, n_features)
+            for (tree_id, node), value in zip(splits, folded.tolist()):
+                trees[tree_id]["split_conditions"][node] = value
+
+    # Arrays are fed in the pipeline's column order; names would only add checks
+    learner["feature_names"] = []
+    learner["feature_types"] = []
+    compiled = xgb.Booster(model_file=bytearray(json.dumps(config).encode("utf-8")))
+    compiled.set_attr(n_classes=str(n_classes))
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        names = [str(n) for n in names]
+        compiled.set_attr(feature_names_in=json.dumps(names))
+    return CompiledModel(compiled, n_features, n_classes, names)
+
+
+def file_sha256(path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def compiled_path(model_path) -> Path:
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.stem + COMPILED_SUFFIX)
+
+
+def load_compiled(model_path, model=None) -> CompiledModel:
+    """
+    CompiledModel for the pickle at `model_path`, reusing the exported JSON
+    next to it if it was compiled from the same pickle (by SHA-256);
+    otherwise compiles `model` (or the unpickled file) and exports it.
+    """
+    source_hash = file_sha256(model_path)
+    path = compiled_path(model_path)
+    if path.exists():
+        compiled = CompiledModel.load(path)
+        if compiled.booster.attr("source_sha256") == source_hash:
+            return compiled
+
+    if model is None:
+        import joblib
+
+        model = joblib.load(model_path)
+    compiled = compile_model(model)
+    compiled.booster.set_attr(source_sha256=source_hash)
+    try:
+        compiled.save(path)
+    except OSError:
+        pass  # read-only model directory: keep the in-memory copy
+    return compiled
+
+
+def validate_compiled(model, compiled, matrix) -> dict:
+    """Compare the compiled model with the pickle on a float32 matrix."""
+    expected = np.asarray(model.predict_proba(matrix))
+    actual = compiled.predict_proba(matrix)
+    return {
+        "rows": int(len(matrix)),
+        "identical": bool(np.array_equal(expected, actual)),
+        "max_abs_diff": float(np.abs(expected - actual).max()) if len(matrix) else 0.0,
+        "same_classes": bool(np.array_equal(expected.argmax(axis=1), actual.argmax(axis=1))),
+    }
+
+
+def main():
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export the pickled model to a compiled XGBoost JSON booster.")
+    parser.add_argument("model", help="Pickled model (XGBClassifier or StandardScaler + XGBClassifier pipeline).")
+    parser.add_argument("--rows", type=int, default=10000, help="Random rows used for validation.")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    compiled = load_compiled(args.model, model)
+    print(f"Compiled model written to '{compiled_path(args.model)}'.")
+
+    rng = np.random.default_rng(0)
+    matrix = (rng.standard_normal((args.rows, compiled.n_features_in_)) * 3).astype(np.float32)
+    report = validate_compiled(model, compiled, matrix)
+    print(f"Validation on {report['rows']} rows: identical={report['identical']}, "
+          f"max abs diff={report['max_abs_diff']:.3g}")
+    if not report["identical"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Persistent prediction history for the Streamlit app.
+
+Every prediction (a single record, or a whole file scored at once) is
+appended to the `predictions` table, indexed on (user, ts). In the same
+transaction, per-user running aggregates are updated: the total, the last
+prediction, counts per emotion and per file. The dashboard reads those
+instead of re-scanning the history, so its cost doesn't grow with it.
+Each prediction also gets a per-user sequence number, so the timeline can
+be sampled with a bounded number of index lookups:
+
+    store = HistoryStore("Deployment/app.db")
+    store.append("alice", "session1.csv", "3#0", "Happy 😊")
+    store.stats("alice")       # {"total": 1, "files": 1, "last_label": ..., "label_counts": {...}}
+    store.recent("alice", 10)  # newest last, for the table
+    store.timeline("alice", max_points=1000)
+"""
+import time
+
+import numpy as np
+
+from Deployment.storage import SQLiteStore
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class HistoryStore(SQLiteStore):
+    """Append-only prediction log with incrementally maintained per-user aggregates."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS predictions (
+            id         INTEGER PRIMARY KEY,
+            user       TEXT NOT NULL,
+            seq        INTEGER,
+            ts         REAL NOT NULL,
+            file_name  TEXT,
+            record_id  TEXT,
+            pred_label TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS predictions_user_ts ON predictions (user, ts);
+
+        CREATE TABLE IF NOT EXISTS prediction_totals (
+            user       TEXT PRIMARY KEY,
+            total      INTEGER NOT NULL,
+            files      INTEGER NOT NULL,
+            last_label TEXT,
+            last_ts    REAL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS prediction_label_counts (
+            user       TEXT NOT NULL,
+            pred_label TEXT NOT NULL,
+            count      INTEGER NOT NULL,
+            PRIMARY KEY (user, pred_label)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS prediction_file_counts (
+            user      TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            count     INTEGER NOT NULL,
+            PRIMARY KEY (user, file_name)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._add_sequence_numbers()
+
+    def _add_sequence_numbers(self):
+        # Databases created before `seq` existed get it backfilled in time order
+        with self.transaction() as conn:
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(predictions)")}
+            if "seq" not in columns:
+                conn.execute("ALTER TABLE predictions ADD COLUMN seq INTEGER")
+                conn.execute("""
+                    UPDATE predictions SET seq = (
+                        SELECT rn FROM (
+                            SELECT id, ROW_NUMBER() OVER (PARTITION BY user ORDER BY ts, id) AS rn FROM predictions
+                        ) AS numbered WHERE numbered.id = predictions.id
+                    )
+                """)
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS predictions_user_seq ON predictions (user, seq)")
+
+    def append(self, user: str, file_name: str, record_id: str, pred_label: str, ts: float = None) -> int:
+        """Log one prediction and update the aggregates; returns its id."""
+        ts = time.time() if ts is None else ts
+        with self.transaction() as conn:
+            total = conn.execute("SELECT total FROM prediction_totals WHERE user = ?", (user,)).fetchone()
+            row_id = conn.execute(
+                "INSERT INTO predictions (user, seq, ts, file_name, record_id, pred_label) VALUES (?, ?, ?, ?, ?, ?)",
+                (user, (total[0] if total else 0) + 1, ts, file_name, record_id, pred_label),
+            ).lastrowid
+            new_file = 0
+            if file_name is not None:
+                new_file = conn.execute(
+                    "INSERT OR IGNORE INTO prediction_file_counts (user, file_name, count) VALUES (?, ?, 0)",
+                    (user, file_name),
+                ).rowcount
+                conn.execute(
+                    "UPDATE prediction_file_counts SET count = count + 1 WHERE user = ? AND file_name = ?",
+                    (user, file_name),
+                )
+            conn.execute(
+                """
+                INSERT INTO prediction_label_counts (user, pred_label, count) VALUES (?, ?, 1)
+                ON CONFLICT (user, pred_label) DO UPDATE SET count = count + 1
+                """,
+                (user, pred_label),
+            )
+            conn.execute(
+                """
+                INSERT INTO prediction_totals (user, total, files, last_label, last_ts) VALUES (?, 1, ?, ?, ?)
+                ON CONFLICT (user) DO UPDATE SET
+                    total = total + 1,
+                    files = files + excluded.files,
+                    last_label = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_label ELSE last_label END,
+                    last_ts = MAX(last_ts, excluded.last_ts)
+                """,
+                (user, new_file, pred_label, ts),
+            )
+        return row_id
+
+    def stats(self, user: str) -> dict:
+        """
+        Dashboard metrics of `user` from the aggregate tables: total, distinct
+        files, last label and counts per label. `total` also serves as a
+        version number of the user's history, since it is append-only.
+        """
+        row = self.conn.execute(
+            "SELECT total, files, last_label, last_ts FROM prediction_totals WHERE user = ?", (user,)
+        ).fetchone()
+        label_counts = dict(self.conn.execute(
+            "SELECT pred_label, count FROM prediction_label_counts WHERE user = ? ORDER BY count DESC, pred_label",
+            (user,),
+        ).fetchall())
+        if row is None:
+            return {"total": 0, "files": 0, "last_label": None, "last_ts": None, "label_counts": {}}
+        return {**dict(row), "label_counts": label_counts}
+
+    def recent(self, user: str, limit: int = 10) -> list:
+        """The user's last `limit` predictions, oldest first (read backwards along the index)."""
+        rows = self.conn.execute(
+            """
+            SELECT user, file_name, record_id, pred_label, ts FROM predictions
+            WHERE user = ? ORDER BY ts DESC, id DESC LIMIT ?
+            """,
+            (user, limit),
+        ).fetchall()
+        return [_entry(row) for row in reversed(rows)]
+
+    def timeline(self, user: str, max_points: int = None) -> list:
+        """
+        (seq, ts, pred_label) of the user's predictions in order. With more
+        than `max_points` predictions, only that many evenly spaced ones
+        (always the first and the last) are read, by sequence number.
+        """
+        total = self.stats(user)["total"] if max_points is not None else None
+        if total is None or total <= max_points:
+            return [tuple(row) for row in self.conn.execute(
+                "SELECT seq, ts, pred_label FROM predictions WHERE user = ? ORDER BY seq", (user,)
+            )]
+        seqs = np.unique(np.linspace(1, total, max_points).round().astype(int)).tolist()
+        return [tuple(row) for row in self.conn.execute(
+            f"SELECT seq, ts, pred_label FROM predictions WHERE user = ? AND seq IN ({','.join('?' * len(seqs))}) "
+            "ORDER BY seq",
+            (user, *seqs),
+        )]
+
+
+def _entry(row) -> dict:
+    return {
+        "user": row["user"],
+        "file_name": row["file_name"],
+        "record_id": row["record_id"],
+        "pred_label": row["pred_label"],
+        "timestamp": time.strftime(TIMESTAMP_FORMAT, time.localtime(row["ts"])),
+    }
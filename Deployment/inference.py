@@ -0,0 +1,122 @@
+"""
+Model loading and input handling shared by the Streamlit app, the HTTP
+inference service (Deployment/service.py) and its client.
+"""
+import os
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+MODEL_PATH = BASE_DIR / "models" / "xgboost_model.pkl"
+
+# "pickle" scores with the unpickled model; "compiled" with the XGBoost
+# booster exported by Deployment/compiled.py (scaler folded into the trees)
+MODEL_BACKEND = os.environ.get("EEG_MODEL_BACKEND", "pickle")
+
+EMOTION_MAPPING = {
+    0: "Fear 😨",
+    1: "Happy 😊",
+    2: "Sad 😢",
+}
+
+# Feature width of the exported model: one column per EEG channel
+N_FEATURES = 32
+
+# Rows sent to the model per predict_proba call by predict_batch
+BATCH_CHUNK_SIZE = 5000
+
+# Columns that identify or label a record rather than describe it
+NON_FEATURE_COLUMNS = ("subject_id", "trial", "emotion")
+
+
+class MockModel:
+    def predict(self, data):
+        return np.random.randint(0, 3, size=len(data))
+
+    def predict_proba(self, data):
+        proba = np.random.rand(len(data), 3)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+
+def load_model(path=MODEL_PATH, backend=MODEL_BACKEND):
+    """Return (model, using_mock); falls back to MockModel if `path` can't be loaded."""
+    if backend == "compiled":
+        try:
+            from Deployment.compiled import load_compiled
+
+            return load_compiled(path), False
+        except Exception as e:
+            warnings.warn(f"Compiled backend unavailable ({e}); using the pickled model.")
+    try:
+        import joblib
+
+        return joblib.load(path), False
+    except Exception:
+        return MockModel(), True
+
+
+def model_feature_names(model):
+    """Feature names the model was fitted with, or None if it was fitted on an array."""
+    names = getattr(model, "feature_names_in_", None)
+    if names is None and hasattr(model, "get_booster"):
+        try:
+            names = model.get_booster().feature_names
+        except Exception:
+            names = None
+    return list(names) if names is not None else None
+
+
+def feature_matrix(model, data) -> np.ndarray:
+    """
+    float32 (rows, features) input for `model`. A DataFrame loses its ID and
+    label columns or, if the model knows its feature names, is put in that order.
+    """
+    if isinstance(data, pd.DataFrame):
+        names = model_feature_names(model)
+        if names is not None:
+            data = data[names]
+        else:
+            data = data.drop(columns=[c for c in NON_FEATURE_COLUMNS if c in data.columns])
+    matrix = np.asarray(data, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is not None and matrix.shape[1] != n_features:
+        raise ValueError(f"Expected {n_features} features per row, got {matrix.shape[1]}.")
+    return matrix
+
+
+def predict_proba(model, matrix: np.ndarray) -> np.ndarray:
+    """Class probabilities; one-hot predictions for models without predict_proba."""
+    if hasattr(model, "predict_proba"):
+        return np.asarray(model.predict_proba(matrix))
+    preds = np.asarray(model.predict(matrix)).astype(int)
+    return np.eye(len(EMOTION_MAPPING))[preds]
+
+
+def predict_batch(model, data: pd.DataFrame, chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    Predict every row of `data`, `chunk_size` rows per model call.
+    Returns (pred_classes, probs); probs is None if the model has no predict_proba.
+    """
+    chunk_size = max(1, int(chunk_size))
+    chunks = [data.iloc[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    if hasattr(model, "predict_proba"):
+        probs = np.vstack([model.predict_proba(chunk) for chunk in chunks])
+        return probs.argmax(axis=1), probs
+    preds = np.concatenate([np.asarray(model.predict(chunk)) for chunk in chunks])
+    return preds.astype(int), None
+
+
+def batch_results_frame(df: pd.DataFrame, pred_classes, probs) -> pd.DataFrame:
+    """Prediction table for download: subject_id (if any), class, label and probabilities."""
+    results = df[["subject_id"]].copy() if "subject_id" in df.columns else pd.DataFrame(index=df.index)
+    results["pred_class"] = pred_classes
+    results["pred_label"] = pd.Series(pred_classes, index=df.index).map(EMOTION_MAPPING).fillna("Unknown 🤔")
+    if probs is not None:
+        for cls, label in EMOTION_MAPPING.items():
+            results[f"prob_{label.split()[0].lower()}"] = probs[:, cls]
+    return results
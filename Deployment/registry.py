@@ -0,0 +1,381 @@
+"""
+Versioned model registry under models/.
+
+Each trained variant gets a directory of numbered versions; a version is a
+pickled model plus metadata.json (feature schema, window length, accuracy):
+
+    models/
+        xgboost/v1/model.pkl
+        xgboost/v1/metadata.json
+        xgboost/v2/...
+        lightgbm/v1/...
+        random_forest/v1/...
+
+A version directory is written under a temporary name and renamed into
+place, so readers never see a half-written version. The legacy
+models/xgboost_model.pkl still works: it is used as "xgboost" when no
+version of it is registered, and `path=` pins the registry to one pickle.
+
+ModelRegistry is a model-like handle on the newest version of one variant.
+It loads the model on first use and, at most every EEG_MODEL_RELOAD_S
+seconds, looks for a newer version; a new version is loaded on a background
+thread and swapped in once ready, so requests keep being served by the old
+one in the meantime:
+
+    registry = ModelRegistry("xgboost")
+    probs = registry.predict_proba(frame)
+    registry.metadata["train_accuracy"]
+
+Register a model and list the registry from the command line:
+
+    python Deployment/registry.py register xgboost xgboost_model.pkl --train-accuracy 0.99 --test-accuracy 0.963
+    python Deployment/registry.py list
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from Deployment.inference import (
+    BASE_DIR, EMOTION_MAPPING, MODEL_BACKEND, MODEL_PATH, N_FEATURES, MockModel, load_model, model_feature_names,
+)
+
+REGISTRY_DIR = BASE_DIR / "models"
+MODEL_FILE = "model.pkl"
+METADATA_FILE = "metadata.json"
+
+# Variants trained in notebooks/eeg_final.ipynb, by registry name
+VARIANT_LABELS = {
+    "xgboost": "XGBoost",
+    "lightgbm": "LightGBM",
+    "random_forest": "RandomForest",
+}
+DEFAULT_VARIANT = os.environ.get("EEG_MODEL_NAME", "xgboost")
+
+# Minimum seconds between checks for a newer version
+RELOAD_INTERVAL_S = float(os.environ.get("EEG_MODEL_RELOAD_S", 5))
+
+# Rows of the dummy batch scored by warm_up()
+WARMUP_ROWS = 64
+
+_VERSION_DIR = re.compile(r"^v(\d+)$")
+_NAME = re.compile(r"^[a-z0-9_]+$")
+
+
+def list_versions(name, registry_dir=REGISTRY_DIR) -> list:
+    """Complete versions of `name`, oldest first."""
+    variant_dir = Path(registry_dir) / name
+    if not variant_dir.is_dir():
+        return []
+    versions = []
+    for entry in variant_dir.iterdir():
+        match = _VERSION_DIR.match(entry.name)
+        if match and (entry / METADATA_FILE).exists():
+            versions.append(int(match.group(1)))
+    return sorted(versions)
+
+
+def list_variants(registry_dir=REGISTRY_DIR) -> dict:
+    """{name: [versions]} of every variant with at least one version."""
+    registry_dir = Path(registry_dir)
+    if not registry_dir.is_dir():
+        return {}
+    variants = {}
+    for entry in sorted(registry_dir.iterdir()):
+        if entry.is_dir() and _NAME.match(entry.name):
+            versions = list_versions(entry.name, registry_dir)
+            if versions:
+                variants[entry.name] = versions
+    return variants
+
+
+def read_metadata(name, version, registry_dir=REGISTRY_DIR) -> dict:
+    with open(Path(registry_dir) / name / f"v{version}" / METADATA_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def describe_model(model) -> dict:
+    """Feature schema and classes of a fitted model (or the last step of a pipeline)."""
+    estimator = model.steps[-1][1] if hasattr(model, "steps") else model
+    names = model_feature_names(model)
+    n_features = getattr(model, "n_features_in_", None)
+    classes = getattr(estimator, "classes_", None)
+    return {
+        "algorithm": type(estimator).__name__,
+        "n_features": int(n_features) if n_features is not None else (len(names) if names else None),
+        "features": [str(n) for n in names] if names is not None else None,
+        "classes": [int(c) for c in classes] if classes is not None else sorted(EMOTION_MAPPING),
+    }
+
+
+def register_model(model, name, registry_dir=REGISTRY_DIR, window_seconds=None, train_accuracy=None,
+                   test_accuracy=None, source=None) -> int:
+    """
+    Save `model` as the next version of `name` and return the version number.
+    `window_seconds` is the feature window the model was trained on (None for
+    per-sample features).
+    """
+    if not _NAME.match(name):
+        raise ValueError(f"Model names are lowercase letters, digits and '_', not {name!r}.")
+    variant_dir = Path(registry_dir) / name
+    variant_dir.mkdir(parents=True, exist_ok=True)
+
+    staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=variant_dir))
+    try:
+        joblib.dump(model, staging / MODEL_FILE)
+        metadata = {
+            "name": name,
+            **describe_model(model),
+            "window_seconds": window_seconds,
+            "train_accuracy": train_accuracy,
+            "test_accuracy": test_accuracy,
+            "sha256": hashlib.sha256((staging / MODEL_FILE).read_bytes()).hexdigest(),
+            "source": str(source) if source is not None else None,
+            "created_at": time.time(),
+        }
+        while True:
+            # Numbers of incomplete version directories (a crashed copy, a manual
+            # mkdir) are taken too, or the rename below would fail on them forever
+            taken = [int(m.group(1)) for m in map(_VERSION_DIR.match, os.listdir(variant_dir)) if m]
+            version = max(taken, default=0) + 1
+            metadata["version"] = version
+            with open(staging / METADATA_FILE, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, indent=4)
+            try:
+                # Atomic, and fails if another process took this number first
+                os.rename(staging, variant_dir / f"v{version}")
+                return version
+            except OSError:
+                if not (variant_dir / f"v{version}").exists():
+                    raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+class ModelVersion:
+    """One artifact the registry can serve: a registered version, the legacy pickle or the mock."""
+
+    def __init__(self, name, version, path, metadata):
+        self.name = name
+        self.version = version
+        self.path = path
+        self.metadata = metadata
+        # Changes whenever the artifact does, including a rewritten legacy pickle
+        self.key = (name, version, path.stat().st_mtime_ns if path is not None and version == 0 else None)
+        self.model = None
+        self.using_mock = path is None
+
+    @property
+    def label(self) -> str:
+        if self.using_mock:
+            return "mock model"
+        return f"{self.name} v{self.version}" if self.version else f"{self.name} ({self.path.name})"
+
+
+class ModelRegistry:
+    """Model-like handle on the newest version of one variant, loaded lazily and hot-reloaded."""
+
+    def __init__(self, name=DEFAULT_VARIANT, registry_dir=REGISTRY_DIR, backend=MODEL_BACKEND,
+                 reload_interval_s=RELOAD_INTERVAL_S, path=None):
+        self.name = name
+        self.registry_dir = Path(registry_dir)
+        self.backend = backend
+        self.reload_interval_s = reload_interval_s
+        self.path = Path(path) if path is not None else None
+        self.reloads = 0
+        self._current = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self._failed_key = None
+        self._checked = 0.0
+
+    def latest(self) -> ModelVersion:
+        """Newest artifact for this variant, without loading it."""
+        if self.path is None:
+            versions = list_versions(self.name, self.registry_dir)
+            if versions:
+                version = versions[-1]
+                path = self.registry_dir / self.name / f"v{version}" / MODEL_FILE
+                return ModelVersion(self.name, version, path, read_metadata(self.name, version, self.registry_dir))
+        path = self.path if self.path is not None else MODEL_PATH if self.name == "xgboost" else None
+        if path is not None and path.exists():
+            return ModelVersion(self.name, 0, path, {"name": self.name, "version": 0})
+        return ModelVersion(self.name, None, None, {"name": self.name, "version": None})
+
+    def _load(self, entry) -> ModelVersion:
+        if entry.path is None:
+            where = self.path if self.path is not None else self.registry_dir
+            warnings.warn(f"No '{self.name}' model in {where}; predictions come from MockModel.")
+            entry.model = MockModel()
+            return entry
+        entry.model, entry.using_mock = load_model(entry.path, self.backend)
+        if entry.using_mock:
+            raise RuntimeError(f"Could not load {entry.path}.")
+        if entry.version == 0:
+            raw = joblib.load(entry.path) if self.backend == "compiled" else entry.model
+            entry.metadata = {**entry.metadata, **describe_model(raw)}
+        return entry
+
+    def current(self) -> ModelVersion:
+        """The loaded version, loading it on first use."""
+        entry = self._current
+        if entry is None:
+            with self._lock:
+                if self._current is None:
+                    latest = self.latest()
+                    try:
+                        self._current = self._load(latest)
+                    except Exception as e:
+                        warnings.warn(f"{e} Predictions come from MockModel.")
+                        self._failed_key = latest.key
+                        self._current = self._load(ModelVersion(self.name, None, None, latest.metadata))
+                    self._checked = time.monotonic()
+                return self._current
+        if time.monotonic() - self._checked >= self.reload_interval_s:
+            self._check_for_update()
+        return entry
+
+    def _check_for_update(self):
+        with self._lock:
+            if self._loading:
+                return
+            self._checked = time.monotonic()
+            latest = self.latest()
+            if latest.key in (self._current.key, self._failed_key) or latest.path is None:
+                return
+            self._loading = True
+        threading.Thread(target=self._swap, args=(latest,), name="model-reload", daemon=True).start()
+
+    def _swap(self, latest):
+        try:
+            loaded = self._load(latest)
+        except Exception as e:
+            warnings.warn(f"Keeping {self._current.label}: loading {latest.label} failed ({e}).")
+            with self._lock:
+                self._failed_key = latest.key
+                self._loading = False
+            return
+        with self._lock:
+            # Requests holding the old version finish with it
+            self._current = loaded
+            self.reloads += 1
+            self._loading = False
+
+    def reload(self):
+        """Load the newest version now (blocking) and swap it in."""
+        with self._lock:
+            self._checked = time.monotonic()
+        latest = self.latest()
+        loaded = self._load(latest)
+        with self._lock:
+            self._current = loaded
+            self.reloads += 1
+        return loaded
+
+    def warm_up(self, rows=WARMUP_ROWS) -> dict:
+        """
+        Load the model now and score a dummy batch of its feature width, so the
+        first real request pays for neither unpickling nor the model's
+        first-call setup. Returns {"model_load", "first_predict"} in ms.
+        """
+        start = time.perf_counter()
+        entry = self.current()
+        loaded = time.perf_counter()
+        width = getattr(entry.model, "n_features_in_", None) or entry.metadata.get("n_features") or N_FEATURES
+        entry.model.predict_proba(np.zeros((rows, width), dtype=np.float32))
+        done = time.perf_counter()
+        return {"model_load": (loaded - start) * 1000.0, "first_predict": (done - loaded) * 1000.0}
+
+    @property
+    def model(self):
+        return self.current().model
+
+    @property
+    def metadata(self) -> dict:
+        return self.current().metadata
+
+    @property
+    def using_mock(self) -> bool:
+        entry = self._current
+        return entry.using_mock if entry is not None else self.latest().path is None
+
+    @property
+    def n_features_in_(self):
+        return getattr(self.model, "n_features_in_", None)
+
+    @property
+    def feature_names_in_(self):
+        return model_feature_names(self.model)
+
+    def predict_proba(self, data):
+        return self.model.predict_proba(data)
+
+    def predict(self, data):
+        return self.model.predict(data)
+
+    def describe(self) -> dict:
+        entry = self._current
+        if entry is None:
+            entry = self.latest()
+        return {
+            "name": self.name,
+            "version": entry.version,
+            "path": str(entry.path) if entry.path is not None else None,
+            "loaded": entry is self._current,
+            "mock": entry.using_mock,
+            "reloads": self.reloads,
+            "metadata": entry.metadata,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry.")
+    parser.add_argument("--registry", default=str(REGISTRY_DIR))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    register = commands.add_parser("register", help="Add a pickled model as the next version of a variant.")
+    register.add_argument("name", help=f"Variant name, e.g. {', '.join(VARIANT_LABELS)}.")
+    register.add_argument("model", help="Pickled model or pipeline.")
+    register.add_argument("--window-seconds", type=float, default=None)
+    register.add_argument("--train-accuracy", type=float, default=None)
+    register.add_argument("--test-accuracy", type=float, default=None)
+
+    commands.add_parser("list", help="Show every variant and version.")
+    args = parser.parse_args()
+
+    if args.command == "register":
+        model = joblib.load(args.model)
+        version = register_model(model, args.name, args.registry, args.window_seconds,
+                                 args.train_accuracy, args.test_accuracy, source=args.model)
+        print(f"Registered '{args.model}' as {args.name} v{version}.")
+        return
+
+    variants = list_variants(args.registry)
+    if not variants:
+        print(f"No models registered in '{args.registry}'.")
+    for name, versions in variants.items():
+        print(f"{VARIANT_LABELS.get(name, name)} ({name}):")
+        for version in versions:
+            meta = read_metadata(name, version, args.registry)
+            print(f"  v{version}: {meta.get('algorithm')}, {meta.get('n_features')} features, "
+                  f"window={meta.get('window_seconds')}, train acc={meta.get('train_accuracy')}, "
+                  f"test acc={meta.get('test_accuracy')}")
+
+
+if __name__ == "__main__":
+    main()
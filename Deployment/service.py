@@ -0,0 +1,269 @@
+"""
+Standalone HTTP inference service for the emotion model.
+
+A plain ASGI application (no web framework) that loads the model once and
+serves predictions to any client, including the Streamlit app when
+EEG_INFERENCE_URL points at it. Run it with uvicorn:
+
+    uvicorn Deployment.service:app --port 8600
+    python Deployment/service.py --port 8600 --variant lightgbm
+
+The model comes from the registry (Deployment/registry.py): the newest
+version of EEG_MODEL_NAME, loaded and warmed at startup (or on the first
+request, without a lifespan) and hot-reloaded when a new version is
+registered. --model / EEG_MODEL_PATH pin
+a single pickle instead.
+
+Endpoints:
+    GET  /health    model name, version and metadata, whether the mock model is in use
+    GET  /metrics   request and batching counters
+    POST /predict   feature rows, as JSON
+                        {"columns": [...], "rows": [[...], ...]}  or  {"records": [{...}, ...]}
+                    or as an Arrow IPC stream
+                    (Content-Type: application/vnd.apache.arrow.stream)
+                    -> {"classes": [...], "labels": [...], "probabilities": [[...], ...],
+                        "class_labels": [...]}
+
+Rows of concurrent requests are micro-batched (Deployment/batching.py): the
+batcher waits up to EEG_MAX_WAIT_MS for more requests (or EEG_MAX_BATCH_ROWS
+rows) and scores them in one predict_proba call on its worker thread. Body
+parsing and feature selection run on the default executor, so the event loop
+only moves bytes. At most EEG_MAX_CONCURRENCY requests are served at once,
+from reading their body to the response; others wait up to
+EEG_QUEUE_TIMEOUT_S, with their body still unread, and then get a 503.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from Deployment.batching import MicroBatcher
+from Deployment.inference import EMOTION_MAPPING, feature_matrix
+from Deployment.registry import DEFAULT_VARIANT, ModelRegistry
+
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+MAX_BATCH_ROWS = int(os.environ.get("EEG_MAX_BATCH_ROWS", 4096))
+MAX_WAIT_MS = float(os.environ.get("EEG_MAX_WAIT_MS", 5))
+MAX_CONCURRENCY = int(os.environ.get("EEG_MAX_CONCURRENCY", 32))
+QUEUE_TIMEOUT_S = float(os.environ.get("EEG_QUEUE_TIMEOUT_S", 10))
+MAX_BODY_BYTES = int(os.environ.get("EEG_MAX_BODY_BYTES", 64 * 1024 * 1024))
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def parse_json_rows(body: bytes) -> pd.DataFrame:
+    try:
+        payload = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise HTTPError(400, f"Invalid JSON: {e}")
+    if isinstance(payload, dict) and "records" in payload:
+        return pd.DataFrame.from_records(payload["records"])
+    if isinstance(payload, dict) and "rows" in payload:
+        return pd.DataFrame(payload["rows"], columns=payload.get("columns"))
+    raise HTTPError(400, "Expected a JSON object with 'rows' (and optional 'columns') or 'records'.")
+
+
+def parse_arrow_rows(body: bytes) -> pd.DataFrame:
+    import pyarrow as pa
+
+    try:
+        return pa.ipc.open_stream(pa.BufferReader(body)).read_all().to_pandas()
+    except pa.ArrowInvalid as e:
+        raise HTTPError(400, f"Invalid Arrow stream: {e}")
+
+
+class InferenceService:
+    """The ASGI application."""
+
+    def __init__(self, model_path=None, max_batch_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS,
+                 max_concurrency=MAX_CONCURRENCY, queue_timeout_s=QUEUE_TIMEOUT_S, variant=DEFAULT_VARIANT):
+        self.model_path = Path(model_path) if model_path else None
+        self.variant = variant
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_ms = max_wait_ms
+        self.max_concurrency = max_concurrency
+        self.queue_timeout_s = queue_timeout_s
+        self.model = None
+        self.batcher = None
+        self.limiter = None
+        self.requests = 0
+        self.rejected = 0
+        self.in_flight = 0
+
+    def startup(self):
+        """Create the registry handle and the batcher (idempotent); the model loads on first use."""
+        if self.model is None:
+            self.model = ModelRegistry(self.variant, path=self.model_path)
+        if self.batcher is None:
+            self.batcher = MicroBatcher(self.model, self.max_batch_rows, self.max_wait_ms)
+            self.limiter = asyncio.Semaphore(self.max_concurrency)
+
+    async def warm_up(self):
+        """Load the model and score a dummy batch off the event loop, before the first request."""
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.model.warm_up)
+        except Exception as e:
+            warnings.warn(f"Model warm-up failed ({e}); the first request will load it.")
+
+    async def shutdown(self):
+        if self.batcher is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.batcher.close)
+            self.batcher = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        self.startup()
+        try:
+            status, payload = await self._route(scope, receive)
+        except HTTPError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        await self._send_json(send, status, payload)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.startup()
+                await self.warm_up()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _route(self, scope, receive):
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "mock": self.model.using_mock, "model": self.model.describe()}
+        if path == "/metrics" and method == "GET":
+            return 200, self.metrics()
+        if path == "/predict":
+            if method != "POST":
+                raise HTTPError(405, "Use POST.")
+            return 200, await self._predict(scope, receive)
+        raise HTTPError(404, f"No route for {method} {path}.")
+
+    async def _predict(self, scope, receive):
+        # The slot is taken before the body is read, so the limit also bounds
+        # the memory and CPU spent decoding concurrent large requests
+        try:
+            await asyncio.wait_for(self.limiter.acquire(), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPError(503, "Too many concurrent requests, try again later.")
+        self.requests += 1
+        self.in_flight += 1
+        try:
+            headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+            body = await self._read_body(receive)
+            content_type = headers.get("content-type", "").split(";")[0].strip()
+            matrix = await asyncio.get_running_loop().run_in_executor(None, self._model_input, content_type, body)
+
+            start = time.perf_counter()
+            if len(matrix):
+                probs = await asyncio.wrap_future(self.batcher.submit(matrix))
+            else:
+                probs = np.empty((0, len(EMOTION_MAPPING)))
+        finally:
+            self.in_flight -= 1
+            self.limiter.release()
+
+        classes = probs.argmax(axis=1) if len(probs) else np.empty(0, dtype=int)
+        return {
+            "classes": classes.tolist(),
+            "labels": [EMOTION_MAPPING.get(int(c), "Unknown 🤔") for c in classes],
+            "probabilities": probs.tolist(),
+            "class_labels": [EMOTION_MAPPING[c] for c in sorted(EMOTION_MAPPING)],
+            "latency_ms": (time.perf_counter() - start) * 1000.0,
+        }
+
+    def _model_input(self, content_type: str, body: bytes) -> np.ndarray:
+        """Parse a request body into the model's feature matrix (runs on the executor)."""
+        if content_type == ARROW_CONTENT_TYPE:
+            frame = parse_arrow_rows(body)
+        else:
+            frame = parse_json_rows(body)
+        try:
+            return feature_matrix(self.model, frame)
+        except (KeyError, ValueError) as e:
+            raise HTTPError(422, str(e))
+
+    async def _read_body(self, receive) -> bytes:
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, f"Request body larger than {MAX_BODY_BYTES} bytes.")
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    def metrics(self) -> dict:
+        return {
+            "http_requests": self.requests,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "batching": self.batcher.metrics() if self.batcher else {},
+        }
+
+    @staticmethod
+    async def _send_json(send, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+app = InferenceService(os.environ.get("EEG_MODEL_PATH"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the emotion model over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--variant", default=DEFAULT_VARIANT, help="Registered model variant to serve.")
+    parser.add_argument("--model", default=os.environ.get("EEG_MODEL_PATH"),
+                        help="Serve this pickle instead of the registry's newest version.")
+    parser.add_argument("--max-batch-rows", type=int, default=MAX_BATCH_ROWS)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    service = InferenceService(args.model, args.max_batch_rows, args.max_wait_ms, args.max_concurrency,
+                               variant=args.variant)
+    uvicorn.run(service, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+SQLite plumbing shared by the app's stores (users, prediction history).
+
+Each thread gets its own connection (Streamlit runs every session's script
+on its own thread). Databases are opened in WAL mode: readers never block
+the writer, and concurrent writers, from threads or from several app
+processes, are serialised by SQLite's lock instead of overwriting each
+other's changes.
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+# How long a writer waits for another one before giving up
+BUSY_TIMEOUT_MS = 5000
+
+
+def connect(path) -> sqlite3.Connection:
+    """Autocommit connection in WAL mode; use transaction() to group statements."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT_MS / 1000.0, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+class SQLiteStore:
+    """Base class of a store in one SQLite file: per-thread connections, SCHEMA created on open."""
+
+    SCHEMA = ""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self.conn.executescript(self.SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT: takes the write lock up front, rolls back on error."""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,424 @@
+"""
+Streaming inference on live 128 Hz, 32-channel EEG.
+
+Samples arrive in chunks, from a local socket or a replayed recording, and
+are written to a RingBuffer: one fixed-size ring per channel, held in a
+single (channels, capacity) array. Every `hop_sec` seconds a prediction is
+emitted for the last `window_sec` seconds. Both range over the window
+lengths of the feature files, 1 s to 7.5 s:
+
+    stream = StreamingClassifier(ModelRegistry("xgboost"), window_sec=2.0, hop_sec=1.0)
+    for chunk, received in replay_recording("data/raw/sub10t1F.mat", speed=10):
+        for prediction in stream.push(chunk, received):
+            print(prediction["label"], prediction["latency_ms"])
+
+Features are updated as samples arrive rather than recomputed per window,
+so a hop costs the same whatever the window length. The featurizer follows
+the model's feature count:
+
+    "samples"     the deployed model: one row of 32 channel values per
+                  sample. New samples are scored once; a window's
+                  probabilities are the mean of its samples'.
+    "band_power"  models trained on band powers (32 x 5 columns, see
+                  data/features.py). Each one-second Welch segment (50%
+                  overlap) is transformed once, when it completes; a
+                  window's band powers are the mean of its segments', equal
+                  to band_powers(..., method="welch") over the window.
+
+A prediction's latency_ms runs from the arrival of the chunk that completed
+its window to the prediction; timings_ms splits the work done for the
+stream since the previous prediction into filter, features and inference.
+bandpass=True adds the FIR band-pass of data/preprocessing.py as a causal
+filter whose state is carried across chunks (unlike the offline zero-phase
+filter, it delays the signal by half its kernel).
+
+Replay a recording from the command line, or serve it on a local socket as
+float32 frames and classify it from another process:
+
+    python Deployment/streaming.py data/raw/sub10t1F.mat --speed 10 --window 2 --hop 1
+    python Deployment/streaming.py data/raw/sub10t1F.mat --serve 8700
+    python Deployment/streaming.py --connect 127.0.0.1:8700
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import signal as sps
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from data.features import (
+    BANDS, PYRAMID_WINDOWS, SAMPLING_RATE, band_powers_from_psd, sliding_windows, window_params, windows_psd,
+)
+from data.preprocessing import bandpass_kernel
+from Deployment.inference import EMOTION_MAPPING, N_FEATURES, predict_proba
+from Deployment.timing import PhaseTimer
+
+# Window and hop lengths allowed, in seconds (the feature files' 1s ... 7.5s)
+MIN_WINDOW_SEC = PYRAMID_WINDOWS[0]
+MAX_WINDOW_SEC = PYRAMID_WINDOWS[-1]
+DEFAULT_WINDOW_SEC = 2.0
+DEFAULT_HOP_SEC = 1.0
+
+# Samples per chunk of a replayed recording
+CHUNK_SEC = 0.125
+
+FEATURIZERS = ("samples", "band_power")
+
+
+class RingBuffer:
+    """
+    The last `capacity` samples of a (samples, channels) stream, kept as one
+    fixed-size ring per channel and written in place. `total` counts every
+    sample ever written, and window() addresses samples by that index.
+    """
+
+    def __init__(self, capacity, channels, dtype=np.float32):
+        self.capacity = int(capacity)
+        self.data = np.zeros((channels, self.capacity), dtype=dtype)
+        self.total = 0
+
+    def extend(self, samples) -> None:
+        samples = np.atleast_2d(np.asarray(samples, dtype=self.data.dtype))
+        n = len(samples)
+        if n > self.capacity:
+            # Only the newest `capacity` samples can be kept
+            self.total += n - self.capacity
+            samples, n = samples[-self.capacity:], self.capacity
+        start = self.total % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[:, start:start + first] = samples[:first].T
+        self.data[:, :n - first] = samples[first:].T
+        self.total += n
+
+    def window(self, end=None, length=None) -> np.ndarray:
+        """Copy of samples [end - length, end) as (length, channels); `end` defaults to the newest sample."""
+        end = self.total if end is None else end
+        length = self.capacity if length is None else length
+        if end > self.total or end - length < max(0, self.total - self.capacity):
+            raise ValueError(f"Samples [{end - length}, {end}) are not in the buffer "
+                             f"(it holds [{max(0, self.total - self.capacity)}, {self.total})).")
+        start = (end - length) % self.capacity
+        if start + length <= self.capacity:
+            return self.data[:, start:start + length].T.copy()
+        return np.concatenate([self.data[:, start:], self.data[:, :start + length - self.capacity]], axis=1).T
+
+
+class CausalBandpass:
+    """The FIR band-pass of data/preprocessing.py as a causal filter, its state carried between chunks."""
+
+    def __init__(self, channels, fs=SAMPLING_RATE):
+        self.kernel = bandpass_kernel(fs=fs)
+        self.state = np.zeros((len(self.kernel) - 1, channels))
+
+    def __call__(self, samples) -> np.ndarray:
+        out, self.state = sps.lfilter(self.kernel, 1.0, samples, axis=0, zi=self.state)
+        return out.astype(np.float32)
+
+
+class SampleFeatures:
+    """Scores every new sample as a row; a window's probabilities are the mean of its samples'."""
+
+    name = "samples"
+
+    def __init__(self, model, window, hop, fs=SAMPLING_RATE):
+        self.model = model
+        self.window = window
+        self.capacity = window + hop
+        self.probs = None  # created once the number of classes is known
+
+    def update(self, buffer, samples, timer) -> None:
+        with timer.phase("inference"):
+            probs = predict_proba(self.model, samples)
+        if self.probs is None:
+            self.probs = RingBuffer(self.capacity, probs.shape[1], dtype=np.float64)
+        self.probs.extend(probs)
+
+    def predict(self, ends, timer) -> np.ndarray:
+        with timer.phase("features"):
+            return np.stack([self.probs.window(end, self.window).mean(axis=0) for end in ends])
+
+
+class BandPowerFeatures:
+    """
+    Welch band powers of each one-second segment (50% overlap), computed
+    once as the segment completes; a window is the mean of its segments.
+    """
+
+    name = "band_power"
+
+    def __init__(self, model, window, hop, fs=SAMPLING_RATE, bands=BANDS):
+        self.model = model
+        self.fs = fs
+        self.bands = bands
+        self.nperseg = fs
+        self.seg_hop = fs // 2
+        if window < self.nperseg or (window - self.nperseg) % self.seg_hop or hop % self.seg_hop:
+            raise ValueError(f"Band power windows must be at least {self.nperseg / fs:g}s, "
+                             f"and window and hop multiples of {self.seg_hop / fs:g}s.")
+        self.window = window
+        self.n_segments = (window - self.nperseg) // self.seg_hop + 1
+        self.capacity = self.n_segments + hop // self.seg_hop + 1
+        self.segments = None
+        self.done = 0  # segments transformed so far
+
+    def update(self, buffer, samples, timer) -> None:
+        ready = (buffer.total - self.nperseg) // self.seg_hop + 1 if buffer.total >= self.nperseg else 0
+        new = ready - self.done
+        if new <= 0:
+            return
+        with timer.phase("features"):
+            span = (new - 1) * self.seg_hop + self.nperseg
+            signal = buffer.window((ready - 1) * self.seg_hop + self.nperseg, span)
+            segments = sliding_windows(signal, self.nperseg, self.seg_hop)
+            freqs, psd = windows_psd(segments, fs=self.fs, method="welch", nperseg=self.nperseg)
+            powers = band_powers_from_psd(freqs, psd, self.bands)
+            if self.segments is None:
+                self.segments = RingBuffer(self.capacity, powers.shape[1] * powers.shape[2], dtype=np.float64)
+            self.segments.extend(powers.reshape(new, -1))
+        self.done = ready
+
+    def predict(self, ends, timer) -> np.ndarray:
+        with timer.phase("features"):
+            # The window [end - window, end) is made of the segments ending at end at the latest
+            rows = np.stack([
+                self.segments.window((end - self.window) // self.seg_hop + self.n_segments, self.n_segments).mean(axis=0)
+                for end in ends
+            ]).astype(np.float32)
+        with timer.phase("inference"):
+            return predict_proba(self.model, rows)
+
+
+def select_featurizer(model, channels=N_FEATURES, bands=BANDS) -> str:
+    """The featurizer matching the model's feature count: one column per channel, or per channel and band."""
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is None or n_features == channels:
+        return "samples"
+    if n_features == channels * len(bands):
+        return "band_power"
+    raise ValueError(f"A model with {n_features} features can't be streamed: expected {channels} "
+                     f"(channel values) or {channels * len(bands)} (band powers).")
+
+
+class StreamingClassifier:
+    """
+    Sliding-window classification of one stream: push() chunks of samples,
+    get back a prediction for every hop completed by them.
+    """
+
+    def __init__(self, model, window_sec=None, hop_sec=DEFAULT_HOP_SEC, fs=SAMPLING_RATE, channels=N_FEATURES,
+                 featurizer="auto", bandpass=False):
+        if window_sec is None:
+            window_sec = (getattr(model, "metadata", None) or {}).get("window_seconds") or DEFAULT_WINDOW_SEC
+        for name, seconds in (("Window", window_sec), ("Hop", hop_sec)):
+            if not MIN_WINDOW_SEC <= seconds <= MAX_WINDOW_SEC:
+                raise ValueError(f"{name} must be between {MIN_WINDOW_SEC:g}s and {MAX_WINDOW_SEC:g}s, got {seconds:g}s.")
+        self.model = model
+        self.fs = fs
+        self.channels = channels
+        self.window_sec, self.hop_sec = window_sec, hop_sec
+        self.window, self.hop = window_params(window_sec, hop_sec, fs)
+
+        if featurizer == "auto":
+            featurizer = select_featurizer(model, channels)
+        if featurizer not in FEATURIZERS:
+            raise ValueError(f"Unknown featurizer '{featurizer}'. Expected one of {', '.join(FEATURIZERS)}.")
+        features_cls = SampleFeatures if featurizer == "samples" else BandPowerFeatures
+        self.features = features_cls(model, self.window, self.hop, fs)
+
+        # Chunks are taken at most a hop at a time, so a window and one hop always fit
+        self.buffer = RingBuffer(self.window + self.hop, channels)
+        self.filter = CausalBandpass(channels, fs) if bandpass else None
+        self.next_end = self.window
+        self.emitted = 0
+        self._timer = PhaseTimer()
+
+    def push(self, samples, received=None) -> list:
+        """
+        Add a (samples, channels) chunk that arrived at `received`
+        (time.perf_counter(), default now); returns the predictions of the
+        windows it completed, oldest first.
+        """
+        received = time.perf_counter() if received is None else received
+        samples = np.atleast_2d(np.asarray(samples, dtype=np.float32))
+        if samples.shape[1] != self.channels:
+            raise ValueError(f"Expected {self.channels} channels, got {samples.shape[1]}.")
+        predictions = []
+        for start in range(0, len(samples), self.hop):
+            piece = samples[start:start + self.hop]
+            if self.filter is not None:
+                with self._timer.phase("filter"):
+                    piece = self.filter(piece)
+            self.buffer.extend(piece)
+            self.features.update(self.buffer, piece, self._timer)
+            ends = []
+            while self.next_end <= self.buffer.total:
+                ends.append(self.next_end)
+                self.next_end += self.hop
+            if ends:
+                predictions.extend(self._emit(ends, received))
+        return predictions
+
+    def _emit(self, ends, received) -> list:
+        probs = self.features.predict(ends, self._timer)
+        latency_ms = (time.perf_counter() - received) * 1000.0
+        timings, self._timer = self._timer.timings, PhaseTimer()
+        predictions = []
+        for end, p in zip(ends, probs):
+            pred = int(np.argmax(p))
+            predictions.append({
+                "window": self.emitted,
+                "start_sec": (end - self.window) / self.fs,
+                "end_sec": end / self.fs,
+                "class": pred,
+                "label": EMOTION_MAPPING.get(pred, str(pred)),
+                "probabilities": [float(x) for x in p],
+                "latency_ms": latency_ms,
+                "timings_ms": dict(timings),
+            })
+            self.emitted += 1
+        return predictions
+
+
+def latency_summary(predictions, percentiles=(50, 95, 99)) -> dict:
+    """{"latency" or phase: {"count", "p50", "p95", "p99"}} over a list of predictions."""
+    samples = {"latency": [p["latency_ms"] for p in predictions]}
+    for p in predictions:
+        for phase, ms in p["timings_ms"].items():
+            samples.setdefault(phase, []).append(ms)
+    summary = {}
+    for key, values in samples.items():
+        if not values:
+            continue
+        stats = {"count": len(values)}
+        for q, value in zip(percentiles, np.percentile(values, percentiles)):
+            stats[f"p{q}"] = float(value)
+        summary[key] = stats
+    return summary
+
+
+# ------------------------------------------------------------
+# Sources
+# ------------------------------------------------------------
+def read_recording(path) -> np.ndarray:
+    """(samples, channels) float32 signal of a .mat recording (read like data/final_data_processing.py) or a .npy file."""
+    path = Path(path)
+    if path.suffix == ".npy":
+        return np.asarray(np.load(path), dtype=np.float32)
+    from data.final_data_processing import detect_variable_name, load_recording
+
+    record, message = load_recording(str(path), detect_variable_name(str(path)))
+    if record is None:
+        raise ValueError(message.strip())
+    return record["data"].astype(np.float32)
+
+
+def replay_recording(recording, speed=1.0, chunk_sec=CHUNK_SEC, fs=SAMPLING_RATE):
+    """
+    Yield (chunk, received) pairs of a recording (a path or a signal array)
+    at `speed` times real time; speed=None replays as fast as it is consumed.
+    `received` is when the chunk's last sample is due, so time spent falling
+    behind counts towards a prediction's latency.
+    """
+    signal = read_recording(recording) if isinstance(recording, (str, Path)) else np.asarray(recording, np.float32)
+    chunk = max(1, int(round(chunk_sec * fs)))
+    start = time.perf_counter()
+    for offset in range(0, len(signal), chunk):
+        piece = signal[offset:offset + chunk]
+        if speed is None:
+            yield piece, time.perf_counter()
+            continue
+        due = start + (offset + len(piece)) / (fs * speed)
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield piece, due
+
+
+def serve_recording(recording, port, host="127.0.0.1", speed=1.0, chunk_sec=CHUNK_SEC, fs=SAMPLING_RATE):
+    """Wait for one client on (host, port) and send it the recording as little-endian float32 frames."""
+    with socket.create_server((host, port)) as server:
+        conn, _ = server.accept()
+        with conn:
+            for piece, _ in replay_recording(recording, speed, chunk_sec, fs):
+                conn.sendall(np.ascontiguousarray(piece, dtype="<f4").tobytes())
+
+
+def socket_source(host, port, channels=N_FEATURES, max_bytes=65536):
+    """Yield (chunk, received) pairs of the float32 frames read from (host, port) until it closes."""
+    frame = channels * 4
+    pending = b""
+    with socket.create_connection((host, port)) as conn:
+        while True:
+            data = conn.recv(max_bytes)
+            if not data:
+                return
+            received = time.perf_counter()
+            pending += data
+            n = len(pending) // frame
+            if n:
+                chunk = np.frombuffer(pending[:n * frame], dtype="<f4").reshape(n, channels)
+                pending = pending[n * frame:]
+                yield chunk, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify a live or replayed EEG stream window by window.")
+    parser.add_argument("recording", nargs="?", help="A .mat recording (e.g. data/raw/sub10t1F.mat) or .npy array.")
+    parser.add_argument("--speed", default="1", help="Replay speed, a multiple of real time, or 'max'.")
+    parser.add_argument("--serve", type=int, default=None, metavar="PORT",
+                        help="Send the recording to one client on this port instead of classifying it.")
+    parser.add_argument("--connect", default=None, metavar="HOST:PORT", help="Classify the stream sent to this socket.")
+    parser.add_argument("--window", type=float, default=None, help="Window length in seconds (default: the model's).")
+    parser.add_argument("--hop", type=float, default=DEFAULT_HOP_SEC, help="Seconds between predictions.")
+    parser.add_argument("--featurizer", default="auto", choices=("auto",) + FEATURIZERS)
+    parser.add_argument("--bandpass", action="store_true", help="Band-pass filter the stream (causal FIR).")
+    parser.add_argument("--variant", default=None, help="Registered model variant.")
+    parser.add_argument("--model", default=os.environ.get("EEG_MODEL_PATH"),
+                        help="Use this pickle instead of the registry's newest version.")
+    args = parser.parse_args()
+    speed = None if args.speed == "max" else float(args.speed)
+
+    if args.connect is None and args.recording is None:
+        parser.error("Give a recording to replay or --connect HOST:PORT.")
+    if args.serve is not None:
+        print(f"Serving '{args.recording}' on 127.0.0.1:{args.serve} ...")
+        serve_recording(args.recording, args.serve, speed=speed)
+        return
+
+    from Deployment.registry import DEFAULT_VARIANT, ModelRegistry
+
+    model = ModelRegistry(args.variant or DEFAULT_VARIANT, path=args.model)
+    model.warm_up()
+    stream = StreamingClassifier(model, args.window, args.hop, featurizer=args.featurizer, bandpass=args.bandpass)
+    if args.connect is not None:
+        host, port = args.connect.rsplit(":", 1)
+        source = socket_source(host, int(port))
+    else:
+        source = replay_recording(args.recording, speed)
+
+    print(f"Model: {model.current().label} · {stream.features.name} features · "
+          f"window {stream.window_sec:g}s, hop {stream.hop_sec:g}s")
+    predictions = []
+    for chunk, received in source:
+        for p in stream.push(chunk, received):
+            predictions.append(p)
+            print(f"{p['start_sec']:7.2f}-{p['end_sec']:<7.2f}s  {p['label']:<10}  "
+                  f"p={max(p['probabilities']):.2f}  latency {p['latency_ms']:.2f} ms")
+
+    if not predictions:
+        print("The stream ended before the first window was complete.")
+        return
+    print(f"\n{'':<10}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for key, stats in latency_summary(predictions).items():
+        print(f"{key:<10}{stats['count']:>7}{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['p99']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
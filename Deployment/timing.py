@@ -0,0 +1,125 @@
+"""
+Phase timing for the Streamlit app.
+
+A PhaseTimer measures the named phases of one request (upload parse,
+column selection, model inference, rendering); the app shows them and
+appends them as one JSON line to a log file. latency_percentiles()
+summarises such a log, and running this module prints the p50/p95 table:
+
+    python Deployment/timing.py Deployment/latency_log.jsonl
+"""
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+
+class PhaseTimer:
+    """Wall-clock durations (ms) of named phases, in the order they ran."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000.0)
+
+    def add(self, name: str, ms: float) -> None:
+        # A phase that runs more than once accumulates
+        self.timings[name] = self.timings.get(name, 0.0) + ms
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.timings.values())
+
+    def summary(self) -> str:
+        parts = [f"{name} {ms:.1f} ms" for name, ms in self.timings.items()]
+        return " · ".join(parts + [f"total {self.total_ms:.1f} ms"])
+
+
+def log_timings(path, event: str, timings: dict, **fields) -> None:
+    """Append one timing record to the JSON-lines log at `path`."""
+    record = {"ts": time.time(), "event": event, "timings_ms": timings, **fields}
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def _tail_lines(f, limit: int, block_size: int = 64 * 1024) -> list:
+    """The last `limit` lines of the binary file `f`, read backwards from EOF in blocks."""
+    f.seek(0, 2)
+    pos = f.tell()
+    data = b""
+    # One line more than asked for, since the first one found may be cut off by the block edge
+    while pos > 0 and data.count(b"\n") <= limit:
+        step = min(block_size, pos)
+        pos -= step
+        f.seek(pos)
+        data = f.read(step) + data
+    lines = data.splitlines()
+    return lines[-limit:] if limit else []
+
+
+def read_timings(path, limit: int = None) -> list:
+    """
+    Timing records from the log at `path`; only the last `limit` if given,
+    which reads just the tail of the file.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, "rb") as f:
+        lines = f.readlines() if limit is None else _tail_lines(f, limit)
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue  # partially written line
+    return records
+
+
+def latency_percentiles(path, event: str = None, percentiles=(50, 95), limit: int = None) -> dict:
+    """
+    {(event, phase): {"count": n, "p50": ms, "p95": ms}} over the log at `path`
+    (its last `limit` records, if given), optionally restricted to one event.
+    A "total" phase covers whole requests.
+    """
+    samples = {}
+    for record in read_timings(path, limit):
+        if event is not None and record.get("event") != event:
+            continue
+        timings = record.get("timings_ms", {})
+        for phase, ms in list(timings.items()) + [("total", sum(timings.values()))]:
+            samples.setdefault((record.get("event"), phase), []).append(ms)
+
+    summary = {}
+    for key, values in samples.items():
+        stats = {"count": len(values)}
+        for p, value in zip(percentiles, np.percentile(values, percentiles)):
+            stats[f"p{p}"] = float(value)
+        summary[key] = stats
+    return summary
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else Path(__file__).resolve().parent / "latency_log.jsonl"
+    summary = latency_percentiles(path)
+    if not summary:
+        print(f"No timings in '{path}'.")
+        return
+    print(f"{'event':<18}{'phase':<12}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}")
+    for (event, phase), stats in sorted(summary.items()):
+        print(f"{event:<18}{phase:<12}{stats['count']:>7}{stats['p50']:>10.2f}{stats['p95']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
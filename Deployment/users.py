@@ -0,0 +1,177 @@
+"""
+User stores for the Streamlit app's login.
+
+A store maps a username to its password hash and creation time:
+
+    store = open_user_store("Deployment/app.db", legacy_json="Deployment/users.json")
+    store.add("alice", hash_password("secret"))     # False if the name is taken
+    store.get("alice")                               # {"password": ..., "created_at": ...}
+
+SQLiteUserStore is the default: the username is the table's primary key (an
+indexed lookup instead of parsing the whole file), an insert is a single
+atomic statement, and looked-up users are kept in an in-process cache.
+Users from the old users.json are copied in once when the database is
+created. JSONUserStore keeps the old file format, for single-process use.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+
+from Deployment.storage import SQLiteStore
+
+# Users kept in the in-process read cache
+USER_CACHE_SIZE = 1024
+
+
+class UserStore(ABC):
+    """Interface of a user store."""
+
+    @abstractmethod
+    def get(self, username: str):
+        """{"password", "created_at"} of `username`, or None."""
+
+    @abstractmethod
+    def add(self, username: str, password_hash: str, created_at: float = None) -> bool:
+        """Create `username`; False if it already exists."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of users."""
+
+
+class SQLiteUserStore(SQLiteStore, UserStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            username   TEXT PRIMARY KEY,
+            password   TEXT NOT NULL,
+            created_at REAL NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path, cache_size=USER_CACHE_SIZE):
+        super().__init__(path)
+        self.cache_size = cache_size
+        # Users are never modified once created, so cached entries can't go
+        # stale; unknown names aren't cached (another process may add them)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def get(self, username: str):
+        with self._cache_lock:
+            if username in self._cache:
+                self._cache.move_to_end(username)
+                return dict(self._cache[username])
+        row = self.conn.execute(
+            "SELECT password, created_at FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None:
+            return None
+        user = {"password": row["password"], "created_at": row["created_at"]}
+        with self._cache_lock:
+            self._cache[username] = user
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(user)
+
+    def add(self, username: str, password_hash: str, created_at: float = None) -> bool:
+        try:
+            self.conn.execute(
+                "INSERT INTO users (username, password, created_at) VALUES (?, ?, ?)",
+                (username, password_hash, time.time() if created_at is None else created_at),
+            )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def migrate_json(self, json_path) -> int:
+        """
+        Copy the users of a users.json file in, once per database (tracked in
+        PRAGMA user_version); existing usernames are kept. Returns the number
+        of users added.
+        """
+        json_path = Path(json_path)
+        with self.transaction() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+                return 0
+            added = 0
+            if json_path.exists():
+                with open(json_path, "r", encoding="utf-8") as f:
+                    users = json.load(f)
+                for username, user in users.items():
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO users (username, password, created_at) VALUES (?, ?, ?)",
+                        (username, user["password"], user.get("created_at") or time.time()),
+                    )
+                    added += cursor.rowcount
+            conn.execute("PRAGMA user_version = 1")
+        return added
+
+
+class JSONUserStore(UserStore):
+    """
+    The original users.json format. Reads are served from memory until the
+    file changes; writes replace the file atomically under a lock, which
+    protects threads of one process but not several processes.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._users = {}
+        self._mtime_ns = None
+
+    def _load(self) -> dict:
+        try:
+            mtime_ns = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime_ns != self._mtime_ns:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._users = json.load(f)
+            self._mtime_ns = mtime_ns
+        return self._users
+
+    def get(self, username: str):
+        with self._lock:
+            user = self._load().get(username)
+        return dict(user) if user is not None else None
+
+    def add(self, username: str, password_hash: str, created_at: float = None) -> bool:
+        with self._lock:
+            users = dict(self._load())
+            if username in users:
+                return False
+            users[username] = {
+                "password": password_hash,
+                "created_at": time.time() if created_at is None else created_at,
+            }
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(users, f, indent=4)
+            os.replace(tmp, self.path)
+            self._users, self._mtime_ns = users, self.path.stat().st_mtime_ns
+        return True
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+
+def open_user_store(path, legacy_json=None) -> UserStore:
+    """A JSONUserStore for a .json path, else a SQLiteUserStore (importing `legacy_json` once)."""
+    path = Path(path)
+    if path.suffix == ".json":
+        return JSONUserStore(path)
+    store = SQLiteUserStore(path)
+    if legacy_json is not None:
+        store.migrate_json(legacy_json)
+    return store
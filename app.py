@@ -1,12 +1,17 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import time
 import json
 import hashlib
 from pathlib import Path
-import plotly.graph_objects as go
+
+from Deployment.inference import BATCH_CHUNK_SIZE, batch_results_frame, predict_batch
+
+# Import time of the first run in the process (reruns find the modules loaded)
+IMPORT_MS = (time.perf_counter() - _IMPORT_START) * 1000.0
 
 # ==============================
 # PATHS & CONSTANTS (FIXED)
@@ -44,15 +49,31 @@ class MockModel:
 
 @st.cache_resource(show_spinner=False)
 def load_model():
+    """(model, using_mock, startup timings in ms); the model is warmed with a dummy batch."""
+    timings = {"imports": IMPORT_MS}
+    start = time.perf_counter()
     try:
+        import joblib
+
         model = joblib.load(MODEL_PATH)
-        return model, False
     except Exception as e:
         st.error(f"Model loading error: {e}")
-        return MockModel(), True
+        return MockModel(), True, timings
+    timings["model_load"] = (time.perf_counter() - start) * 1000.0
+
+    # The first predict call sets up the booster; do it now, not on the first request.
+    # A model that won't take a dummy array is still served, just not warmed.
+    start = time.perf_counter()
+    try:
+        width = getattr(model, "n_features_in_", 32)
+        model.predict_proba(np.zeros((1, width), dtype=np.float32))
+    except Exception:
+        return model, False, timings
+    timings["warmup"] = (time.perf_counter() - start) * 1000.0
+    return model, False, timings
 
 
-MODEL, USING_MOCK = load_model()
+MODEL, USING_MOCK, STARTUP_TIMINGS = load_model()
 
 # ==============================
 # SESSION INITIALISATION
@@ -69,6 +90,8 @@ if "theme_mode" not in st.session_state:
     st.session_state.theme_mode = "dark"
 if "dashboard_intro_done" not in st.session_state:
     st.session_state.dashboard_intro_done = False
+if "batch_result" not in st.session_state:
+    st.session_state.batch_result = None
 
 # ==============================
 # AUTH HELPERS
@@ -121,6 +144,7 @@ def sidebar_menu():
             st.warning("Demo mode enabled. Mock predictions.", icon="⚠️")
         else:
             st.success("XGBoost model loaded", icon="✅")
+        st.caption("Startup: " + " · ".join(f"{k.replace('_', ' ')} {v:.0f} ms" for k, v in STARTUP_TIMINGS.items()))
 
         page = st.radio(
             "Navigation",
@@ -167,6 +191,11 @@ def page_upload_predict():
     df = pd.read_csv(uploaded_file) if uploaded_file.name.endswith(".csv") else pd.read_excel(uploaded_file)
     st.dataframe(df.head())
 
+    mode = st.radio("Prediction mode", ["Single record", "All records"], horizontal=True)
+    if mode == "All records":
+        batch_predict_section(df, uploaded_file.name)
+        return
+
     selected_row = df.iloc[[0]]
 
     if st.button("✨ Predict Emotion"):
@@ -188,6 +217,74 @@ def page_upload_predict():
             }
         )
 
+
+def batch_predict_section(df: pd.DataFrame, file_name: str):
+    st.subheader(f"Predict all records ({len(df):,} rows)")
+    chunk_size = st.number_input(
+        "Rows per model call",
+        min_value=1,
+        value=BATCH_CHUNK_SIZE,
+        step=1000,
+        help="The file is scored in chunks of this many rows, one vectorized call each.",
+    )
+
+    if st.button("⚡ Predict All"):
+        model_input = df.drop(columns=["subject_id"], errors="ignore")
+        try:
+            start = time.perf_counter()
+            pred_classes, probs = predict_batch(MODEL, model_input, chunk_size)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            st.error(f"Prediction error: {e}")
+            return
+
+        results = batch_results_frame(df, pred_classes, probs)
+        st.session_state.batch_result = {
+            "file_name": file_name,
+            "results": results,
+            "probs": probs,
+            "seconds": elapsed,
+        }
+        st.session_state.history.append(
+            {
+                "file_name": file_name,
+                "pred_label": results["pred_label"].mode().iat[0] if len(results) else "—",
+                "timestamp": time.time(),
+            }
+        )
+
+    # Kept in the session so the results survive the rerun triggered by the download button
+    batch = st.session_state.batch_result
+    if batch is None or batch["file_name"] != file_name:
+        return
+
+    results = batch["results"]
+    rows_per_sec = len(results) / batch["seconds"] if batch["seconds"] > 0 else float("inf")
+    st.caption(f"Scored {len(results):,} rows in {batch['seconds']:.3f} s ({rows_per_sec:,.0f} rows/sec).")
+
+    counts = results["pred_label"].value_counts()
+    for col, label in zip(st.columns(len(EMOTION_MAPPING)), EMOTION_MAPPING.values()):
+        col.metric(label, f"{int(counts.get(label, 0)):,}")
+
+    if batch["probs"] is not None:
+        import plotly.graph_objects as go
+
+        fig = go.Figure()
+        for cls, label in EMOTION_MAPPING.items():
+            fig.add_trace(go.Histogram(x=batch["probs"][:, cls], name=label, opacity=0.6,
+                                       xbins=dict(start=0, end=1, size=0.05)))
+        fig.update_layout(barmode="overlay", xaxis_title="Predicted probability", yaxis_title="Records",
+                          height=360, margin=dict(l=0, r=0, t=10, b=0))
+        st.plotly_chart(fig, width="stretch")
+
+    st.dataframe(results.head(100))
+    st.download_button(
+        "⬇️ Download predictions (CSV)",
+        data=results.to_csv(index=False).encode("utf-8"),
+        file_name=f"{Path(file_name).stem}_predictions.csv",
+        mime="text/csv",
+    )
+
 # ==============================
 # PROFILE
 # ==============================
@@ -0,0 +1,73 @@
+"""
+Helpers shared by the benchmark scripts.
+
+numpy is only imported inside the functions, so a script can call
+pin_threads() after importing this module and before importing numpy.
+"""
+import os
+import time
+import tempfile
+from pathlib import Path
+
+N_FEATURES = 32
+
+
+def pin_threads():
+    """Pin BLAS/FFT thread pools to one core; call it before numpy is imported."""
+    for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(var, '1')
+
+
+def load_signals(data_dir, limit=None):
+    """float32 (samples, 32) arrays of the raw .mat recordings in data_dir (the first `limit`)."""
+    import numpy as np
+
+    from data.final_data_processing import detect_variable_name, iter_recordings
+
+    files = sorted(f for f in os.listdir(data_dir) if f.endswith('.mat'))[:limit]
+    paths = [os.path.join(data_dir, f) for f in files]
+    variable = detect_variable_name(paths[0])
+    return [
+        record['data'].astype(np.float32)
+        for _, record, _ in iter_recordings(paths, variable, num_workers=1)
+        if record is not None
+    ]
+
+
+def timed(fn, signals, repeat):
+    """(outputs of fn over the signals, best wall time in s of `repeat` passes)."""
+    best = float('inf')
+    outputs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [fn(s) for s in signals]
+        best = min(best, time.perf_counter() - start)
+    return outputs, best
+
+
+def benchmark_model(model_path=None, n_estimators=100):
+    """
+    (model, pickle path, description): the exported model, or a stand-in
+    StandardScaler + XGBClassifier pipeline of the same shape (32 features,
+    3 classes) fitted on random data and pickled to a temporary file.
+    """
+    import joblib
+    import numpy as np
+
+    from Deployment.inference import MODEL_PATH
+
+    model_path = Path(model_path or MODEL_PATH)
+    if model_path.exists():
+        return joblib.load(model_path), model_path, str(model_path)
+
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from xgboost import XGBClassifier
+
+    rng = np.random.default_rng(0)
+    X = (rng.standard_normal((3000, N_FEATURES)) * 20 + 5).astype(np.float32)
+    y = rng.integers(0, 3, len(X))
+    model = make_pipeline(StandardScaler(), XGBClassifier(n_estimators=n_estimators, max_depth=6)).fit(X, y)
+    path = Path(tempfile.mkdtemp()) / 'stand_in_model.pkl'
+    joblib.dump(model, path)
+    return model, path, f"stand-in StandardScaler + XGBClassifier ({n_estimators} trees)"
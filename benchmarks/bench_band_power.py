@@ -0,0 +1,91 @@
+"""
+Benchmark band-power feature extraction (data/features.py) on one core.
+
+Runs the batched Welch and FFT paths over every raw recording and reports
+windows/sec, next to a per-window Python loop as the baseline. The pyramid
+cases compare building all feature-file window lengths (1s ... 7.5s) in one
+pass against one batched pass per window length.
+
+Usage (from the repository root):
+    python benchmarks/bench_band_power.py --window 2 --hop 1
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks._common import load_signals, pin_threads, timed
+
+pin_threads()
+
+import numpy as np
+from scipy import signal as sps
+
+from data.features import (
+    PYRAMID_WINDOWS, SAMPLING_RATE, band_matrix, band_power_pyramid, band_powers, window_params,
+)
+
+
+def loop_band_powers(signal, window, hop):
+    # Baseline: one Welch call per window and channel
+    matrix = band_matrix(np.fft.rfftfreq(SAMPLING_RATE, 1.0 / SAMPLING_RATE))
+    out = []
+    for start in range(0, signal.shape[0] - window + 1, hop):
+        rows = []
+        for ch in range(signal.shape[1]):
+            _, psd = sps.welch(signal[start:start + window, ch], fs=SAMPLING_RATE,
+                               nperseg=min(window, SAMPLING_RATE))
+            rows.append(psd @ matrix)
+        out.append(rows)
+    return np.array(out)
+
+
+def pyramid_windows(pyramid):
+    return range(sum(len(p) for p in pyramid.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default=str(ROOT_DIR / 'data' / 'raw'))
+    parser.add_argument('--limit', type=int, default=None, help="Only use the first N files.")
+    parser.add_argument('--window', type=float, default=2.0, help="Window length in seconds.")
+    parser.add_argument('--hop', type=float, default=1.0, help="Hop in seconds.")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-loop', action='store_true', help="Skip the slow loop baseline.")
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    signals = load_signals(args.data_dir, args.limit)
+    window, hop = window_params(args.window, args.hop)
+    print(f"{len(signals)} recordings, window {window} samples, hop {hop} samples")
+
+    cases = {
+        'welch (batched)': lambda s: band_powers(s, args.window, args.hop, method='welch'),
+        'fft (batched)': lambda s: band_powers(s, args.window, args.hop, method='fft'),
+    }
+    cases['pyramid (7 scales)'] = lambda s: pyramid_windows(band_power_pyramid(s, hop_sec=args.hop))
+    cases['welch (7 scales)'] = lambda s: pyramid_windows(
+        {w: band_powers(s, w, args.hop, method='welch') for w in PYRAMID_WINDOWS}
+    )
+    if not args.skip_loop:
+        cases['welch (loop)'] = lambda s: loop_band_powers(s, window, hop)
+
+    results = []
+    for name, fn in cases.items():
+        outputs, seconds = timed(fn, signals, 1 if 'loop' in name else args.repeat)
+        n_windows = sum(len(o) for o in outputs)
+        results.append({'method': name, 'windows': n_windows, 'seconds': seconds,
+                        'windows_per_sec': n_windows / seconds})
+        print(f"{name:<18}{n_windows:>8} windows{seconds:>10.3f} s{n_windows / seconds:>14,.0f} windows/s")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'window': window, 'hop': hop, 'results': results}, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
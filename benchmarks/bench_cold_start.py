@@ -0,0 +1,132 @@
+"""
+Benchmark cold-start latency of the Streamlit apps and the model.
+
+Everything is measured in fresh Python processes, so nothing is already
+imported or loaded:
+
+- imports: time to import each heavy module the apps use (with its own
+  dependencies), e.g. plotly, which Deployment/app.py now imports lazily;
+- model: the first single-row prediction of a cold process, with and
+  without ModelRegistry.warm_up() beforehand, and a warm prediction;
+- apps: the first script run (login page) of each app.py under Streamlit's
+  AppTest, with the model warm-up on and off, using the models/ of the
+  repository.
+
+Without an exported model it uses a stand-in StandardScaler + XGBClassifier
+pipeline (see benchmarks/_common.py).
+
+Usage (from the repository root):
+    python benchmarks/bench_cold_start.py --repeats 3 --json cold_start.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks._common import benchmark_model
+from Deployment.inference import MODEL_PATH
+
+MODULES = ['numpy', 'pandas', 'streamlit', 'plotly.graph_objects', 'sklearn', 'xgboost', 'Deployment.registry']
+APPS = ['app.py', 'Deployment/app.py']
+
+IMPORT_SNIPPET = '''
+import time
+start = time.perf_counter()
+import {module}
+print((time.perf_counter() - start) * 1000.0)
+'''
+
+MODEL_SNIPPET = '''
+import json, time
+import numpy as np
+from Deployment.registry import ModelRegistry
+registry = ModelRegistry(path={path!r})
+timings = registry.warm_up() if {warm} else {{}}
+row = np.zeros((1, 32), dtype=np.float32)
+start = time.perf_counter()
+registry.predict_proba(row)
+timings["first_request"] = (time.perf_counter() - start) * 1000.0
+start = time.perf_counter()
+registry.predict_proba(row)
+timings["warm_request"] = (time.perf_counter() - start) * 1000.0
+print(json.dumps(timings))
+'''
+
+APP_SNIPPET = '''
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+assert not at.exception, at.exception
+print((time.perf_counter() - start) * 1000.0)
+'''
+
+
+def run_snippet(code, env=None):
+    """Run `code` in a fresh interpreter from the repository root; returns its last stdout line."""
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONPATH': str(ROOT_DIR), **(env or {})})
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed')
+    return result.stdout.strip().splitlines()[-1]
+
+
+def median_ms(code, repeats, env=None):
+    return float(np.median([float(run_snippet(code, env)) for _ in range(repeats)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default=str(MODEL_PATH))
+    parser.add_argument('--repeats', type=int, default=3, help="Fresh processes per measurement (median).")
+    parser.add_argument('--skip-apps', action='store_true', help="Don't time the Streamlit apps.")
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    _, model_path, description = benchmark_model(args.model)
+    results = {'model': description, 'imports_ms': {}, 'model_ms': {}, 'apps_ms': {}}
+
+    print(f"{'import':<24}{'ms (median)':>12}")
+    for module in MODULES:
+        ms = median_ms(IMPORT_SNIPPET.format(module=module), args.repeats)
+        results['imports_ms'][module] = ms
+        print(f"{module:<24}{ms:>12.1f}")
+
+    print(f"\nModel: {description}")
+    print(f"{'':<10}{'load':>10}{'warm-up':>10}{'1st request':>13}{'warm request':>14}")
+    for warm in (False, True):
+        runs = [json.loads(run_snippet(MODEL_SNIPPET.format(path=str(model_path), warm=warm)))
+                for _ in range(args.repeats)]
+        timings = {k: float(np.median([r[k] for r in runs])) for k in runs[0]}
+        name = 'warmed' if warm else 'cold'
+        results['model_ms'][name] = timings
+        print(f"{name:<10}{timings.get('model_load', 0):>10.1f}{timings.get('first_predict', 0):>10.1f}"
+              f"{timings['first_request']:>13.2f}{timings['warm_request']:>14.2f}")
+
+    if not args.skip_apps:
+        print(f"\n{'app (first run)':<34}{'ms (median)':>12}")
+        for app in APPS:
+            for warmup in ('1', '0'):
+                ms = median_ms(APP_SNIPPET.format(app=str(ROOT_DIR / app)), args.repeats, {'EEG_WARMUP': warmup})
+                name = f"{app} (warm-up {'on' if warmup == '1' else 'off'})"
+                results['apps_ms'][name] = ms
+                print(f"{name:<34}{ms:>12.1f}")
+                if app == 'app.py':
+                    break  # the standalone app always warms up
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
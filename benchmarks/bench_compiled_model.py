@@ -0,0 +1,95 @@
+"""
+Benchmark the compiled model backend (Deployment/compiled.py) against the
+pickled model it was exported from.
+
+The script checks that both give bit-identical probabilities, then reports
+single-row latency (p50/p95) and batch throughput for each. Without an
+exported model it fits a stand-in StandardScaler + XGBClassifier pipeline of
+the same shape (32 features, 3 classes) on random data.
+
+Usage (from the repository root):
+    python benchmarks/bench_compiled_model.py --batch-sizes 1000 20000
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks._common import N_FEATURES, benchmark_model
+from Deployment.compiled import load_compiled, validate_compiled
+from Deployment.inference import MODEL_PATH
+
+
+def single_row_latency(predict, rows, calls):
+    times = []
+    for i in range(calls):
+        row = rows[i % len(rows)][None, :]
+        start = time.perf_counter()
+        predict(row)
+        times.append((time.perf_counter() - start) * 1000.0)
+    p50, p95 = np.percentile(times, [50, 95])
+    return float(p50), float(p95)
+
+
+def batch_throughput(predict, matrix, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(matrix)
+        best = min(best, time.perf_counter() - start)
+    return len(matrix) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default=str(MODEL_PATH))
+    parser.add_argument('--calls', type=int, default=2000, help="Single-row calls per backend.")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1000, 20000])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    model, model_path, description = benchmark_model(args.model)
+    start = time.perf_counter()
+    compiled = load_compiled(model_path, model)
+    compile_s = time.perf_counter() - start
+    print(f"Model: {description} (compiled in {compile_s:.2f} s)")
+
+    rng = np.random.default_rng(1)
+    matrix = (rng.standard_normal((max(args.batch_sizes), N_FEATURES)) * 20 + 5).astype(np.float32)
+    validation = validate_compiled(model, compiled, matrix)
+    print(f"Validation on {validation['rows']} rows: identical={validation['identical']}, "
+          f"max abs diff={validation['max_abs_diff']:.3g}")
+
+    backends = {'pickle': model.predict_proba, 'compiled': compiled.predict_proba}
+    results = {'model': description, 'compile_s': compile_s, 'validation': validation,
+               'single_row': {}, 'batch': []}
+
+    print(f"\n{'backend':<10}{'1-row p50 ms':>14}{'1-row p95 ms':>14}")
+    for name, predict in backends.items():
+        p50, p95 = single_row_latency(predict, matrix, args.calls)
+        results['single_row'][name] = {'p50_ms': p50, 'p95_ms': p95}
+        print(f"{name:<10}{p50:>14.3f}{p95:>14.3f}")
+
+    print(f"\n{'rows':<9}{'pickle rows/s':>15}{'compiled rows/s':>17}{'speedup':>9}")
+    for size in args.batch_sizes:
+        rates = {name: batch_throughput(predict, matrix[:size], args.repeats)
+                 for name, predict in backends.items()}
+        results['batch'].append({'rows': size, **{f'{name}_rows_per_s': r for name, r in rates.items()}})
+        print(f"{size:<9}{rates['pickle']:>15,.0f}{rates['compiled']:>17,.0f}"
+              f"{rates['compiled'] / rates['pickle']:>8.1f}x")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark the dashboard render time against the length of the prediction
+history (Deployment/history.py, page_dashboard in Deployment/app.py).
+
+For each history length a user with that many predictions is written to a
+temporary app database, and the dashboard is run under Streamlit's AppTest:
+the first render (figures built, timeline sampled from the database), a
+rerun with nothing new (served from the caches), and a render right after
+one more prediction (a new history version).
+
+Usage (from the repository root):
+    python benchmarks/bench_dashboard.py --sizes 100 10000 100000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+APP_PATH = ROOT_DIR / 'Deployment' / 'app.py'
+LABELS = ['Fear 😨', 'Happy 😊', 'Sad 😢']
+
+
+def fill_history(store, user, n, n_files=20):
+    start = time.time() - n
+    for i in range(n):
+        store.append(user, f'session_{i % n_files}.csv', f'{i % 40}#{i % 7}', LABELS[i % 3], ts=start + i)
+
+
+def timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000.0
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000])
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    # The app reads these when it starts; no model is needed for the dashboard
+    os.environ['EEG_APP_DB'] = os.path.join(tempfile.mkdtemp(), 'app.db')
+    os.environ['EEG_WARMUP'] = '0'
+
+    from streamlit.testing.v1 import AppTest
+    from Deployment.history import HistoryStore
+
+    store = HistoryStore(os.environ['EEG_APP_DB'])
+    print(f"{'predictions':<13}{'fill s':>8}{'first ms':>10}{'rerun ms':>10}{'after +1 ms':>13}")
+    results = []
+    for n in args.sizes:
+        user = f'bench_{n}'
+        start = time.perf_counter()
+        fill_history(store, user, n)
+        fill_s = time.perf_counter() - start
+
+        at = AppTest.from_file(str(APP_PATH), default_timeout=300)
+        at.session_state['authenticated'] = True
+        at.session_state['username'] = user
+        at.session_state['dashboard_intro_done'] = True
+        first_ms = timed_run(at)
+        rerun_ms = timed_run(at)
+        store.append(user, 'session_0.csv', '0#0', LABELS[0])
+        after_ms = timed_run(at)
+
+        results.append({'predictions': n, 'fill_s': fill_s, 'first_ms': first_ms,
+                        'rerun_ms': rerun_ms, 'after_append_ms': after_ms})
+        print(f"{n:<13,}{fill_s:>8.1f}{first_ms:>10.1f}{rerun_ms:>10.1f}{after_ms:>13.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
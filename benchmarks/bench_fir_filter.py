@@ -0,0 +1,73 @@
+"""
+Benchmark the FIR band-pass stage of data/preprocessing.py.
+
+Compares direct filtering (scipy.signal.filtfilt / lfilter along the sample
+axis) with FFT overlap-add convolution of the whole (samples, 32) array,
+both zero-phase and causal, on the raw recordings and on one long signal
+made by concatenating them. Also times the full preprocessing chain.
+
+Usage (from the repository root):
+    python benchmarks/bench_fir_filter.py --limit 20
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks._common import load_signals, pin_threads, timed
+
+pin_threads()
+
+import numpy as np
+
+from data.preprocessing import bandpass_kernel, fir_filter, preprocess
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default=str(ROOT_DIR / 'data' / 'raw'))
+    parser.add_argument('--limit', type=int, default=None, help="Only use the first N files.")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    recordings = [s.astype(np.float64) for s in load_signals(args.data_dir, args.limit)]
+    cases = {
+        'per recording': recordings,
+        'concatenated': [np.concatenate(recordings, axis=0)],
+    }
+    kernel = bandpass_kernel()
+    samples = sum(s.shape[0] for s in recordings)
+    print(f"{len(recordings)} recordings, {samples} samples x {recordings[0].shape[1]} channels, "
+          f"{len(kernel)}-tap kernel")
+    print(f"{'input':<15}{'phase':<7}{'direct s':>10}{'fft s':>10}{'speedup':>9}{'max diff':>11}")
+
+    results = []
+    for name, signals in cases.items():
+        for zero_phase in (True, False):
+            direct, direct_s = timed(
+                lambda s: fir_filter(s, kernel, zero_phase=zero_phase, method='direct'), signals, args.repeat)
+            fft, fft_s = timed(
+                lambda s: fir_filter(s, kernel, zero_phase=zero_phase, method='fft'), signals, args.repeat)
+            max_diff = max(float(np.abs(a - b).max()) for a, b in zip(direct, fft))
+            phase = 'zero' if zero_phase else 'causal'
+            results.append({'input': name, 'zero_phase': zero_phase, 'direct_s': direct_s,
+                            'fft_s': fft_s, 'max_abs_diff': max_diff})
+            print(f"{name:<15}{phase:<7}{direct_s:>10.4f}{fft_s:>10.4f}"
+                  f"{direct_s / fft_s:>8.1f}x{max_diff:>11.1e}")
+
+    _, chain_s = timed(preprocess, recordings, args.repeat)
+    print(f"Full chain (FIR + Savitzky-Golay), per recording: {chain_s:.4f} s "
+          f"({samples / chain_s / 1e6:.2f} M samples/s)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'results': results, 'chain_s': chain_s}, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark single-row predictions from many concurrent callers, with and
+without the micro-batching layer (Deployment/batching.py).
+
+Each of N threads sends single-row predict_proba calls, either straight to
+the model or through one shared MicroBatcher, and the script reports
+rows/sec plus the batcher's batch-size and queue-wait percentiles. Without
+an exported model it fits a stand-in StandardScaler + XGBClassifier pipeline
+of the same shape (32 features, 3 classes) on random data, which has the
+same per-call cost.
+
+Usage (from the repository root):
+    python benchmarks/bench_micro_batching.py --threads 1 8 32
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks._common import N_FEATURES, benchmark_model
+from Deployment.batching import MicroBatcher
+from Deployment.inference import MODEL_PATH
+
+
+def run_callers(predict, rows, n_threads, calls_per_thread):
+    def caller(offset):
+        for i in range(calls_per_thread):
+            predict(rows[(offset + i) % len(rows)][None, :])
+
+    threads = [threading.Thread(target=caller, args=(t * calls_per_thread,)) for t in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default=str(MODEL_PATH))
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--calls', type=int, default=200, help="Single-row calls per thread.")
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    model, _, description = benchmark_model(args.model)
+    rows = np.random.default_rng(1).standard_normal((4096, N_FEATURES)).astype(np.float32)
+    print(f"Model: {description}")
+    print(f"{'threads':<9}{'direct rows/s':>15}{'batched rows/s':>16}{'speedup':>9}"
+          f"{'batch p50':>11}{'batch p95':>11}{'wait p95 ms':>13}")
+
+    results = []
+    for n_threads in args.threads:
+        total = n_threads * args.calls
+        direct_s = run_callers(model.predict_proba, rows, n_threads, args.calls)
+
+        batcher = MicroBatcher(model, max_wait_ms=args.max_wait_ms)
+        batched_s = run_callers(lambda x: batcher.submit(x).result(), rows, n_threads, args.calls)
+        metrics = batcher.metrics()
+        batcher.close()
+
+        results.append({'threads': n_threads, 'rows': total, 'direct_s': direct_s,
+                        'batched_s': batched_s, 'batching': metrics})
+        print(f"{n_threads:<9}{total / direct_s:>15,.0f}{total / batched_s:>16,.0f}"
+              f"{direct_s / batched_s:>8.1f}x{metrics['batch_rows_p50']:>11.0f}"
+              f"{metrics['batch_rows_p95']:>11.0f}{metrics['queue_wait_ms_p95']:>13.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'model': description, 'results': results}, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark the dataset output formats of data/final_data_processing.py.
+
+Builds the combined dataset from the raw .mat recordings once, then writes
+and reads it back in every format, reporting write time, read time and
+size on disk relative to CSV.
+
+Usage (from the repository root):
+    python benchmarks/bench_output_formats.py --data-dir data/raw
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from data.dataset_io import FORMATS, load_dataset, output_path, recording_frame, write_dataset
+from data.final_data_processing import detect_variable_name, iter_recordings
+
+
+def path_size(path):
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, f))
+            for root, _, files in os.walk(path)
+            for f in files
+        )
+    return os.path.getsize(path)
+
+
+def build_frame(data_dir, limit=None):
+    files = sorted(f for f in os.listdir(data_dir) if f.endswith('.mat'))[:limit]
+    paths = [os.path.join(data_dir, f) for f in files]
+    variable = detect_variable_name(paths[0])
+    frames = [
+        recording_frame(record['subject_id'], record['emotion'], record['data'])
+        for _, record, _ in iter_recordings(paths, variable)
+        if record is not None
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def bench_format(df, fmt, workdir, repeat):
+    path = output_path(os.path.join(workdir, 'eeg_emotion_dataset'), fmt)
+    write_times, read_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        write_dataset(df, path, fmt)
+        write_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        loaded = load_dataset(path, fmt)
+        read_times.append(time.perf_counter() - start)
+    assert len(loaded) == len(df)
+    return {
+        'format': fmt,
+        'write_s': min(write_times),
+        'read_s': min(read_times),
+        'size_mb': path_size(path) / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default=str(ROOT_DIR / 'data' / 'raw'))
+    parser.add_argument('--limit', type=int, default=None, help="Only use the first N files.")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions; the best time is kept.")
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    df = build_frame(args.data_dir, args.limit)
+    print(f"Dataset: {df.shape[0]} samples x {df.shape[1]} columns")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [bench_format(df, fmt, workdir, args.repeat) for fmt in FORMATS]
+
+    csv = results[0]
+    print(f"{'format':<9}{'write s':>10}{'read s':>10}{'size MB':>10}{'write x':>10}{'read x':>10}{'size x':>10}")
+    for r in results:
+        r['write_speedup'] = csv['write_s'] / r['write_s']
+        r['read_speedup'] = csv['read_s'] / r['read_s']
+        r['size_ratio'] = r['size_mb'] / csv['size_mb']
+        print(f"{r['format']:<9}{r['write_s']:>10.3f}{r['read_s']:>10.3f}{r['size_mb']:>10.2f}"
+              f"{r['write_speedup']:>10.1f}{r['read_speedup']:>10.1f}{r['size_ratio']:>10.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'samples': int(df.shape[0]), 'results': results}, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Load test of streaming inference (Deployment/streaming.py): replay the raw
+recordings through the band-pass filter, feature updates and the model.
+
+The data/raw subXtYZ.mat recordings are spread across N concurrent streams
+(one thread each, sharing one model behind a MicroBatcher; each stream
+replays its share back to back, capped by --per-stream) at each speed:
+1x and 10x real time, and max (as fast as they are consumed). Each run
+reports windows/sec, percentiles of the end-to-end latency and of the
+filter / features / inference stages per window, CPU time and memory. The
+model is the exported one; without it, a stand-in StandardScaler +
+XGBClassifier pipeline of the same shape is used. --json writes the
+results, with the commit they were measured at, for comparison between
+commits.
+
+Usage (from the repository root):
+    python benchmarks/bench_stream_replay.py --speeds 1 10 max --streams 1 8 --json stream_replay.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks._common import benchmark_model
+from data.features import SAMPLING_RATE
+from data.final_data_processing import peak_rss_mb
+from Deployment.batching import MicroBatcher
+from Deployment.inference import MODEL_PATH
+from Deployment.streaming import StreamingClassifier, latency_summary, read_recording, replay_recording
+
+DATA_DIR = ROOT_DIR / 'data' / 'raw'
+
+
+def load_recordings(data_dir):
+    """[(name, signal)] of the subXtYZ.mat recordings in data_dir, and the per-file read times in ms."""
+    recordings, read_ms = [], []
+    for path in sorted(Path(data_dir).glob('sub*t*.mat')):
+        start = time.perf_counter()
+        try:
+            signal = read_recording(path)
+        except ValueError as e:
+            print(f"  - Skipping {path.name}: {e}")
+            continue
+        read_ms.append((time.perf_counter() - start) * 1000.0)
+        recordings.append((path.name, signal))
+    return recordings, read_ms
+
+
+def current_rss_mb():
+    """Resident set size of this process now, where /proc is available."""
+    try:
+        with open('/proc/self/statm', encoding='utf-8') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def assign_recordings(recordings, n_streams, per_stream=None):
+    """
+    The recordings of each of n_streams streams: every recording once, dealt
+    round-robin, at most `per_stream` each. With more streams than
+    recordings, the extra streams reuse them.
+    """
+    shares = []
+    for i in range(n_streams):
+        share = recordings[i::n_streams] or [recordings[i % len(recordings)]]
+        shares.append(share[:per_stream] if per_stream else share)
+    return shares
+
+
+def run_streams(model, recordings, n_streams, speed, per_stream, window_sec, hop_sec, bandpass):
+    """Replay the recordings spread across n_streams threads (see assign_recordings); returns the run's results."""
+    shares = assign_recordings(recordings, n_streams, per_stream)
+    predictions = [[] for _ in range(n_streams)]
+    errors = []
+
+    def stream(i):
+        signal = np.concatenate([s for _, s in shares[i]])
+        classifier = StreamingClassifier(model, window_sec, hop_sec, bandpass=bandpass)
+        try:
+            for chunk, received in replay_recording(signal, speed):
+                predictions[i].extend(classifier.push(chunk, received))
+        except Exception as e:
+            errors.append(repr(e))
+
+    signal_s = sum(len(s) for share in shares for _, s in share) / SAMPLING_RATE
+    threads = [threading.Thread(target=stream, args=(i,)) for i in range(n_streams)]
+    cpu_start = os.times()
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall_s = time.perf_counter() - start
+    cpu_end = os.times()
+    if errors:
+        raise RuntimeError(f"{len(errors)} stream(s) failed: {errors[0]}")
+
+    flat = [p for preds in predictions for p in preds]
+    user_s, system_s = cpu_end.user - cpu_start.user, cpu_end.system - cpu_start.system
+    return {
+        'speed': 'max' if speed is None else speed,
+        'streams': n_streams,
+        'recordings': sum(len(share) for share in shares),
+        'windows': len(flat),
+        'signal_s': signal_s,
+        'wall_s': wall_s,
+        'windows_per_s': len(flat) / wall_s,
+        'realtime_factor': signal_s / wall_s,
+        'stages_ms': latency_summary(flat),
+        'cpu': {'user_s': user_s, 'system_s': system_s, 'utilisation': (user_s + system_s) / wall_s,
+                'ms_per_window': (user_s + system_s) * 1000.0 / max(len(flat), 1)},
+        'memory': {'rss_mb': current_rss_mb(), 'peak_rss_mb': peak_rss_mb()[0]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default=str(MODEL_PATH))
+    parser.add_argument('--data-dir', default=str(DATA_DIR))
+    parser.add_argument('--speeds', nargs='+', default=['1', '10', 'max'],
+                        help="Replay speeds, multiples of real time or 'max'.")
+    parser.add_argument('--streams', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--per-stream', type=int, default=None,
+                        help="At most this many recordings per stream (default: all of its share).")
+    parser.add_argument('--window', type=float, default=2.0)
+    parser.add_argument('--hop', type=float, default=1.0)
+    parser.add_argument('--no-bandpass', action='store_true', help="Skip the causal band-pass filter.")
+    parser.add_argument('--no-batching', action='store_true', help="Streams call the model directly.")
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    recordings, read_ms = load_recordings(args.data_dir)
+    if not recordings:
+        sys.exit(f"No subXtYZ.mat recordings in '{args.data_dir}'.")
+    model, _, description = benchmark_model(args.model)
+    print(f"Model: {description}")
+    print(f"{len(recordings)} recordings, read in {np.percentile(read_ms, 50):.1f} ms (p50) each; "
+          f"window {args.window:g}s, hop {args.hop:g}s, band-pass {'off' if args.no_bandpass else 'on'}")
+    print(f"{'speed':<7}{'streams':>8}{'windows':>9}{'win/s':>9}{'lat p50':>9}{'lat p95':>9}"
+          f"{'infer p95':>11}{'filter p95':>12}{'cpu %':>7}{'rss MB':>8}")
+
+    runs = []
+    for speed in args.speeds:
+        speed = None if speed == 'max' else float(speed)
+        for n_streams in args.streams:
+            batcher = None if args.no_batching else MicroBatcher(model)
+            run = run_streams(batcher or model, recordings, n_streams, speed, args.per_stream,
+                              args.window, args.hop, not args.no_bandpass)
+            if batcher is not None:
+                run['batching'] = batcher.metrics()
+                batcher.close()
+            runs.append(run)
+            stages = run['stages_ms']
+            print(f"{run['speed']:<7}{n_streams:>8}{run['windows']:>9}{run['windows_per_s']:>9.1f}"
+                  f"{stages['latency']['p50']:>9.2f}{stages['latency']['p95']:>9.2f}"
+                  f"{stages['inference']['p95']:>11.2f}{stages.get('filter', {}).get('p95', 0.0):>12.2f}"
+                  f"{run['cpu']['utilisation'] * 100:>7.0f}{run['memory']['rss_mb'] or 0:>8.0f}")
+
+    if args.json:
+        results = {
+            'commit': git_commit(),
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'model': description,
+            'config': {'window_sec': args.window, 'hop_sec': args.hop, 'bandpass': not args.no_bandpass,
+                       'batching': not args.no_batching, 'per_stream': args.per_stream},
+            'recordings': {'count': len(recordings), 'read_ms_p50': float(np.percentile(read_ms, 50)),
+                           'read_ms_p95': float(np.percentile(read_ms, 95))},
+            'runs': runs,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
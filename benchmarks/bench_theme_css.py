@@ -0,0 +1,73 @@
+"""
+Benchmark the theme CSS sent on each Streamlit rerun (inject_theme_css in
+Deployment/app.py).
+
+Runs the app under Streamlit's AppTest with static serving on (the
+stylesheet is a cached file and a rerun sends an @import) and off (the
+cached stylesheet is sent inline), and reports the bytes and milliseconds
+each rerun spends on the theme, next to the cost of building the stylesheet,
+which every rerun used to pay.
+
+Usage (from the repository root):
+    python benchmarks/bench_theme_css.py --reruns 50
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+APP_PATH = ROOT_DIR / 'Deployment' / 'app.py'
+
+
+def measure(static_serving, reruns):
+    from streamlit import config
+    from streamlit.testing.v1 import AppTest
+
+    config.set_option('server.enableStaticServing', static_serving)
+    at = AppTest.from_file(str(APP_PATH), default_timeout=120)
+    at.session_state['authenticated'] = True
+    at.session_state['username'] = 'bench'
+    at.session_state['dashboard_intro_done'] = True
+    samples = []
+    for _ in range(reruns):
+        at.run()
+        samples.append(dict(at.session_state['theme_css_stats']))
+    return {
+        'bytes_per_rerun': samples[-1]['bytes'],
+        'stylesheet_bytes': samples[-1]['css_bytes'],
+        'build_ms': samples[-1]['build_ms'],
+        'ms_per_rerun_p50': float(np.percentile([s['ms'] for s in samples], 50)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=50)
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    os.environ['EEG_APP_DB'] = os.path.join(tempfile.mkdtemp(), 'app.db')
+    os.environ['EEG_WARMUP'] = '0'
+
+    results = {}
+    print(f"{'mode':<10}{'bytes/rerun':>13}{'ms/rerun p50':>14}{'stylesheet B':>14}{'build ms':>10}")
+    for name, static_serving in (('inline', False), ('static', True)):
+        r = results[name] = measure(static_serving, args.reruns)
+        print(f"{name:<10}{r['bytes_per_rerun']:>13,}{r['ms_per_rerun_p50']:>14.3f}"
+              f"{r['stylesheet_bytes']:>14,}{r['build_ms']:>10.3f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
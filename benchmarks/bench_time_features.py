@@ -0,0 +1,81 @@
+"""
+Benchmark time-domain feature extraction (data/features.py) across window lengths.
+
+Sweeps the feature-file window lengths (1s ... 7.5s) and compares the
+prefix-sum engine, whose cost should stay flat as the window grows, with a
+direct per-window computation over a strided view, whose cost grows with
+the window length.
+
+Usage (from the repository root):
+    python benchmarks/bench_time_features.py --hop 0.5
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks._common import load_signals, pin_threads, timed
+
+pin_threads()
+
+import numpy as np
+from scipy import stats
+
+from data.features import PYRAMID_WINDOWS, sliding_windows, time_feature_pyramid, time_features, window_params
+
+
+def direct_time_features(signal, window_sec, hop_sec):
+    # Baseline: moments computed over every window of a strided view, O(N * W)
+    window, hop = window_params(window_sec, hop_sec)
+    w = sliding_windows(signal.astype(np.float64), window, hop)
+    dx = np.diff(w, axis=-1)
+    ddx = np.diff(dx, axis=-1)
+    var = w.var(axis=-1, ddof=1)
+    mobility = np.sqrt(dx.var(axis=-1, ddof=1) / var)
+    return np.stack([
+        w.mean(axis=-1), var, np.sqrt(var), stats.skew(w, axis=-1), stats.kurtosis(w, axis=-1, fisher=False),
+        (np.signbit(w[..., 1:]) != np.signbit(w[..., :-1])).sum(axis=-1) / window,
+        np.ptp(w, axis=-1), var, mobility,
+        np.sqrt(ddx.var(axis=-1, ddof=1) / dx.var(axis=-1, ddof=1)) / mobility,
+    ], axis=-1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default=str(ROOT_DIR / 'data' / 'raw'))
+    parser.add_argument('--limit', type=int, default=None, help="Only use the first N files.")
+    parser.add_argument('--hop', type=float, default=0.5, help="Hop in seconds.")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    signals = load_signals(args.data_dir, args.limit)
+    print(f"{len(signals)} recordings, hop {args.hop:g}s")
+    print(f"{'window':<8}{'prefix s':>10}{'direct s':>10}{'speedup':>9}")
+
+    results = []
+    for window_sec in PYRAMID_WINDOWS:
+        counts, prefix_s = timed(lambda s: len(time_features(s, window_sec, args.hop)), signals, args.repeat)
+        n = sum(counts)
+        _, direct_s = timed(lambda s: len(direct_time_features(s, window_sec, args.hop)), signals, args.repeat)
+        results.append({'window_sec': window_sec, 'windows': n, 'prefix_s': prefix_s, 'direct_s': direct_s})
+        print(f"{window_sec:<8g}{prefix_s:>10.4f}{direct_s:>10.4f}{direct_s / prefix_s:>8.1f}x")
+
+    counts, pyramid_s = timed(
+        lambda s: sum(len(v) for v in time_feature_pyramid(s, PYRAMID_WINDOWS, args.hop).values()),
+        signals, args.repeat,
+    )
+    n = sum(counts)
+    print(f"All {len(PYRAMID_WINDOWS)} windows with shared prefix sums: {pyramid_s:.4f} s ({n} windows)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'hop_sec': args.hop, 'results': results, 'pyramid_s': pyramid_s}, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
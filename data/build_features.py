@@ -0,0 +1,132 @@
+import os
+import sys
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+# Make the repository root importable when run as `python data/build_features.py`
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from data.channel_store import ChannelStore
+from data.features import PYRAMID_WINDOWS, band_power_pyramid_frames, time_feature_pyramid_frames
+from data.final_data_processing import find_variable_name, iter_recordings
+
+# ------------------------------------------------------------
+# Configuration Section
+# ------------------------------------------------------------
+# Directory containing the raw EEG .mat files, used when no channel store is given
+DATA_DIR = 'raw_data_folder'
+
+# Channel store written by `final_data_processing.py --format memmap`
+# If set, recordings are sliced from it instead of loading the .mat files
+STORE_PATH = None
+
+# Directory the feature files are written to
+OUTPUT_DIR = 'features'
+
+# Window lengths in seconds; all of them are computed in a single pass
+WINDOWS_SEC = PYRAMID_WINDOWS
+
+# Hop between windows in seconds (None = non-overlapping windows)
+HOP_SEC = None
+
+# Output format of the feature files: 'csv', 'parquet' or 'feather'
+OUTPUT_FORMAT = 'csv'
+
+# Feature families to build: 'band' (band powers) and/or 'time' (time-domain statistics)
+FEATURE_SETS = ('band', 'time')
+
+PYRAMID_BUILDERS = {
+    'band': band_power_pyramid_frames,
+    'time': time_feature_pyramid_frames,
+}
+
+
+def iter_signals(data_dir, store_path, num_workers):
+    """Yield (subject_id, trial, emotion, signal) from a channel store or a .mat directory."""
+    if store_path:
+        store = ChannelStore(store_path)
+        for entry, signal in store.select():
+            yield entry['subject_id'], entry['trial'], entry['emotion'], signal
+        return
+
+    file_list = sorted(f for f in os.listdir(data_dir) if f.endswith('.mat'))
+    file_paths = [os.path.join(data_dir, f) for f in file_list]
+    variable_name = find_variable_name(file_paths)
+    for file_path, record, message in iter_recordings(file_paths, variable_name, num_workers):
+        if record is None:
+            print(message)
+            continue
+        yield record['subject_id'], record['trial'], record['emotion'], record['data']
+
+
+def feature_filename(feature_set, window_sec, fmt):
+    return f"{feature_set}_features_{window_sec:g}s.{fmt}"
+
+
+def write_frame(df, path, fmt):
+    if fmt == 'csv':
+        df.to_csv(path, index=False)
+    elif fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    elif fmt == 'feather':
+        df.to_feather(path)
+    else:
+        raise ValueError(f"Unknown feature file format '{fmt}'.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Build EEG feature files for several window lengths in one pass."
+    )
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Directory with the raw .mat files.")
+    parser.add_argument('--store', default=STORE_PATH, help="Read recordings from this channel store.")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--windows', type=float, nargs='+', default=list(WINDOWS_SEC),
+                        help="Window lengths in seconds (multiples of 0.5).")
+    parser.add_argument('--hop', type=float, default=HOP_SEC,
+                        help="Hop in seconds (default: the window length).")
+    parser.add_argument('--format', default=OUTPUT_FORMAT, choices=('csv', 'parquet', 'feather'))
+    parser.add_argument('--features', nargs='+', default=list(FEATURE_SETS), choices=FEATURE_SETS,
+                        help="Feature families to build.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for loading .mat files.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.makedirs(args.output_dir, exist_ok=True)
+    frames = {(name, w): [] for name in args.features for w in args.windows}
+
+    print(f"Building {' and '.join(args.features)} features for windows "
+          f"{', '.join(f'{w:g}s' for w in args.windows)}...")
+    n_recordings = 0
+    for subject_id, trial, emotion, signal in iter_signals(args.data_dir, args.store, args.workers):
+        for name in args.features:
+            pyramid = PYRAMID_BUILDERS[name](signal, args.windows, args.hop)
+            for window_sec, df in pyramid.items():
+                df.insert(0, 'emotion', emotion)
+                df.insert(0, 'trial', trial)
+                df.insert(0, 'subject_id', subject_id)
+                frames[(name, window_sec)].append(df)
+        n_recordings += 1
+
+    if not n_recordings:
+        print("No recordings were found. No feature files were written.")
+        return
+
+    for (name, window_sec), parts in frames.items():
+        df = pd.concat(parts, ignore_index=True)
+        path = os.path.join(args.output_dir, feature_filename(name, window_sec, args.format))
+        write_frame(df, path, args.format)
+        print(f"  - {name} {window_sec:g}s: {df.shape[0]} windows x {df.shape[1]} columns -> '{path}'")
+
+    print(f"Success! Features of {n_recordings} recordings saved to '{args.output_dir}'.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Memory-mapped store for raw EEG recordings.
+
+All recordings are written once, back to back, into a single contiguous
+float32 file of shape (total_samples, 32). A small JSON index maps each
+(subject_id, trial, emotion) to its row offset and length, so readers can
+slice one recording as a zero-copy view without loading the whole corpus:
+
+    store = ChannelStore('eeg_channels.store')
+    signal = store.get(1, 1, 'Happy')      # (samples, 32) np.memmap view
+
+Layout of a store directory:
+    signals.f32   raw little-endian float32, row-major (samples, channels)
+    index.json    channel count, dtype and one entry per recording
+"""
+import os
+import json
+import numpy as np
+
+from data.dataset_io import CHANNEL_COLUMNS, N_CHANNELS
+
+SIGNALS_FILE = 'signals.f32'
+INDEX_FILE = 'index.json'
+STORE_DTYPE = np.dtype('<f4')
+STORE_EXTENSION = '.store'
+
+
+class ChannelStoreWriter:
+    """
+    Append recordings to a new channel store.
+
+    Each recording is converted to float32 and written straight to disk, so
+    memory use is bounded by one recording. The index is written on close().
+    A (subject_id, trial, emotion) key can be added only once.
+    """
+
+    def __init__(self, path, n_channels=N_CHANNELS):
+        self.path = path
+        self.n_channels = n_channels
+        self.entries = []
+        self.total_samples = 0
+        self._keys = set()
+        os.makedirs(path, exist_ok=True)
+        self._file = open(os.path.join(path, SIGNALS_FILE), 'wb')
+
+    def add(self, subject_id, trial, emotion, data, source=None):
+        data = np.ascontiguousarray(data, dtype=STORE_DTYPE)
+        if data.ndim != 2 or data.shape[1] != self.n_channels:
+            raise ValueError(f"Expected a (samples, {self.n_channels}) array, got {data.shape}.")
+        key = (int(subject_id), int(trial), emotion)
+        if key in self._keys:
+            raise ValueError(f"Duplicate recording for subject {subject_id}, trial {trial}, {emotion}.")
+        self._keys.add(key)
+
+        self._file.write(memoryview(data).cast('B'))
+        self.entries.append({
+            'subject_id': key[0],
+            'trial': key[1],
+            'emotion': emotion,
+            'offset': self.total_samples,
+            'length': int(data.shape[0]),
+            'source': source,
+        })
+        self.total_samples += data.shape[0]
+
+    @property
+    def rows(self):
+        return self.total_samples
+
+    @property
+    def recordings(self):
+        return len(self.entries)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        index = {
+            'n_channels': self.n_channels,
+            'dtype': STORE_DTYPE.str,
+            'channels': CHANNEL_COLUMNS[:self.n_channels],
+            'total_samples': self.total_samples,
+            'recordings': self.entries,
+        }
+        tmp_path = os.path.join(self.path, INDEX_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp_path, os.path.join(self.path, INDEX_FILE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ChannelStore:
+    """Read-only view of a channel store written by ChannelStoreWriter."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.n_channels = index['n_channels']
+        self.channels = index['channels']
+        self.recordings = index['recordings']
+        self._by_key = {
+            (r['subject_id'], r['trial'], r['emotion']): r for r in self.recordings
+        }
+
+        total = index['total_samples']
+        if total:
+            self.signals = np.memmap(
+                os.path.join(path, SIGNALS_FILE),
+                dtype=np.dtype(index['dtype']),
+                mode='r',
+                shape=(total, self.n_channels),
+            )
+        else:
+            self.signals = np.empty((0, self.n_channels), dtype=np.dtype(index['dtype']))
+
+    def __len__(self):
+        return len(self.recordings)
+
+    def keys(self):
+        return list(self._by_key)
+
+    def slice(self, entry):
+        """Zero-copy (samples, channels) view of one index entry."""
+        return self.signals[entry['offset']:entry['offset'] + entry['length']]
+
+    def get(self, subject_id, trial, emotion):
+        """Return the recording for (subject_id, trial, emotion) as a memmap view."""
+        try:
+            entry = self._by_key[(int(subject_id), int(trial), emotion)]
+        except KeyError:
+            raise KeyError(f"No recording for subject {subject_id}, trial {trial}, {emotion}.")
+        return self.slice(entry)
+
+    def select(self, subject_id=None, trial=None, emotion=None):
+        """Yield (entry, view) for every recording matching the given filters."""
+        for entry in self.recordings:
+            if subject_id is not None and entry['subject_id'] != int(subject_id):
+                continue
+            if trial is not None and entry['trial'] != int(trial):
+                continue
+            if emotion is not None and entry['emotion'] != emotion:
+                continue
+            yield entry, self.slice(entry)
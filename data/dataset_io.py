@@ -0,0 +1,321 @@
+"""
+Readers and writers for the combined EEG emotion dataset.
+
+Every output format produced by final_data_processing.py goes through this
+module, so writers and loaders share one schema:
+
+    subject_id  int32
+    emotion     category (Fear, Happy, Sad)
+    ch_1..ch_32 float32
+
+Supported formats:
+    csv      - single text file (the original output, kept as default)
+    parquet  - directory dataset partitioned by subject_id and emotion
+    feather  - single Arrow IPC file
+    npz      - float32 (samples, 32) matrix plus label vectors
+"""
+import os
+import shutil
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+# ------------------------------------------------------------
+# Schema
+# ------------------------------------------------------------
+N_CHANNELS = 32
+ID_COLUMNS = ['subject_id', 'emotion']
+CHANNEL_COLUMNS = [f'ch_{i+1}' for i in range(N_CHANNELS)]
+COLUMNS = ID_COLUMNS + CHANNEL_COLUMNS
+
+EMOTIONS = ['Fear', 'Happy', 'Sad']
+SUBJECT_DTYPE = np.int32
+CHANNEL_DTYPE = np.float32
+
+FORMATS = ('csv', 'parquet', 'feather', 'npz')
+FORMAT_EXTENSIONS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'npz': '.npz',
+}
+PARTITION_COLUMNS = ['subject_id', 'emotion']
+
+
+def output_path(name, fmt):
+    """Return `name` with the extension used for `fmt`."""
+    return name + FORMAT_EXTENSIONS[fmt]
+
+
+def infer_format(path):
+    """Guess the dataset format from a path's extension."""
+    ext = os.path.splitext(str(path).rstrip('/\\'))[1].lower()
+    for fmt, fmt_ext in FORMAT_EXTENSIONS.items():
+        if ext == fmt_ext:
+            return fmt
+    raise ValueError(f"Cannot infer dataset format from '{path}'. Expected one of {FORMATS}.")
+
+
+def apply_schema(df):
+    """Return `df` with the schema's column order and dtypes."""
+    df = df[COLUMNS]
+    return df.astype({
+        'subject_id': SUBJECT_DTYPE,
+        'emotion': pd.CategoricalDtype(EMOTIONS),
+        **{col: CHANNEL_DTYPE for col in CHANNEL_COLUMNS},
+    })
+
+
+def recording_frame(subject_id, emotion, data):
+    """Build the DataFrame for one (samples, 32) recording in schema column order."""
+    df = pd.DataFrame(data, columns=CHANNEL_COLUMNS)
+    df.insert(0, 'emotion', emotion)
+    df.insert(0, 'subject_id', subject_id)
+    return df
+
+
+# ------------------------------------------------------------
+# Writers
+# ------------------------------------------------------------
+def _remove_existing(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def write_dataset(df, path, fmt=None):
+    """
+    Write the combined dataset to `path` in the given format.
+
+    CSV keeps the original full-precision text output; the binary formats
+    store the schema dtypes (float32 channels).
+    """
+    fmt = fmt or infer_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown dataset format '{fmt}'. Expected one of {FORMATS}.")
+
+    _remove_existing(path)
+    if fmt == 'csv':
+        df[COLUMNS].to_csv(path, index=False)
+        return
+
+    df = apply_schema(df)
+    if fmt == 'parquet':
+        df.to_parquet(path, engine='pyarrow', partition_cols=PARTITION_COLUMNS, index=False)
+    elif fmt == 'feather':
+        df.reset_index(drop=True).to_feather(path)
+    elif fmt == 'npz':
+        np.savez(
+            path,
+            data=df[CHANNEL_COLUMNS].to_numpy(dtype=CHANNEL_DTYPE),
+            subject_id=df['subject_id'].to_numpy(dtype=SUBJECT_DTYPE),
+            emotion=df['emotion'].cat.codes.to_numpy(dtype=np.int8),
+            emotions=np.array(EMOTIONS),
+            channels=np.array(CHANNEL_COLUMNS),
+        )
+
+
+# ------------------------------------------------------------
+# Streaming sinks
+# ------------------------------------------------------------
+# Sinks receive one recording at a time and write it out immediately, so
+# building the dataset never holds more than one recording in memory. They
+# share the add(subject_id, trial, emotion, data, source) / close() interface
+# of channel_store.ChannelStoreWriter.
+class DatasetSink(ABC):
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self.recordings = 0
+        _remove_existing(path)
+
+    def add(self, subject_id, trial, emotion, data, source=None):
+        self._write(subject_id, emotion, data)
+        self.rows += len(data)
+        self.recordings += 1
+
+    @abstractmethod
+    def _write(self, subject_id, emotion, data):
+        """Write one (samples, 32) recording."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(DatasetSink):
+    """
+    Append each recording to one CSV file. The header is written on open, so
+    a run without recordings still leaves a readable (empty) dataset.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._file.write(','.join(COLUMNS) + '\n')
+
+    def _write(self, subject_id, emotion, data):
+        recording_frame(subject_id, emotion, data).to_csv(self._file, header=False, index=False)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink(DatasetSink):
+    """
+    Write each recording as its own file inside the subject_id=/emotion=
+    partition directory, giving the same layout as write_dataset.
+    """
+
+    def _write(self, subject_id, emotion, data):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        part_dir = os.path.join(self.path, f'subject_id={subject_id}', f'emotion={emotion}')
+        os.makedirs(part_dir, exist_ok=True)
+        columns = np.asfortranarray(data, dtype=CHANNEL_DTYPE)
+        table = pa.table({col: columns[:, i] for i, col in enumerate(CHANNEL_COLUMNS)})
+        pq.write_table(table, os.path.join(part_dir, f'part-{self.recordings:05d}.parquet'))
+
+
+class FeatherSink(DatasetSink):
+    """Write each recording as one record batch of a Feather (Arrow IPC) file."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        import pyarrow as pa
+
+        self._pa = pa
+        self._emotions = pa.array(EMOTIONS)
+        self._schema = pa.schema(
+            [('subject_id', pa.int32()), ('emotion', pa.dictionary(pa.int8(), pa.string()))]
+            + [(col, pa.float32()) for col in CHANNEL_COLUMNS]
+        )
+        self._writer = pa.ipc.new_file(path, self._schema)
+
+    def _write(self, subject_id, emotion, data):
+        pa = self._pa
+        n = len(data)
+        columns = np.asfortranarray(data, dtype=CHANNEL_DTYPE)
+        codes = np.full(n, EMOTIONS.index(emotion), dtype=np.int8)
+        arrays = [
+            pa.array(np.full(n, subject_id, dtype=SUBJECT_DTYPE)),
+            pa.DictionaryArray.from_arrays(pa.array(codes), self._emotions),
+        ] + [pa.array(columns[:, i]) for i in range(N_CHANNELS)]
+        self._writer.write_batch(pa.record_batch(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class NpzSink(DatasetSink):
+    """
+    Spool float32 samples to a temporary raw file, then pack the NPZ bundle
+    from a memmap of it on close. Labels are kept as run lengths per
+    recording and only expanded at the end.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._raw_path = path + '.tmp'
+        self._raw = open(self._raw_path, 'wb')
+        self._runs = []
+
+    def _write(self, subject_id, emotion, data):
+        data = np.ascontiguousarray(data, dtype=CHANNEL_DTYPE)
+        self._raw.write(memoryview(data).cast('B'))
+        self._runs.append((subject_id, EMOTIONS.index(emotion), len(data)))
+
+    def close(self):
+        self._raw.close()
+        lengths = [n for _, _, n in self._runs]
+        if self.rows:
+            data = np.memmap(self._raw_path, dtype=CHANNEL_DTYPE, mode='r',
+                             shape=(self.rows, N_CHANNELS))
+        else:
+            data = np.empty((0, N_CHANNELS), dtype=CHANNEL_DTYPE)
+        np.savez(
+            self.path,
+            data=data,
+            subject_id=np.repeat(np.array([r[0] for r in self._runs], dtype=SUBJECT_DTYPE), lengths),
+            emotion=np.repeat(np.array([r[1] for r in self._runs], dtype=np.int8), lengths),
+            emotions=np.array(EMOTIONS),
+            channels=np.array(CHANNEL_COLUMNS),
+        )
+        del data
+        os.remove(self._raw_path)
+
+
+SINKS = {
+    'csv': CsvSink,
+    'parquet': ParquetSink,
+    'feather': FeatherSink,
+    'npz': NpzSink,
+}
+
+
+def open_sink(path, fmt=None):
+    """Open a streaming sink that writes the dataset to `path` in `fmt`."""
+    fmt = fmt or infer_format(path)
+    if fmt not in SINKS:
+        raise ValueError(f"Unknown dataset format '{fmt}'. Expected one of {FORMATS}.")
+    return SINKS[fmt](path)
+
+
+# ------------------------------------------------------------
+# Loaders
+# ------------------------------------------------------------
+def load_npz_arrays(path):
+    """
+    Load an NPZ bundle as plain arrays: (data, subject_id, emotion_codes, emotions).
+    Avoids building a DataFrame when only the signal matrix is needed.
+    """
+    with np.load(path) as bundle:
+        return (
+            bundle['data'],
+            bundle['subject_id'],
+            bundle['emotion'],
+            list(bundle['emotions']),
+        )
+
+
+def load_dataset(path, fmt=None, columns=None):
+    """
+    Load the combined dataset written by `write_dataset` as a DataFrame
+    with the shared schema. `columns` optionally restricts the channels read
+    (identifier columns are always included).
+    """
+    fmt = fmt or infer_format(path)
+    wanted = COLUMNS if columns is None else ID_COLUMNS + [c for c in columns if c not in ID_COLUMNS]
+
+    if fmt == 'csv':
+        df = pd.read_csv(path, usecols=wanted)
+    elif fmt == 'parquet':
+        df = pd.read_parquet(path, engine='pyarrow', columns=wanted)
+        # Partition columns come back as categoricals of strings, with the
+        # categories in directory order
+        df['subject_id'] = df['subject_id'].astype(str)
+        df['emotion'] = df['emotion'].astype(str)
+    elif fmt == 'feather':
+        df = pd.read_feather(path, columns=wanted)
+    elif fmt == 'npz':
+        data, subject_id, codes, emotions = load_npz_arrays(path)
+        df = pd.DataFrame(data, columns=CHANNEL_COLUMNS)
+        df.insert(0, 'emotion', pd.Categorical.from_codes(codes, categories=emotions))
+        df.insert(0, 'subject_id', subject_id)
+    else:
+        raise ValueError(f"Unknown dataset format '{fmt}'. Expected one of {FORMATS}.")
+
+    df = df[wanted]
+    return df.astype({
+        'subject_id': SUBJECT_DTYPE,
+        'emotion': pd.CategoricalDtype(EMOTIONS),
+        **{col: CHANNEL_DTYPE for col in wanted if col in CHANNEL_COLUMNS},
+    })
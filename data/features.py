@@ -0,0 +1,355 @@
+"""
+Vectorized EEG feature extraction.
+
+A recording is a (samples, channels) array sampled at 128 Hz. It is split
+into overlapping windows with numpy stride tricks (a zero-copy view), and
+the spectra of all windows and channels are computed in one batched
+Welch/FFT call. Band powers are then a single matrix product of the PSD with
+a (frequencies, bands) integration matrix, so there are no per-window or
+per-channel Python loops:
+
+    windows = sliding_windows(signal, window=2 * 128, hop=128)   # (n, 32, 256)
+    powers = band_powers(signal, window_sec=2.0, hop_sec=1.0)    # (n, 32, 5)
+    df = band_power_frame(signal, window_sec=2.0, hop_sec=1.0)   # (n, 160)
+
+band_power_pyramid computes every window length of the feature files
+(1s ... 7.5s) in a single pass over the recording; see its docstring.
+
+Time-domain statistics (mean, variance, skewness, kurtosis, zero-crossing
+rate, Hjorth parameters, ...) come from prefix sums of x, x^2, x^3 and x^4,
+so they cost O(N) per recording whatever the window length:
+
+    stats = time_features(signal, window_sec=3.0)                # (n, 32, 10)
+    pyramid = time_feature_pyramid(signal, (1.0, 3.0, 7.5))
+"""
+import numpy as np
+import pandas as pd
+from scipy import signal as sps
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+
+from data.dataset_io import CHANNEL_COLUMNS
+
+SAMPLING_RATE = 128
+
+# Frequency bands in Hz; gamma stops at the 45 Hz edge of the FIR band-pass
+BANDS = {
+    'delta': (0.5, 4.0),
+    'theta': (4.0, 8.0),
+    'alpha': (8.0, 13.0),
+    'beta': (13.0, 30.0),
+    'gamma': (30.0, 45.0),
+}
+
+
+def window_params(window_sec, hop_sec=None, fs=SAMPLING_RATE):
+    """Convert a window length and hop in seconds to samples (hop defaults to the window)."""
+    window = int(round(window_sec * fs))
+    hop = window if hop_sec is None else int(round(hop_sec * fs))
+    if window < 1 or hop < 1:
+        raise ValueError("Window and hop must be at least one sample long.")
+    return window, hop
+
+
+def sliding_windows(signal, window, hop):
+    """
+    Zero-copy view of `signal` (samples, channels) as overlapping windows of
+    shape (n_windows, channels, window). Trailing samples that do not fill a
+    whole window are dropped.
+    """
+    signal = np.asarray(signal)
+    if signal.ndim == 1:
+        signal = signal[:, None]
+    if signal.shape[0] < window:
+        return np.empty((0, signal.shape[1], window), dtype=signal.dtype)
+    return np.lib.stride_tricks.sliding_window_view(signal, window, axis=0)[::hop]
+
+
+def band_matrix(freqs, bands=BANDS):
+    """
+    (n_freqs, n_bands) matrix that integrates a PSD over each band
+    (rectangle rule), so that band power = psd @ matrix.
+    """
+    df = freqs[1] - freqs[0] if len(freqs) > 1 else 1.0
+    matrix = np.zeros((len(freqs), len(bands)), dtype=np.float64)
+    for j, (low, high) in enumerate(bands.values()):
+        matrix[(freqs >= low) & (freqs < high), j] = df
+    return matrix
+
+
+def windows_psd(windows, fs=SAMPLING_RATE, method='welch', nperseg=None):
+    """
+    Power spectral density of every window and channel in one call.
+
+    windows: (..., window) array, typically from sliding_windows.
+    method:  'welch' averages Hann-windowed segments of `nperseg` samples
+             (default one second, 50% overlap); 'fft' is a single Hann
+             periodogram over the whole window.
+    Returns (freqs, psd) with psd shaped (..., n_freqs).
+    """
+    window = windows.shape[-1]
+    if method == 'welch':
+        nperseg = min(window, nperseg or fs)
+        return sps.welch(windows, fs=fs, window='hann', nperseg=nperseg, axis=-1)
+    if method == 'fft':
+        taper = sps.get_window('hann', window).astype(windows.dtype, copy=False)
+        spectrum = np.fft.rfft(windows * taper, axis=-1)
+        psd = (spectrum.real ** 2 + spectrum.imag ** 2) / (fs * np.sum(taper ** 2))
+        psd[..., 1:(window + 1) // 2] *= 2  # one-sided: fold negative frequencies
+        return np.fft.rfftfreq(window, d=1.0 / fs), psd
+    raise ValueError(f"Unknown PSD method '{method}'. Expected 'welch' or 'fft'.")
+
+
+def band_powers_from_psd(freqs, psd, bands=BANDS, relative=False):
+    """Integrate a (..., n_freqs) PSD into (..., n_bands) band powers."""
+    powers = psd @ band_matrix(freqs, bands).astype(psd.dtype, copy=False)
+    if relative:
+        total = powers.sum(axis=-1, keepdims=True)
+        powers = np.divide(powers, total, out=np.zeros_like(powers), where=total > 0)
+    return powers
+
+
+def band_powers(signal, window_sec=2.0, hop_sec=None, fs=SAMPLING_RATE, method='welch',
+                bands=BANDS, relative=False):
+    """
+    Band powers of every window of `signal` (samples, channels).
+    Returns an array of shape (n_windows, channels, n_bands).
+    """
+    window, hop = window_params(window_sec, hop_sec, fs)
+    windows = sliding_windows(signal, window, hop)
+    freqs, psd = windows_psd(windows, fs=fs, method=method)
+    return band_powers_from_psd(freqs, psd, bands, relative)
+
+
+def band_feature_columns(channels=CHANNEL_COLUMNS, bands=BANDS):
+    """Column names for flattened band powers, channel-major: ch_1_delta, ch_1_theta, ..."""
+    return [f'{ch}_{band}' for ch in channels for band in bands]
+
+
+def band_power_frame(signal, window_sec=2.0, hop_sec=None, fs=SAMPLING_RATE, method='welch',
+                     bands=BANDS, relative=False, channels=None):
+    """
+    Band power features as a DataFrame with one row per window and one
+    column per (channel, band), plus the window start time in seconds.
+    """
+    powers = band_powers(signal, window_sec, hop_sec, fs, method, bands, relative)
+    channels = channels or CHANNEL_COLUMNS[:powers.shape[1]]
+    df = pd.DataFrame(
+        powers.reshape(len(powers), -1),
+        columns=band_feature_columns(channels, bands),
+    )
+    _, hop = window_params(window_sec, hop_sec, fs)
+    df.insert(0, 'start_sec', np.arange(len(df)) * hop / fs)
+    return df
+
+
+# ------------------------------------------------------------
+# Multi-window pyramid
+# ------------------------------------------------------------
+# Window lengths of the feature files (Fear1s.csv ... Fear7.5s.csv)
+PYRAMID_WINDOWS = (1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.5)
+
+
+def _segment_band_powers(signal, fs, bands, nperseg):
+    """Band powers of every Welch segment (nperseg long, 50% overlap) of the recording."""
+    seg_hop = nperseg // 2
+    segments = sliding_windows(signal, nperseg, seg_hop)
+    freqs, psd = windows_psd(segments, fs=fs, method='welch', nperseg=nperseg)
+    return band_powers_from_psd(freqs, psd, bands), seg_hop
+
+
+def band_power_pyramid(signal, windows_sec=PYRAMID_WINDOWS, hop_sec=None, fs=SAMPLING_RATE,
+                       bands=BANDS, relative=False):
+    """
+    Welch band powers for several window lengths in one pass.
+
+    The Welch PSD of a window is the mean periodogram of its 50%-overlapping
+    one-second segments, and band integration is linear, so the band powers
+    of any window are the mean of its segments' band powers. The segment
+    spectra are therefore computed once for the whole recording, and every
+    window length is a difference of one cumulative sum over segments. The
+    cost of adding a scale is O(n_windows), independent of its length, and
+    each result equals band_powers(..., method='welch') for that window.
+
+    Window lengths and hops must be multiples of the segment hop (0.5 s at
+    128 Hz); `hop_sec` defaults to each window's own length. Returns a dict
+    {window_sec: (n_windows, channels, n_bands) array}.
+    """
+    nperseg = fs
+    seg_powers, seg_hop = _segment_band_powers(signal, fs, bands, nperseg)
+    cumsum = np.concatenate(
+        [np.zeros((1,) + seg_powers.shape[1:], dtype=np.float64),
+         np.cumsum(seg_powers, axis=0, dtype=np.float64)]
+    )
+
+    pyramid = {}
+    for window_sec in windows_sec:
+        window, hop = window_params(window_sec, hop_sec if hop_sec is not None else window_sec, fs)
+        if window < nperseg or (window - nperseg) % seg_hop or hop % seg_hop:
+            raise ValueError(
+                f"Window {window_sec}s / hop {hop_sec or window_sec}s must be at least "
+                f"{nperseg / fs:g}s and multiples of {seg_hop / fs:g}s."
+            )
+        n_segments = (window - nperseg) // seg_hop + 1
+        step = hop // seg_hop
+        starts = np.arange(0, len(seg_powers) - n_segments + 1, step)
+        powers = (cumsum[starts + n_segments] - cumsum[starts]) / n_segments
+        powers = powers.astype(seg_powers.dtype, copy=False)
+        if relative:
+            total = powers.sum(axis=-1, keepdims=True)
+            powers = np.divide(powers, total, out=np.zeros_like(powers), where=total > 0)
+        pyramid[window_sec] = powers
+    return pyramid
+
+
+def band_power_pyramid_frames(signal, windows_sec=PYRAMID_WINDOWS, hop_sec=None,
+                              fs=SAMPLING_RATE, bands=BANDS, relative=False, channels=None):
+    """band_power_pyramid as a dict {window_sec: DataFrame} laid out like band_power_frame."""
+    pyramid = band_power_pyramid(signal, windows_sec, hop_sec, fs, bands, relative)
+    frames = {}
+    for window_sec, powers in pyramid.items():
+        channels = channels or CHANNEL_COLUMNS[:powers.shape[1]]
+        df = pd.DataFrame(
+            powers.reshape(len(powers), -1),
+            columns=band_feature_columns(channels, bands),
+        )
+        _, hop = window_params(window_sec, hop_sec if hop_sec is not None else window_sec, fs)
+        df.insert(0, 'start_sec', np.arange(len(df)) * hop / fs)
+        frames[window_sec] = df
+    return frames
+
+
+# ------------------------------------------------------------
+# Time-domain statistics
+# ------------------------------------------------------------
+# Per-channel statistics of the MATLAB featureextract*.m scripts that can be
+# computed from running sums (the median needs a sort and is left out)
+TIME_FEATURES = [
+    'mean', 'variance', 'std', 'skewness', 'kurtosis', 'zero_crossing_rate',
+    'peak_to_peak', 'hjorth_activity', 'hjorth_mobility', 'hjorth_complexity',
+]
+
+
+def _prefix(values):
+    """Cumulative sum along the sample axis with a leading row of zeros."""
+    out = np.zeros((values.shape[0] + 1,) + values.shape[1:], dtype=np.float64)
+    np.cumsum(values, axis=0, dtype=np.float64, out=out[1:])
+    return out
+
+
+class _TimePrefixSums:
+    """
+    Prefix sums shared by every window length of one recording.
+
+    The signal is centred on its per-channel mean first so that the power
+    sums do not lose precision to a large DC offset; the offset is added
+    back to the window means.
+    """
+
+    def __init__(self, signal):
+        x = np.asarray(signal, dtype=np.float64)
+        if x.ndim == 1:
+            x = x[:, None]
+        self.x = x
+        self.n_samples = x.shape[0]
+        self.offset = x.mean(axis=0)
+        y = x - self.offset
+        y2 = y * y
+        self.s1, self.s2, self.s3, self.s4 = _prefix(y), _prefix(y2), _prefix(y2 * y), _prefix(y2 * y2)
+
+        dx = np.diff(x, axis=0)
+        ddx = np.diff(dx, axis=0)
+        self.d1, self.d2 = _prefix(dx), _prefix(dx * dx)
+        self.dd1, self.dd2 = _prefix(ddx), _prefix(ddx * ddx)
+        # Sign changes between consecutive samples
+        self.zc = _prefix(np.signbit(x[1:]) != np.signbit(x[:-1]))
+
+    @staticmethod
+    def _sum(prefix, starts, length):
+        return prefix[starts + length] - prefix[starts]
+
+    def _variance(self, p1, p2, starts, length):
+        # Sample variance (ddof=1, as MATLAB var) from a sum and a sum of squares
+        s1, s2 = self._sum(p1, starts, length), self._sum(p2, starts, length)
+        return np.maximum(s2 - s1 * s1 / length, 0.0) / max(length - 1, 1)
+
+    def stats(self, window, hop):
+        """(n_windows, channels, len(TIME_FEATURES)) statistics for one window length."""
+        if window < 3:
+            raise ValueError("Time-domain features need windows of at least 3 samples.")
+        starts = np.arange(0, self.n_samples - window + 1, hop)
+        n = float(window)
+
+        m1 = self._sum(self.s1, starts, window) / n
+        r2 = self._sum(self.s2, starts, window) / n
+        r3 = self._sum(self.s3, starts, window) / n
+        r4 = self._sum(self.s4, starts, window) / n
+        # Central moments from raw moments of the centred signal
+        c2 = np.maximum(r2 - m1 ** 2, 0.0)
+        c3 = r3 - 3 * m1 * r2 + 2 * m1 ** 3
+        c4 = r4 - 4 * m1 * r3 + 6 * m1 ** 2 * r2 - 3 * m1 ** 4
+
+        variance = c2 * n / (n - 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            skewness = np.where(c2 > 0, c3 / c2 ** 1.5, 0.0)
+            kurtosis = np.where(c2 > 0, c4 / c2 ** 2, 0.0)
+
+            var_dx = self._variance(self.d1, self.d2, starts, window - 1)
+            var_ddx = self._variance(self.dd1, self.dd2, starts, window - 2)
+            mobility = np.where(variance > 0, np.sqrt(var_dx / variance), 0.0)
+            mobility_dx = np.where(var_dx > 0, np.sqrt(var_ddx / var_dx), 0.0)
+            complexity = np.where(mobility > 0, mobility_dx / mobility, 0.0)
+
+        zcr = self._sum(self.zc, starts, window - 1) / n
+
+        # Sliding max/min filters are O(N) regardless of the window length; the
+        # filter centred on sample s + window // 2 covers exactly [s, s + window)
+        centre = starts + window // 2
+        peak_to_peak = (
+            maximum_filter1d(self.x, window, axis=0)[centre]
+            - minimum_filter1d(self.x, window, axis=0)[centre]
+        )
+
+        return np.stack([
+            m1 + self.offset, variance, np.sqrt(variance), skewness, kurtosis, zcr,
+            peak_to_peak, variance, mobility, complexity,
+        ], axis=-1)
+
+
+def time_features(signal, window_sec=2.0, hop_sec=None, fs=SAMPLING_RATE):
+    """
+    Time-domain statistics of every window of `signal` (samples, channels).
+    Returns an array of shape (n_windows, channels, len(TIME_FEATURES)).
+    """
+    window, hop = window_params(window_sec, hop_sec, fs)
+    return _TimePrefixSums(signal).stats(window, hop)
+
+
+def time_feature_pyramid(signal, windows_sec=PYRAMID_WINDOWS, hop_sec=None, fs=SAMPLING_RATE):
+    """
+    time_features for several window lengths, sharing one set of prefix sums.
+    `hop_sec` defaults to each window's own length. Returns {window_sec: array}.
+    """
+    sums = _TimePrefixSums(signal)
+    pyramid = {}
+    for window_sec in windows_sec:
+        window, hop = window_params(window_sec, hop_sec if hop_sec is not None else window_sec, fs)
+        pyramid[window_sec] = sums.stats(window, hop)
+    return pyramid
+
+
+def time_feature_columns(channels=CHANNEL_COLUMNS, features=TIME_FEATURES):
+    """Column names for flattened time features, channel-major: ch_1_mean, ch_1_variance, ..."""
+    return [f'{ch}_{feature}' for ch in channels for feature in features]
+
+
+def time_feature_pyramid_frames(signal, windows_sec=PYRAMID_WINDOWS, hop_sec=None,
+                                fs=SAMPLING_RATE, channels=None):
+    """time_feature_pyramid as a dict {window_sec: DataFrame} laid out like band_power_frame."""
+    frames = {}
+    for window_sec, stats in time_feature_pyramid(signal, windows_sec, hop_sec, fs).items():
+        channels = channels or CHANNEL_COLUMNS[:stats.shape[1]]
+        df = pd.DataFrame(stats.reshape(len(stats), -1), columns=time_feature_columns(channels))
+        _, hop = window_params(window_sec, hop_sec if hop_sec is not None else window_sec, fs)
+        df.insert(0, 'start_sec', np.arange(len(df)) * hop / fs)
+        frames[window_sec] = df
+    return frames
@@ -1,8 +1,22 @@
 import os
-import pandas as pd
 import scipy.io as sio
 import numpy as np
 import re
+import sys
+import argparse
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Make the repository root importable when run as `python data/final_data_processing.py`
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from data.dataset_io import FORMATS, N_CHANNELS, infer_format, open_sink, output_path
+from data.channel_store import STORE_EXTENSION, ChannelStoreWriter
+from data.manifest import SEGMENTS_EXTENSION, Manifest
+from data.preprocessing import preprocess as preprocess_signal
 
 # ------------------------------------------------------------
 # Configuration Section
@@ -14,127 +28,400 @@ DATA_DIR = 'raw_data_folder'  # Example: 'Clean_Cliped'
 # If None, the script will automatically detect it from the first file
 MAT_VARIABLE_NAME = None
 
-# ------------------------------------------------------------
-# Main Script
-# ------------------------------------------------------------
-print("Starting EEG data processing...")
+# Number of worker processes used to load the .mat files
+# None = one worker per CPU core, 1 = load files sequentially in this process
+NUM_WORKERS = None
 
-# This list will hold the processed DataFrames for each file
-all_data_list = []
+# Output format of the combined dataset: 'csv', 'parquet', 'feather' or 'npz'
+# (see data/dataset_io.py for the shared schema), or 'memmap' to write the
+# raw recordings into a memory-mapped channel store (see data/channel_store.py)
+OUTPUT_FORMAT = 'csv'
 
-# ------------------------------------------------------------
-# Step 1: Collect all .mat files from the specified directory
-# ------------------------------------------------------------
-try:
-    file_list = [f for f in os.listdir(DATA_DIR) if f.endswith('.mat')]
-    if not file_list:
-        print(f"Error: No .mat files found in '{DATA_DIR}'. Please check the path.")
-        exit()
-except FileNotFoundError:
-    print(f"Error: The directory '{DATA_DIR}' was not found. Please check the path.")
-    exit()
+# Output file name, without extension
+OUTPUT_NAME = 'eeg_emotion_dataset'
+
+# Only load new or changed .mat files and rebuild the output from cached
+# per-file segments (see data/manifest.py)
+INCREMENTAL = False
+
+# Run the fircode.m preprocessing chain (FIR band-pass + Savitzky-Golay trend
+# removal, see data/preprocessing.py) on every recording inside the workers
+PREPROCESS = False
+
+# Also apply wavelet denoising when preprocessing (needs PyWavelets)
+WAVELET_DENOISE = False
+
+# Run ICA before filtering, like runica in fircode.m (see data/ica.py)
+ICA = False
+
+# Directory caching each recording's ICA unmixing matrices by content hash
+ICA_CACHE_DIR = 'ica_cache'
+
+# Start each ICA fit from the previous recording's unmixing matrix
+ICA_WARM_START = False
+
+# Map emotion code to descriptive label
+EMOTION_MAP = {'H': 'Happy', 'S': 'Sad', 'F': 'Fear'}
 
-print(f"Found {len(file_list)} files to process.")
 
 # ------------------------------------------------------------
-# Step 2: Process each EEG file
+# Helpers
 # ------------------------------------------------------------
-for i, filename in enumerate(file_list):
-    print(f"Processing file {i+1}/{len(file_list)}: {filename}")
-
-    # --------------------------------------------------------
-    # Extract subject ID and emotion label from the filename
-    # The pattern assumes filenames like 'sub01t1H.mat' where:
-    #   H = Happy, S = Sad, F = Fear
-    # --------------------------------------------------------
-    match = re.search(r'sub(\d+)t\d+([HSF])', filename)
+def parse_filename(filename):
+    """
+    Extract subject ID, trial number and emotion label from the filename.
+    The pattern assumes filenames like 'sub01t1H.mat' where:
+      H = Happy, S = Sad, F = Fear
+    Returns None if the filename does not follow the pattern.
+    """
+    match = re.search(r'sub(\d+)t(\d+)([HSF])', filename)
     if not match:
-        print(f"  - Warning: Could not parse subject and emotion from '{filename}'. Skipping.")
-        continue
-
+        return None
     subject_id = int(match.group(1))
-    emotion_code = match.group(2)
+    trial = int(match.group(2))
+    emotion = EMOTION_MAP.get(match.group(3), 'Unknown')
+    return subject_id, trial, emotion
 
-    # Map emotion code to descriptive label
-    emotion_map = {'H': 'Happy', 'S': 'Sad', 'F': 'Fear'}
-    emotion = emotion_map.get(emotion_code, 'Unknown')
 
-    # --------------------------------------------------------
-    # Load the .mat file
-    # --------------------------------------------------------
-    file_path = os.path.join(DATA_DIR, filename)
+def detect_variable_name(file_path):
+    """
+    Auto-detect the EEG data variable as the largest multi-dimensional array.
+    Uses sio.whosmat so only the variable headers are read, not the data.
+    """
+    best_key = None
+    max_size = 0
+    for key, shape, _ in sio.whosmat(file_path):
+        if len(shape) > 1:
+            size = int(np.prod(shape))
+            if size > max_size:
+                max_size = size
+                best_key = key
+    return best_key
+
+
+def find_variable_name(file_paths):
+    """Detect the EEG variable from the first file that can be inspected."""
+    for file_path in file_paths:
+        try:
+            return detect_variable_name(file_path)
+        except Exception:
+            continue
+    return None
+
+
+def load_recording(file_path, variable_name, preprocess=None):
+    """
+    Load, validate and reshape one .mat recording. If `preprocess` is a dict,
+    the recording is also filtered with data.preprocessing.preprocess(**preprocess).
+
+    Runs inside the worker processes, so it never prints: it returns
+    (record, message) where exactly one of the two is None. `record` is a
+    dict with subject_id, trial, emotion and a (samples, N_CHANNELS) array;
+    `message` is the skip reason reported by the main process.
+    """
+    filename = os.path.basename(file_path)
+    parsed = parse_filename(filename)
+    if parsed is None:
+        return None, f"  - Warning: Could not parse subject and emotion from '{filename}'. Skipping."
+    subject_id, trial, emotion = parsed
+
     try:
         mat_contents = sio.loadmat(file_path)
     except Exception as e:
-        print(f"  - Error loading file {filename}: {e}. Skipping.")
-        continue
+        return None, f"  - Error loading file {filename}: {e}. Skipping."
 
-    # --------------------------------------------------------
-    # Identify the EEG data variable
-    # If MAT_VARIABLE_NAME is None, auto-detect it based on size
-    # --------------------------------------------------------
-    if MAT_VARIABLE_NAME is None:
-        best_key = None
-        max_size = 0
-        for key, value in mat_contents.items():
-            if isinstance(value, np.ndarray) and value.ndim > 1:
-                if value.size > max_size:
-                    max_size = value.size
-                    best_key = key
-
-        if best_key:
-            MAT_VARIABLE_NAME = best_key
-            print(f"Auto-detected EEG data variable as: '{MAT_VARIABLE_NAME}'")
-        else:
-            print(f"Error: Could not automatically find the data variable in {filename}.")
-            print("Please inspect the .mat file and set 'MAT_VARIABLE_NAME' manually.")
-            print("Variables found:", list(mat_contents.keys()))
-            exit()
+    if variable_name not in mat_contents:
+        return None, (
+            f"  - Error: Variable '{variable_name}' not found in {filename}. Skipping.\n"
+            f"    Available variables: {list(mat_contents.keys())}"
+        )
 
-    if MAT_VARIABLE_NAME not in mat_contents:
-        print(f"  - Error: Variable '{MAT_VARIABLE_NAME}' not found in {filename}. Skipping.")
-        print(f"    Available variables: {list(mat_contents.keys())}")
-        continue
+    eeg_data = mat_contents[variable_name]
+
+    # The dataset is expected to have 32 channels (columns)
+    if eeg_data.shape[0] == N_CHANNELS:
+        eeg_data = eeg_data.T  # Transpose if channels are in rows
+
+    if eeg_data.ndim != 2 or eeg_data.shape[1] != N_CHANNELS:
+        return None, (
+            f"  - Warning: Expected {N_CHANNELS} channels, but found {eeg_data.shape[-1]} "
+            f"in {filename}. Skipping."
+        )
+
+    if preprocess is not None:
+        eeg_data = preprocess_signal(eeg_data, **preprocess)
+
+    record = {
+        'subject_id': subject_id,
+        'trial': trial,
+        'emotion': emotion,
+        'data': np.ascontiguousarray(eeg_data),
+    }
+    return record, None
+
+
+def _load_recording_task(args):
+    # Worker entry point: a top-level function so it can be pickled.
+    # Any unexpected exception is turned into a skip message instead of
+    # aborting the whole pool.
+    file_path, variable_name, preprocess = args
+    try:
+        return load_recording(file_path, variable_name, preprocess)
+    except Exception as e:
+        filename = os.path.basename(file_path)
+        return None, f"  - Error processing file {filename}: {e}. Skipping."
 
-    eeg_data = mat_contents[MAT_VARIABLE_NAME]
+
+def iter_recordings(file_paths, variable_name, num_workers=None, preprocess=None):
+    """
+    Yield (file_path, record, message) for every file, in the order given.
+    `preprocess` is passed on to load_recording.
+
+    With num_workers == 1 the files are loaded in this process; otherwise a
+    process pool loads them concurrently. Results are always returned in
+    file order so the output dataset is deterministic.
+
+    At most two files per worker are in flight at any time, so a slow
+    consumer never makes finished recordings pile up in memory.
+    """
+    tasks = [(path, variable_name, preprocess) for path in file_paths]
+    if num_workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            record, message = _load_recording_task(task)
+            yield task[0], record, message
+        return
+
+    num_workers = num_workers or os.cpu_count() or 1
+    max_pending = 2 * num_workers
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append((task[0], executor.submit(_load_recording_task, task)))
+            if len(pending) >= max_pending:
+                file_path, future = pending.popleft()
+                yield (file_path, *future.result())
+        while pending:
+            file_path, future = pending.popleft()
+            yield (file_path, *future.result())
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process and of its (finished) worker
+    processes, in MB. Returns (None, None) where it cannot be measured.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2**20, None
+        except Exception:
+            return None, None
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 2**20
+    return own, children
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Combine raw EEG .mat files into one dataset.")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Directory with the raw .mat files.")
+    parser.add_argument('--variable', default=MAT_VARIABLE_NAME,
+                        help="EEG variable inside the .mat files (auto-detected if omitted).")
+    parser.add_argument('--workers', type=int, default=NUM_WORKERS,
+                        help="Worker processes (default: number of CPU cores, 1 = sequential).")
+    parser.add_argument('--format', default=None, choices=FORMATS + ('memmap',),
+                        help="Output format of the combined dataset "
+                             "(default: from the --output extension, else OUTPUT_FORMAT).")
+    parser.add_argument('--output', default=None,
+                        help="Output path (default: OUTPUT_NAME plus the format's extension).")
+    parser.add_argument('--incremental', action=argparse.BooleanOptionalAction, default=INCREMENTAL,
+                        help="Only process new or changed files, reusing cached segments.")
+    parser.add_argument('--preprocess', action=argparse.BooleanOptionalAction, default=PREPROCESS,
+                        help="Apply the FIR band-pass and Savitzky-Golay trend removal.")
+    parser.add_argument('--wavelet', action=argparse.BooleanOptionalAction, default=WAVELET_DENOISE,
+                        help="Also apply wavelet denoising when preprocessing.")
+    parser.add_argument('--ica', action=argparse.BooleanOptionalAction, default=ICA,
+                        help="Run ICA before filtering when preprocessing.")
+    parser.add_argument('--ica-cache', default=ICA_CACHE_DIR,
+                        help="Directory caching the fitted ICA matrices.")
+    parser.add_argument('--ica-warm-start', action=argparse.BooleanOptionalAction, default=ICA_WARM_START,
+                        help="Warm-start each ICA fit from the previous one.")
+    args = parser.parse_args()
+    try:
+        args.format, args.output = resolve_output(args.format, args.output)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def resolve_output(output_format, output):
+    """
+    (format, path) of the output. Without a format, it is inferred from the
+    path's extension (OUTPUT_FORMAT if there is none); a path whose extension
+    contradicts an explicit format is an error rather than a mislabeled file.
+    """
+    ext = os.path.splitext(output.rstrip('/\\'))[1].lower() if output else ''
+    if ext:
+        inferred = 'memmap' if ext == STORE_EXTENSION else infer_format(output)
+        if output_format is not None and output_format != inferred:
+            raise ValueError(f"--output '{output}' has the extension of {inferred}, "
+                             f"but --format is {output_format}.")
+        output_format = inferred
+    output_format = output_format or OUTPUT_FORMAT
+    if output is None:
+        output = OUTPUT_NAME + STORE_EXTENSION if output_format == 'memmap' else output_path(OUTPUT_NAME, output_format)
+    return output_format, output
+
+
+def open_output(output_filename, output_format):
+    if output_format == 'memmap':
+        return ChannelStoreWriter(output_filename)
+    return open_sink(output_filename, output_format)
+
+
+def build_full(file_paths, variable_name, num_workers, output_filename, output_format,
+               preprocess=None):
+    """
+    Load every file and stream it to the output sink as soon as it arrives,
+    so memory is bounded by the recordings in flight rather than the corpus.
+    """
+    sink = open_output(output_filename, output_format)
+    with sink:
+        results = iter_recordings(file_paths, variable_name, num_workers, preprocess)
+        for i, (file_path, record, message) in enumerate(results):
+            print(f"Processing file {i+1}/{len(file_paths)}: {os.path.basename(file_path)}")
+            if record is None:
+                print(message)
+                continue
+
+            sink.add(record['subject_id'], record['trial'], record['emotion'], record['data'],
+                     source=os.path.basename(file_path))
+    return sink
+
+
+def build_incremental(file_paths, variable_name, num_workers, output_filename, output_format,
+                      preprocess=None):
+    """
+    Load only new or changed files into the segment cache, drop segments of
+    deleted files, then rebuild the output from the cached segments.
+    Returns None if the existing output is already up to date.
+    """
+    segment_dir = os.path.splitext(output_filename)[0] + SEGMENTS_EXTENSION
+    settings = {'variable_name': variable_name, 'preprocess': preprocess}
+    manifest = Manifest.load(segment_dir, settings)
+    unchanged, changed, deleted = manifest.plan(file_paths)
+    print(f"Incremental mode: {len(unchanged)} unchanged, {len(changed)} new or changed, "
+          f"{len(deleted)} deleted.")
+
+    for filename in deleted:
+        print(f"  - Removing '{filename}' (source file was deleted).")
+        manifest.remove(filename)
+
+    results = iter_recordings(changed, variable_name, num_workers, preprocess)
+    for i, (file_path, record, message) in enumerate(results):
+        print(f"Processing file {i+1}/{len(changed)}: {os.path.basename(file_path)}")
+        if record is None:
+            print(message)
+            # A file that no longer loads must not keep its old rows
+            manifest.remove(os.path.basename(file_path))
+            continue
+        manifest.add(file_path, record)
+    manifest.save()
+
+    if manifest.output_is_current(output_filename, output_format):
+        print(f"'{output_filename}' is up to date. Nothing to rebuild.")
+        return None
+
+    print(f"Rebuilding '{output_filename}' from {len(manifest.entries)} cached segments...")
+    sink = open_output(output_filename, output_format)
+    with sink:
+        for filename, entry, signal in manifest.iter_segments():
+            sink.add(entry['subject_id'], entry['trial'], entry['emotion'], signal, source=filename)
+    manifest.mark_output(output_filename, output_format)
+    manifest.save()
+    return sink
+
+
+# ------------------------------------------------------------
+# Main Script
+# ------------------------------------------------------------
+def main():
+    args = parse_args()
+    data_dir = args.data_dir
+    variable_name = args.variable
+    num_workers = args.workers or os.cpu_count() or 1
+    output_format, output_filename = args.format, args.output
+
+    print("Starting EEG data processing...")
 
     # --------------------------------------------------------
-    # Ensure the EEG data format is consistent
-    # The dataset is expected to have 32 channels (columns)
+    # Step 1: Collect all .mat files from the specified directory
+    # Sorted so that the output order does not depend on the filesystem
     # --------------------------------------------------------
-    if eeg_data.shape[0] == 32:
-        eeg_data = eeg_data.T  # Transpose if channels are in rows
+    try:
+        file_list = sorted(f for f in os.listdir(data_dir) if f.endswith('.mat'))
+        if not file_list:
+            print(f"Error: No .mat files found in '{data_dir}'. Please check the path.")
+            return
+    except FileNotFoundError:
+        print(f"Error: The directory '{data_dir}' was not found. Please check the path.")
+        return
 
-    if eeg_data.shape[1] != 32:
-        print(f"  - Warning: Expected 32 channels, but found {eeg_data.shape[1]} in {filename}. Skipping.")
-        continue
+    print(f"Found {len(file_list)} files to process.")
+    file_paths = [os.path.join(data_dir, f) for f in file_list]
 
     # --------------------------------------------------------
-    # Create a DataFrame for the current subject
-    # Each column represents one EEG channel
+    # Identify the EEG data variable
+    # If no variable name is given, auto-detect it based on size
     # --------------------------------------------------------
-    temp_df = pd.DataFrame(eeg_data, columns=[f'ch_{i+1}' for i in range(32)])
-    temp_df['subject_id'] = subject_id
-    temp_df['emotion'] = emotion
+    if variable_name is None:
+        variable_name = find_variable_name(file_paths)
+        if variable_name:
+            print(f"Auto-detected EEG data variable as: '{variable_name}'")
+        else:
+            print("Error: Could not automatically find the data variable in the .mat files.")
+            print("Please inspect the .mat file and set 'MAT_VARIABLE_NAME' manually.")
+            return
 
-    all_data_list.append(temp_df)
+    # --------------------------------------------------------
+    # Step 2 + 3: Process each EEG file and stream it to the output
+    # Files are loaded, validated and reshaped in worker processes;
+    # skip messages are reported here in file order. Each recording is
+    # appended to the output sink as soon as it arrives, so memory is
+    # bounded by the recordings in flight rather than the whole corpus.
+    # --------------------------------------------------------
+    print(f"Loading files with {num_workers} worker(s)...")
 
-# ------------------------------------------------------------
-# Step 3: Combine all subject data and save as a CSV file
-# ------------------------------------------------------------
-if all_data_list:
-    print("Combining all dataframes into a single dataset...")
+    build = build_incremental if args.incremental else build_full
+    preprocess = None
+    if args.preprocess:
+        preprocess = {'wavelet': args.wavelet}
+        if args.ica:
+            preprocess.update(ica=True, ica_cache=args.ica_cache, ica_warm_start=args.ica_warm_start)
+        print(f"Preprocessing: {'ICA, ' if args.ica else ''}FIR band-pass, Savitzky-Golay trend removal"
+              f"{', wavelet denoising' if args.wavelet else ''}.")
+    sink = build(file_paths, variable_name, num_workers, output_filename, output_format, preprocess)
 
-    final_df = pd.concat(all_data_list, ignore_index=True)
+    if sink is None:
+        pass
+    elif sink.recordings:
+        print(f"Success! {sink.recordings} recordings saved to '{output_filename}' ({output_format}).")
+        n_columns = N_CHANNELS if output_format == 'memmap' else N_CHANNELS + 2
+        print("Final dataset shape:", (sink.rows, n_columns))
+    else:
+        print("No data was processed. The output contains no recordings.")
 
-    # Reorder columns so identifiers appear first
-    cols = ['subject_id', 'emotion'] + [f'ch_{i+1}' for i in range(32)]
-    final_df = final_df[cols]
+    own_rss, worker_rss = peak_rss_mb()
+    if own_rss is not None:
+        report = f"Peak RSS: {own_rss:.1f} MB"
+        if worker_rss and num_workers > 1:
+            report += f" (largest worker: {worker_rss:.1f} MB)"
+        print(report)
 
-    output_filename = 'eeg_emotion_dataset.csv'
-    final_df.to_csv(output_filename, index=False)
 
-    print(f"Success! Combined data saved to '{output_filename}'.")
-    print("Final dataset shape:", final_df.shape)
-else:
-    print("No data was processed. The final CSV file was not created.")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+ICA stage of the preprocessing chain (data/interim/fircode.m).
+
+fircode.m runs `[weights, sphere] = runica(EEGdata, 'extended', 1)` on every
+32 x N recording and keeps `ICs = weights * EEGdata`. Here each recording is
+decomposed with scikit-learn's FastICA and the result is stored as an EEGLAB
+style pair of matrices: `sphere` (the whitening matrix) and `weights` (the
+rotation in whitened space). Their product is the unmixing matrix, so the
+components of a (samples, channels) signal are one matrix multiply:
+
+    model = fit_ica(signal)
+    components = model.transform(signal)     # signal @ (weights @ sphere).T
+
+ICACache keeps fitted models on disk keyed by a hash of the recording's
+content and the fit settings, so re-running the pipeline (or online
+inference on a known recording) never refits:
+
+    cache = ICACache('ica_cache')
+    model = cache.fit(signal)                 # fitted once, loaded afterwards
+"""
+import os
+import hashlib
+import warnings
+
+import numpy as np
+from sklearn.decomposition import FastICA
+from sklearn.exceptions import ConvergenceWarning
+
+ICA_MAX_ITER = 400
+ICA_TOL = 1e-4
+ICA_RANDOM_STATE = 0
+ICA_CACHE_VERSION = 1
+
+
+class ICAModel:
+    """Unmixing of one recording: `sphere` (whitening) and `weights` (rotation)."""
+
+    def __init__(self, weights, sphere, mean, n_iter=None):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.sphere = np.asarray(sphere, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.n_iter = n_iter
+        self.unmixing = self.weights @ self.sphere
+
+    @property
+    def n_components(self):
+        return self.unmixing.shape[0]
+
+    def transform(self, signal):
+        """
+        Components of a (samples, channels) signal, like `weights * EEGdata`
+        in fircode.m. The channel means are not removed; the FIR high-pass
+        that follows takes out the constant offset.
+        """
+        signal = np.asarray(signal)
+        dtype = signal.dtype if np.issubdtype(signal.dtype, np.floating) else np.float64
+        return (signal @ self.unmixing.T.astype(dtype, copy=False)).astype(dtype, copy=False)
+
+    def save(self, path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, weights=self.weights, sphere=self.sphere, mean=self.mean,
+                     n_iter=-1 if self.n_iter is None else self.n_iter)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            n_iter = int(saved['n_iter'])
+            return cls(saved['weights'], saved['sphere'], saved['mean'], None if n_iter < 0 else n_iter)
+
+
+def fit_ica(signal, init_weights=None, max_iter=ICA_MAX_ITER, tol=ICA_TOL, random_state=ICA_RANDOM_STATE):
+    """
+    Fit ICA to a (samples, channels) signal and return an ICAModel.
+
+    `init_weights` warm-starts the fit from an earlier rotation (e.g. the
+    model of the same subject before more samples were appended), which
+    usually converges in a fraction of the iterations of a random start.
+    """
+    x = np.asarray(signal, dtype=np.float64)
+    ica = FastICA(
+        whiten='unit-variance',
+        w_init=None if init_weights is None else np.asarray(init_weights, dtype=np.float64),
+        max_iter=max_iter,
+        tol=tol,
+        random_state=random_state,
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        ica.fit(x)
+    # components_ = weights @ sphere; whitening_ already includes the
+    # unit-variance scaling, so the rotation is recovered from the pair.
+    sphere = ica.whitening_
+    weights = ica.components_ @ np.linalg.pinv(sphere)
+    return ICAModel(weights, sphere, ica.mean_, ica.n_iter_)
+
+
+def signal_key(signal, max_iter=ICA_MAX_ITER, tol=ICA_TOL, random_state=ICA_RANDOM_STATE):
+    """Cache key: SHA-256 of the signal's values and shape plus the fit settings."""
+    x = np.ascontiguousarray(signal, dtype=np.float64)
+    digest = hashlib.sha256()
+    digest.update(f"v{ICA_CACHE_VERSION}:{x.shape}:{max_iter}:{tol}:{random_state}\n".encode('utf-8'))
+    digest.update(memoryview(x).cast('B'))
+    return digest.hexdigest()
+
+
+class ICACache:
+    """
+    Directory of fitted ICAModels, one `<key>.npz` per recording.
+
+    With warm_start=True, a recording that is not cached is fitted starting
+    from the rotation of the last model this cache fitted or loaded (when the
+    channel count matches), which speeds up runs over appended recordings.
+    Warm-started fits are keyed like cold ones; they reach the same optimum
+    up to the order and sign of the components.
+    """
+
+    def __init__(self, cache_dir, warm_start=False, max_iter=ICA_MAX_ITER, tol=ICA_TOL,
+                 random_state=ICA_RANDOM_STATE):
+        self.cache_dir = cache_dir
+        self.warm_start = warm_start
+        self.max_iter = max_iter
+        self.tol = tol
+        self.random_state = random_state
+        self.hits = 0
+        self.misses = 0
+        self._last = None
+
+    def key(self, signal):
+        return signal_key(signal, self.max_iter, self.tol, self.random_state)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + '.npz')
+
+    def get(self, key):
+        """Return the cached model for `key`, or None."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        return ICAModel.load(path)
+
+    def fit(self, signal):
+        """Return the ICAModel of `signal`, fitting and caching it on a miss."""
+        key = self.key(signal)
+        model = self.get(key)
+        if model is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            init = None
+            if self.warm_start and self._last is not None and self._last.n_components == signal.shape[1]:
+                init = self._last.weights
+            model = fit_ica(signal, init, self.max_iter, self.tol, self.random_state)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            model.save(self.path(key))
+        self._last = model
+        return model
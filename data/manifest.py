@@ -0,0 +1,168 @@
+"""
+Manifest for incremental re-processing of the raw .mat directory.
+
+For every source file the manifest records its size, mtime and SHA-256
+together with the segment derived from it: the validated (samples, 32)
+signal saved as an .npy file in the segment directory. A later run only
+loads the .mat files that are new or whose content changed, drops the
+segments of files that were deleted, and rebuilds the combined dataset
+from the cached segments.
+
+Layout of a segment directory (next to the output, e.g.
+'eeg_emotion_dataset.segments'):
+    manifest.json
+    sub1t1H.npy, sub1t1S.npy, ...
+"""
+import os
+import json
+import hashlib
+import numpy as np
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 1
+SEGMENTS_EXTENSION = '.segments'
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stat(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+class Manifest:
+    """Source file -> segment bookkeeping stored in `<segment_dir>/manifest.json`."""
+
+    def __init__(self, segment_dir, settings=None):
+        self.segment_dir = segment_dir
+        self.settings = settings or {}
+        self.entries = {}
+        self.outputs = {}
+
+    @classmethod
+    def load(cls, segment_dir, settings=None):
+        """
+        Load the manifest in `segment_dir`, or start an empty one. `settings`
+        describes how segments are derived (EEG variable, preprocessing); a
+        manifest written with other settings is discarded, since none of its
+        segments can be reused.
+        """
+        manifest = cls(segment_dir, settings)
+        path = os.path.join(segment_dir, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return manifest
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('version') != MANIFEST_VERSION or saved.get('settings') != manifest.settings:
+            return manifest
+        manifest.entries = saved.get('files', {})
+        manifest.outputs = saved.get('outputs', {})
+        return manifest
+
+    def save(self):
+        os.makedirs(self.segment_dir, exist_ok=True)
+        path = os.path.join(self.segment_dir, MANIFEST_FILE)
+        data = {
+            'version': MANIFEST_VERSION,
+            'settings': self.settings,
+            'files': self.entries,
+            'outputs': self.outputs,
+        }
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(path + '.tmp', path)
+
+    def segment_path(self, filename):
+        return os.path.join(self.segment_dir, self.entries[filename]['segment'])
+
+    def plan(self, file_paths):
+        """
+        Compare the current files with the manifest.
+
+        Returns (unchanged, changed, deleted): lists of paths to keep and to
+        (re)process, and filenames that disappeared. A file whose size and
+        mtime match is trusted without hashing; otherwise it only counts as
+        changed if its SHA-256 differs (a touched file is just re-stamped).
+        """
+        unchanged, changed = [], []
+        current = set()
+        for path in file_paths:
+            filename = os.path.basename(path)
+            current.add(filename)
+            entry = self.entries.get(filename)
+            if entry is None or not os.path.exists(self.segment_path(filename)):
+                changed.append(path)
+                continue
+
+            stat = file_stat(path)
+            if stat['size'] == entry['size'] and stat['mtime_ns'] == entry['mtime_ns']:
+                unchanged.append(path)
+            elif stat['size'] == entry['size'] and file_sha256(path) == entry['sha256']:
+                entry['mtime_ns'] = stat['mtime_ns']
+                unchanged.append(path)
+            else:
+                changed.append(path)
+
+        deleted = sorted(set(self.entries) - current)
+        return unchanged, changed, deleted
+
+    def add(self, path, record):
+        """Store `record`'s signal as the segment of `path` and record it."""
+        os.makedirs(self.segment_dir, exist_ok=True)
+        filename = os.path.basename(path)
+        segment = os.path.splitext(filename)[0] + '.npy'
+        np.save(os.path.join(self.segment_dir, segment), record['data'])
+        self.entries[filename] = {
+            **file_stat(path),
+            'sha256': file_sha256(path),
+            'segment': segment,
+            'subject_id': record['subject_id'],
+            'trial': record['trial'],
+            'emotion': record['emotion'],
+            'rows': int(record['data'].shape[0]),
+        }
+
+    def remove(self, filename):
+        """Forget `filename` and delete its segment, if any."""
+        entry = self.entries.pop(filename, None)
+        if entry is not None:
+            segment = os.path.join(self.segment_dir, entry['segment'])
+            if os.path.exists(segment):
+                os.remove(segment)
+
+    def iter_segments(self):
+        """
+        Yield (filename, entry, signal) in filename order; each signal is a
+        read-only memmap of the segment, so assembling the dataset never
+        loads more than one recording at a time.
+        """
+        for filename in sorted(self.entries):
+            yield filename, self.entries[filename], np.load(self.segment_path(filename), mmap_mode='r')
+
+    def output_is_current(self, output_path, output_format):
+        """True if `output_path` was assembled from exactly the current segments."""
+        saved = self.outputs.get(output_format)
+        return (
+            saved is not None
+            and saved['path'] == os.path.abspath(output_path)
+            and saved['sources'] == self._sources_digest()
+            and os.path.exists(output_path)
+        )
+
+    def mark_output(self, output_path, output_format):
+        self.outputs[output_format] = {
+            'path': os.path.abspath(output_path),
+            'sources': self._sources_digest(),
+        }
+
+    def _sources_digest(self):
+        digest = hashlib.sha256()
+        for filename in sorted(self.entries):
+            digest.update(f"{filename}:{self.entries[filename]['sha256']}\n".encode('utf-8'))
+        return digest.hexdigest()
@@ -0,0 +1,172 @@
+"""
+Python port of the MATLAB preprocessing chain (data/interim/fircode.m).
+
+The chain that produced the `filter_wd_sgf_fir` recordings is:
+
+    0. ICA (runica, extended): the components `weights * EEGdata` replace
+       the channels; optional here, see data/ica.py
+    1. FIR band-pass 0.5-45 Hz at 128 Hz: order-200 fir1 high-pass and
+       low-pass, applied forward and backward (filtfilt, zero phase)
+    2. Savitzky-Golay trend removal: subtract sgolayfilt(x, 5, 127)
+    3. Wavelet denoising (db2, 4 levels, soft threshold at 0.15 * std of
+       the level-4 details); commented out in fircode.m, optional here
+
+All steps work on a whole (samples, channels) recording at once. The FIR
+stage defaults to FFT overlap-add convolution with the combined zero-phase
+kernel instead of running lfilter twice per cascade stage:
+
+    clean = preprocess(signal)                        # FIR + Savitzky-Golay
+    clean = preprocess(signal, wavelet=True)          # + wavelet denoising
+    clean = preprocess(signal, ica=True, ica_cache='ica_cache')  # ICA first
+    filtered = fir_filter(signal, bandpass_kernel())  # FIR only
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy import signal as sps
+
+from data.ica import ICACache, fit_ica
+
+SAMPLING_RATE = 128
+
+# FIR band-pass (fircode.m)
+FIR_ORDER = 200
+LOW_CUTOFF = 0.5
+HIGH_CUTOFF = 45.0
+
+# Savitzky-Golay trend removal (fircode.m)
+SG_FRAME_LENGTH = 127
+SG_ORDER = 5
+
+# Wavelet denoising (fircode.m, commented-out block)
+WAVELET = 'db2'
+WAVELET_LEVEL = 4
+WAVELET_THRESHOLD = 0.15
+
+
+@lru_cache(maxsize=None)
+def _bandpass_taps(order, low, high, fs):
+    # fir1 designs a Hamming-windowed filter of order+1 taps, scaled to unit gain
+    nyquist = fs / 2
+    b_low = sps.firwin(order + 1, high / nyquist, window='hamming', pass_zero='lowpass')
+    b_high = sps.firwin(order + 1, low / nyquist, window='hamming', pass_zero='highpass')
+    return b_low, b_high
+
+
+def bandpass_kernel(order=FIR_ORDER, low=LOW_CUTOFF, high=HIGH_CUTOFF, fs=SAMPLING_RATE):
+    """
+    Single FIR kernel equal to the fircode.m low-pass/high-pass cascade.
+    FIR filters commute, so the cascade is one convolution of the two.
+    """
+    b_low, b_high = _bandpass_taps(order, low, high, fs)
+    return np.convolve(b_low, b_high)
+
+
+def _odd_extend(x, n):
+    # Odd reflection about the end points, as filtfilt's default padding
+    if n < 1:
+        return x
+    left = 2 * x[:1] - x[n:0:-1]
+    right = 2 * x[-1:] - x[-2:-n - 2:-1]
+    return np.concatenate([left, x, right], axis=0)
+
+
+def fir_filter(signal, kernel, zero_phase=True, method='fft'):
+    """
+    Apply an FIR `kernel` to every channel of `signal` (samples, channels).
+
+    zero_phase=True filters forward and backward like MATLAB/scipy filtfilt
+    (squared magnitude, no delay); False is a causal single pass like filter.
+    method='fft' convolves the whole 2-D array with scipy's overlap-add
+    convolution (for zero phase, with the symmetric forward-backward kernel
+    on an odd-padded signal); method='direct' uses scipy.signal.filtfilt /
+    lfilter along the sample axis.
+    """
+    x = np.asarray(signal)
+    squeeze = x.ndim == 1
+    if squeeze:
+        x = x[:, None]
+    kernel = np.asarray(kernel, dtype=np.float64)
+    n = x.shape[0]
+
+    if method == 'direct':
+        if zero_phase:
+            out = sps.filtfilt(kernel, 1.0, x, axis=0)
+        else:
+            out = sps.lfilter(kernel, 1.0, x, axis=0)
+    elif method == 'fft':
+        if zero_phase:
+            # Forward-backward filtering is convolution with h * reversed(h)
+            both = np.convolve(kernel, kernel[::-1])
+            pad = min(3 * len(kernel), n - 1)
+            padded = _odd_extend(x, pad)
+            out = sps.oaconvolve(padded, both[:, None], mode='same', axes=0)[pad:pad + n]
+        else:
+            out = sps.oaconvolve(x, kernel[:, None], mode='full', axes=0)[:n]
+    else:
+        raise ValueError(f"Unknown filter method '{method}'. Expected 'fft' or 'direct'.")
+
+    out = out.astype(x.dtype if np.issubdtype(x.dtype, np.floating) else np.float64, copy=False)
+    return out[:, 0] if squeeze else out
+
+
+def remove_sgolay_trend(signal, frame_length=SG_FRAME_LENGTH, order=SG_ORDER):
+    """Subtract the Savitzky-Golay smoothed trend from every channel."""
+    frame_length = min(frame_length, signal.shape[0] - (1 - signal.shape[0] % 2))
+    if frame_length <= order:
+        return signal
+    return signal - sps.savgol_filter(signal, frame_length, order, axis=0)
+
+
+def wavelet_denoise(signal, wavelet=WAVELET, level=WAVELET_LEVEL, threshold=WAVELET_THRESHOLD):
+    """
+    Soft-threshold wavelet denoising of every channel.
+
+    fircode.m decomposes the flattened matrix and uses one threshold for
+    all channels; here each channel is decomposed separately (in one
+    batched call) with its own threshold of `threshold` times the standard
+    deviation of its level-`level` detail coefficients. Needs PyWavelets.
+    """
+    try:
+        import pywt
+    except ImportError:
+        raise ImportError("Wavelet denoising needs PyWavelets: pip install PyWavelets")
+
+    n = signal.shape[0]
+    coeffs = pywt.wavedec(signal, wavelet, level=level, axis=0)
+    # coeffs[1] holds the details of the deepest level, like detcoef(c, l, level)
+    thresh = threshold * np.std(coeffs[1], axis=0, ddof=1)
+    coeffs = [pywt.threshold(c, thresh, mode='soft') for c in coeffs]
+    return pywt.waverec(coeffs, wavelet, axis=0)[:n].astype(signal.dtype, copy=False)
+
+
+@lru_cache(maxsize=None)
+def _ica_cache(cache_dir, warm_start):
+    # One cache per process, so warm starts carry over between recordings
+    return ICACache(cache_dir, warm_start=warm_start)
+
+
+def preprocess(signal, fs=SAMPLING_RATE, bandpass=True, sgolay=True, wavelet=False,
+               method='fft', zero_phase=True, ica=False, ica_cache=None, ica_warm_start=False):
+    """
+    Run the fircode.m chain on one (samples, channels) recording:
+    optionally ICA, then FIR band-pass, Savitzky-Golay trend removal and,
+    optionally, wavelet denoising. Returns a new float array of the same shape.
+
+    With ica=True the unmixing is fitted per recording; give `ica_cache` (a
+    directory) to store it by content hash and reuse it on later runs.
+    """
+    x = np.asarray(signal, dtype=np.float64)
+    if ica:
+        if ica_cache is not None:
+            model = _ica_cache(ica_cache, ica_warm_start).fit(x)
+        else:
+            model = fit_ica(x)
+        x = model.transform(x)
+    if bandpass:
+        x = fir_filter(x, bandpass_kernel(fs=fs), zero_phase=zero_phase, method=method)
+    if sgolay:
+        x = remove_sgolay_trend(x)
+    if wavelet:
+        x = wavelet_denoise(x)
+    return x